@@ -0,0 +1,91 @@
+"""
+Mede a memória ocupada pela AST dos maiores programas de `exemplos/`.
+
+Compara a árvore produzida pelo parser com uma versão sem compartilhamento de
+literais e sem internar os nomes de variáveis (como o `LoxTransformer` fazia
+originalmente). A memória é medida com tracemalloc, incluindo os nós e as
+strings, sem o cache de árvores.
+
+Uso:
+
+    $ uv run python benchmarks/ast_memory.py [--files N]
+"""
+
+import argparse
+import gc
+import os
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+os.environ["LOX_NO_CACHE"] = "1"
+
+from lox import parse  # noqa: E402
+from lox.ast import Literal, Var  # noqa: E402
+from lox.transformer import LoxTransformer  # noqa: E402
+
+EXAMPLES = Path(__file__).parent.parent / "exemplos"
+
+
+@contextmanager
+def unshared():
+    """
+    Desabilita o compartilhamento de literais e a internação de nomes.
+    """
+    literal, var = LoxTransformer.literal, LoxTransformer.VAR
+    LoxTransformer.literal = lambda self, value: Literal(value)  # type: ignore[method-assign]
+    LoxTransformer.VAR = lambda self, token: Var(str(token))  # type: ignore[method-assign]
+    try:
+        yield
+    finally:
+        LoxTransformer.literal, LoxTransformer.VAR = literal, var  # type: ignore[method-assign]
+
+
+def ast_size(src: str, repeat: int = 3) -> int:
+    """
+    Memória (em bytes) retida pela árvore sintática do programa.
+
+    Retorna a menor medida entre várias repetições, para descontar estruturas
+    criadas apenas na primeira análise (ex.: a tabela de strings internadas).
+    """
+    sizes = []
+    for _ in range(repeat):
+        gc.collect()
+        tracemalloc.start()
+        tree = parse(src)
+        sizes.append(tracemalloc.get_traced_memory()[0])
+        tracemalloc.stop()
+        del tree
+    return min(sizes)
+
+
+def largest_examples(count: int) -> list[tuple[Path, str]]:
+    examples = []
+    for path in sorted(EXAMPLES.rglob("*.lox"), key=lambda p: -p.stat().st_size):
+        src = path.read_text()
+        try:
+            parse(src)
+        except Exception:
+            continue
+        examples.append((path, src))
+        if len(examples) == count:
+            break
+    return examples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=5, help="número de exemplos")
+    args = parser.parse_args()
+
+    print(f"{'exemplo':<40} {'antes':>10} {'depois':>10} {'redução':>8}")
+    for path, src in largest_examples(args.files):
+        with unshared():
+            before = ast_size(src)
+        after = ast_size(src)
+        name = str(path.relative_to(EXAMPLES))
+        print(f"{name:<40} {before:>10} {after:>10} {100 * (1 - after / before):>7.1f}%")
+
+
+if __name__ == "__main__":
+    main()
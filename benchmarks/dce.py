@@ -0,0 +1,78 @@
+"""
+Mede o efeito da eliminação de código morto (`lox.optimizer`).
+
+Gera um programa com várias funções globais não usadas e um laço cujo corpo
+contém `if`s com condições constantes (como flags de depuração escritas
+como literais). Compara o tamanho da árvore e o tempo de execução sem
+otimizações, apenas com a dobra de constantes e com a eliminação de código
+morto. A saída do programa é descartada.
+
+Uso:
+
+    $ uv run python benchmarks/dce.py [--n N] [--unused N] [--repeat N]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import time
+
+os.environ["LOX_NO_CACHE"] = "1"
+
+from lox import Ctx, parse  # noqa: E402
+from lox.node import Node  # noqa: E402
+from lox.optimizer import removals  # noqa: E402
+from lox.passes import run_passes  # noqa: E402
+
+LOOP = """
+var total = 0;
+for (var i = 0; i < {n}; i = i + 1) {{
+  if (1 > 2) print "depurando " + "laço";
+  if (true and !false) total = total + i; else total = total - i;
+  while (nil) total = 0;
+}}
+print total;
+"""
+
+UNUSED = """
+fun unused{i}(x) {{
+  if (x > 1) return x * unused{i}(x - 1);
+  return 1;
+  print "inalcançável";
+}}
+"""
+
+
+def run(tree: Node) -> float:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        tree.eval(Ctx.from_dict({}))
+    return time.perf_counter() - start
+
+
+def count(tree: Node) -> int:
+    return sum(1 for _ in tree.descendants())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--n", type=int, default=50_000, help="número de iterações")
+    parser.add_argument("--unused", type=int, default=200, help="número de funções não usadas")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    src = "".join(UNUSED.format(i=i) for i in range(args.unused)) + LOOP.format(n=args.n)
+    trees = {"original": parse(src), "fold": run_passes(parse(src), ["fold"])}
+    with removals() as removed:
+        trees["fold + dce"] = run_passes(parse(src), ["dce"])
+
+    print(f"{'árvore':<12} {'nós':>7} {'tempo':>8}")
+    for name, tree in trees.items():
+        seconds = min(run(tree) for _ in range(args.repeat))
+        print(f"{name:<12} {count(tree):>7} {seconds:>7.2f}s")
+    print("removidos: " + ", ".join(f"{reason}={n}" for reason, n in removed.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Compara a árvore de objetos com a representação plana de `lox.flat`.
+
+Para cada programa, mede:
+
+    B/nó:       bytes por nó da árvore de objetos (tracemalloc) e dos arrays
+                da árvore plana (`FlatTree.nbytes`).
+    carregar:   tempo para carregar a árvore salva em disco, com `pickle`
+                (como no cache de `lox.parse`) e com `lox.flat.load` (mmap).
+    percorrer:  tempo para visitar todos os nós logo após o carregamento.
+
+Uso:
+
+    $ uv run python benchmarks/flat_ast.py [--lines N] [--repeat N]
+"""
+
+import argparse
+import gc
+import os
+import pickle
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+os.environ["LOX_NO_CACHE"] = "1"
+
+from lox import flat, parse  # noqa: E402
+from lox.synth import SHAPES, generate  # noqa: E402
+
+
+def object_size(src: str) -> int:
+    """
+    Memória (em bytes) alocada pela árvore de objetos, sem contar o parser.
+    """
+    tree = parse(src)
+    data = pickle.dumps(tree, protocol=pickle.HIGHEST_PROTOCOL)
+    del tree
+    gc.collect()
+    tracemalloc.start()
+    # A árvore precisa continuar viva enquanto a memória é medida.
+    tree = pickle.loads(data)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del tree
+    return size
+
+
+def best(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def load_pickle(path: Path):
+    with open(path, "rb") as fd:
+        return pickle.load(fd)
+
+
+def load_flat(path: Path):
+    image = flat.load(path)
+    image.root  # força a leitura do cabeçalho e da raiz
+    return image
+
+
+def walk(tree) -> int:
+    return sum(1 for _ in tree.descendants())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", type=int, default=20_000, help="linhas dos programas sintéticos")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    header = f"{'programa':<12} {'nós':>8} {'B/nó obj':>9} {'B/nó flat':>10} {'pickle':>9} {'mmap':>9} {'percorrer obj':>14} {'percorrer flat':>15}"
+    print(header)
+    with tempfile.TemporaryDirectory() as tmp:
+        for shape in SHAPES:
+            src = generate(args.lines, shape)
+            tree = parse(src)
+            image = flat.flatten(tree)
+            nodes = len(image)
+
+            pickled = Path(tmp, f"{shape}.loxc")
+            pickled.write_bytes(pickle.dumps(tree, protocol=pickle.HIGHEST_PROTOCOL))
+            flat_path = Path(tmp, f"{shape}.loxf")
+            image.save(flat_path)
+
+            obj_bytes = object_size(src) / nodes
+            flat_bytes = image.nbytes() / nodes
+            t_pickle = best(lambda: load_pickle(pickled), args.repeat)
+            t_mmap = best(lambda: load_flat(flat_path), args.repeat)
+            w_obj = best(lambda: walk(load_pickle(pickled)), args.repeat)
+            w_flat = best(lambda: walk(load_flat(flat_path).root), args.repeat)
+            print(
+                f"{shape:<12} {nodes:>8} {obj_bytes:>9.1f} {flat_bytes:>10.1f} "
+                f"{t_pickle * 1000:>7.1f}ms {t_mmap * 1000:>7.2f}ms {w_obj * 1000:>12.1f}ms {w_flat * 1000:>13.1f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Mede o ganho da dobra de constantes (`lox.optimizer.fold`).
+
+Executa um laço cujo corpo contém expressões constantes (conversões de
+unidades, concatenação de strings literais, etc.), com a árvore produzida
+por `lox.parse` e com a árvore otimizada pelo passe "fold". A saída do
+programa é descartada.
+
+Uso:
+
+    $ uv run python benchmarks/fold.py [--n N] [--repeat N]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import time
+
+os.environ["LOX_NO_CACHE"] = "1"
+
+from lox import Ctx, parse  # noqa: E402
+from lox.node import Node  # noqa: E402
+from lox.passes import run_passes  # noqa: E402
+
+PROGRAM = """
+var total = 0;
+var label = "";
+for (var i = 0; i < {n}; i = i + 1) {{
+  total = total + i * (60 * 60 * 24) / (1000 * 1000) - -(2 * 3);
+  if (!(1 > 2) and 10 / 4 > 2) label = "dia" + "s";
+}}
+print total;
+print label;
+"""
+
+
+def run(tree: Node) -> float:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        tree.eval(Ctx.from_dict({}))
+    return time.perf_counter() - start
+
+
+def count(tree: Node) -> int:
+    return sum(1 for _ in tree.descendants())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--n", type=int, default=50_000, help="número de iterações")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    src = PROGRAM.format(n=args.n)
+    plain = parse(src)
+    folded = run_passes(parse(src), ["fold"])
+
+    before = min(run(plain) for _ in range(args.repeat))
+    after = min(run(folded) for _ in range(args.repeat))
+    print(f"{'árvore':<10} {'nós':>6} {'tempo':>8}")
+    print(f"{'original':<10} {count(plain):>6} {before:>7.2f}s")
+    print(f"{'fold':<10} {count(folded):>6} {after:>7.2f}s")
+    print(f"ganho: {before / after:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Mede os bytes por nó da AST com e sem `__slots__`.
+
+Para cada programa, copia a árvore produzida por `lox.parse` duas vezes: uma
+usando as próprias classes de `lox.ast` (com `__slots__`) e outra usando
+dataclasses equivalentes sem `__slots__`, isto é, com um `__dict__` por
+instância, como os nós eram definidos originalmente. As duas cópias
+compartilham os mesmos valores (nomes, números, funções), então a diferença
+medida com tracemalloc vem apenas do layout dos nós e das listas de filhos.
+
+Uso:
+
+    $ uv run python benchmarks/node_layout.py [--files N] [--lines N]
+"""
+
+import argparse
+import gc
+import os
+import tracemalloc
+from dataclasses import fields, is_dataclass, make_dataclass
+from functools import cache
+from pathlib import Path
+from typing import Any, Callable
+
+os.environ["LOX_NO_CACHE"] = "1"
+
+from lox import parse  # noqa: E402
+from lox.node import Node  # noqa: E402
+from lox.synth import SHAPES, generate  # noqa: E402
+
+EXAMPLES = Path(__file__).parent.parent / "exemplos"
+
+
+@cache
+def unslotted(cls: type) -> type:
+    """
+    Dataclass equivalente a `cls`, mas sem `__slots__`.
+    """
+    return make_dataclass(cls.__name__, [(f.name, Any) for f in fields(cls)])
+
+
+def copy_tree(node: Any, factory: Callable[[type], type]) -> Any:
+    """
+    Copia a árvore criando cada nó com a classe `factory(type(node))`.
+    """
+    if isinstance(node, list):
+        return [copy_tree(item, factory) for item in node]
+    if isinstance(node, Node) and is_dataclass(node):
+        args = [copy_tree(getattr(node, f.name), factory) for f in fields(node)]
+        return factory(type(node))(*args)
+    return node
+
+
+def tree_size(tree: Node, factory: Callable[[type], type]) -> int:
+    """
+    Memória (em bytes) alocada para copiar a árvore.
+    """
+    copy_tree(tree, factory)  # cria as classes e aquece os caches
+    gc.collect()
+    tracemalloc.start()
+    copy = copy_tree(tree, factory)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del copy
+    return size
+
+
+def programs(files: int, lines: int) -> list[tuple[str, str]]:
+    result = []
+    for path in sorted(EXAMPLES.rglob("*.lox"), key=lambda p: -p.stat().st_size):
+        src = path.read_text()
+        try:
+            parse(src)
+        except Exception:
+            continue
+        result.append((str(path.relative_to(EXAMPLES)), src))
+        if len(result) == files:
+            break
+    for shape in SHAPES:
+        result.append((f"synth:{shape} ({lines} linhas)", generate(lines, shape)))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=3, help="número de exemplos")
+    parser.add_argument("--lines", type=int, default=5_000, help="linhas dos programas sintéticos")
+    args = parser.parse_args()
+
+    print(f"{'programa':<40} {'nós':>8} {'B/nó antes':>11} {'B/nó depois':>12} {'redução':>8}")
+    for name, src in programs(args.files, args.lines):
+        tree = parse(src)
+        nodes = sum(1 for _ in tree.descendants())
+        before = tree_size(tree, unslotted) / nodes
+        after = tree_size(tree, lambda cls: cls) / nodes
+        print(f"{name:<40} {nodes:>8} {before:>11.1f} {after:>12.1f} {100 * (1 - after / before):>7.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Mede o ganho da análise léxica em paralelo (`lox.parallel_scan`).
+
+Gera um código fonte grande repetindo os exemplos de `exemplos/` e compara o
+tempo de `lox.scanner.scan` com o de `scan_parallel` para diferentes números
+de processos. O ganho depende do número de CPUs disponíveis.
+
+Uso:
+
+    $ uv run python benchmarks/parallel_scan.py [--size MB] [--repeat N]
+"""
+
+import argparse
+import os
+import time
+from pathlib import Path
+
+from lox.parallel_scan import scan_parallel
+from lox.scanner import scan
+
+BASE_DIR = Path(__file__).parent.parent
+EXAMPLES = BASE_DIR / "exemplos"
+
+
+def make_source(size: int) -> str:
+    """
+    Concatena os exemplos até atingir `size` caracteres.
+    """
+    corpus = "\n".join(path.read_text() for path in sorted(EXAMPLES.rglob("*.lox")))
+    return (corpus + "\n") * (size // len(corpus) + 1)
+
+
+def timeit(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=float, default=10, help="tamanho em MB")
+    parser.add_argument("--repeat", type=int, default=3, help="repetições")
+    args = parser.parse_args()
+
+    src = make_source(int(args.size * 1e6))
+    expected = scan(src).data
+    serial = timeit(lambda: scan(src), args.repeat)
+    print(f"{len(src) / 1e6:.1f}MB, {len(expected) // 3} tokens, {os.cpu_count()} CPU(s)")
+    print(f"{'processos':>10} {'tempo':>10} {'ganho':>8}")
+    print(f"{'scan':>10} {serial * 1000:>8.1f}ms {1:>7.2f}x")
+
+    workers = 1
+    while workers <= 2 * (os.cpu_count() or 1):
+        tokens = scan_parallel(src, workers)
+        assert tokens.data == expected
+        elapsed = timeit(lambda: scan_parallel(src, workers), args.repeat)
+        print(f"{workers:>10} {elapsed * 1000:>8.1f}ms {serial / elapsed:>7.2f}x")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
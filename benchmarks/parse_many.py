@@ -0,0 +1,73 @@
+"""
+Mede como a análise em lote (`lox.parse_many`) escala com o número de
+processos.
+
+Copia os exemplos válidos para uma pasta temporária (repetidos até atingir o
+número de arquivos pedido) e mede o tempo de `parse_many` com 1, 2, 4, ...
+processos, até o número de CPUs. O cache de árvores é desabilitado.
+
+Uso:
+
+    $ uv run python benchmarks/parse_many.py [--files N]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+os.environ["LOX_NO_CACHE"] = "1"
+
+from lox import parse  # noqa: E402
+from lox.batch import parse_many  # noqa: E402
+
+BASE_DIR = Path(__file__).parent.parent
+
+
+def make_files(directory: Path, count: int) -> list[Path]:
+    sources = []
+    for path in sorted((BASE_DIR / "exemplos").rglob("*.lox")):
+        if path.parent.name in ("benchmark", "limit"):
+            continue
+        src = path.read_text()
+        try:
+            parse(src)
+        except Exception:
+            continue
+        sources.append(src)
+
+    paths = []
+    for i in range(count):
+        path = directory / f"{i}.lox"
+        path.write_text(sources[i % len(sources)])
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=2000, help="número de arquivos")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = make_files(Path(tmp), args.files)
+        workers = 1
+        baseline = None
+        while True:
+            start = time.perf_counter()
+            errors = sum(not result.ok for result in parse_many(paths, workers))
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            assert errors == 0
+            print(
+                f"{workers:>3} processo(s): {elapsed:6.2f}s "
+                f"({len(paths) / elapsed:7.0f} arquivos/s, {baseline / elapsed:4.1f}x)"
+            )
+            if workers >= (os.cpu_count() or 1):
+                break
+            workers = min(2 * workers, os.cpu_count() or 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Mede como cada fase da análise sintática escala com o tamanho do programa.
+
+Gera programas com `lox.synth` de 1 mil a 1 milhão de linhas (por padrão) e
+mede o tempo de cada fase:
+
+    lex:        análise léxica (`lox.lex`).
+    parse_cst:  árvore do Lark, sem o LoxTransformer (`lox.parse_cst`).
+    parse:      AST completa: transformação, validação e remoção do açúcar
+                sintático (`lox.parse`, sem o cache).
+
+além do pico de memória de `parse` (medido com tracemalloc em uma execução
+separada, pois o tracemalloc distorce os tempos).
+
+Ao final, estima o expoente k de tempo ~ linhas^k de cada fase por mínimos
+quadrados em escala log-log. Fases lineares têm k próximo de 1.
+
+Uso:
+
+    $ uv run python benchmarks/parse_scaling.py [--shape FORMATO] [--max-lines N]
+"""
+
+import argparse
+import gc
+import math
+import os
+import time
+import tracemalloc
+from collections import deque
+from typing import Callable
+
+os.environ["LOX_NO_CACHE"] = "1"
+
+from lox import lex, parse, parse_cst  # noqa: E402
+from lox.synth import SHAPES, generate  # noqa: E402
+
+# Fases com expoente acima deste limite são marcadas como não lineares.
+LINEAR_LIMIT = 1.15
+
+PHASES: dict[str, Callable[[str], object]] = {
+    "lex": lambda src: deque(lex(src), maxlen=0),
+    "parse_cst": parse_cst,
+    "parse": lambda src: parse(src, cache=False),
+}
+
+
+def elapsed(fn: Callable[[str], object], src: str, repeat: int) -> float:
+    """
+    Menor tempo entre as repetições, em segundos.
+    """
+    best = math.inf
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn(src)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def peak_memory(src: str) -> int:
+    """
+    Pico de memória (em bytes) alocada durante `parse`.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        parse(src, cache=False)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def exponent(sizes: list[int], times: list[float]) -> float:
+    """
+    Inclinação da reta que melhor aproxima log(tempo) x log(linhas).
+    """
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(max(t, 1e-9)) for t in times]
+    mx, my = sum(xs) / len(xs), sum(ys) / len(ys)
+    num = sum((x - mx) * (y - my) for x, y in zip(xs, ys))
+    den = sum((x - mx) ** 2 for x in xs)
+    return num / den if den else math.nan
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--shape", choices=[*SHAPES, "all"], default="mixed")
+    parser.add_argument("--min-lines", type=int, default=1_000)
+    parser.add_argument("--max-lines", type=int, default=1_000_000)
+    parser.add_argument("-n", "--repeat", type=int, default=1, help="repetições de cada medida")
+    parser.add_argument("--no-memory", action="store_true", help="não mede o pico de memória")
+    args = parser.parse_args()
+
+    sizes = []
+    size = args.min_lines
+    while size <= args.max_lines:
+        sizes.append(size)
+        size *= 10
+
+    shapes = list(SHAPES) if args.shape == "all" else [args.shape]
+    for shape in shapes:
+        print(f"formato: {shape}")
+        header = f"{'linhas':>10} {'KiB':>9}"
+        header += "".join(f" {name:>10} {'µs/linha':>9}" for name in PHASES)
+        header += f" {'memória':>10}"
+        print(header)
+
+        times: dict[str, list[float]] = {name: [] for name in PHASES}
+        for lines in sizes:
+            src = generate(lines, shape)
+            row = f"{lines:>10} {len(src) / 1024:>9.0f}"
+            for name, fn in PHASES.items():
+                t = elapsed(fn, src, args.repeat)
+                times[name].append(t)
+                row += f" {t * 1000:>8.1f}ms {t / lines * 1e6:>9.2f}"
+            if args.no_memory:
+                row += f" {'-':>10}"
+            else:
+                row += f" {peak_memory(src) / 2**20:>7.1f}MiB"
+            print(row, flush=True)
+
+        if len(sizes) > 1:
+            for name, values in times.items():
+                k = exponent(sizes, values)
+                verdict = "linear" if k <= LINEAR_LIMIT else "NÃO linear"
+                print(f"  {name:<10} tempo ~ linhas^{k:.2f}  ({verdict})")
+        print()
+
+
+if __name__ == "__main__":
+    main()
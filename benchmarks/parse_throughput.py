@@ -0,0 +1,90 @@
+"""
+Mede a vazão da análise sintática (linhas por segundo) de cada parser.
+
+O código analisado é formado pelos exemplos sintaticamente válidos da pasta
+`exemplos`, repetidos até atingir o número de linhas desejado. Medimos apenas
+a construção da AST, sem a análise semântica.
+
+    lark:          parser LALR do Lark com o lexer contextual e LoxTransformer.
+    lark+scanner:  parser LALR do Lark com o analisador léxico de lox.scanner.
+    pratt:         parser descendente recursivo de lox.pratt.
+
+Uso:
+
+    $ uv run python benchmarks/parse_throughput.py [-n REPETIÇÕES] [--lines N]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from lox.parser import get_ast_parser, parse  # noqa: E402
+from lox.pratt import pratt_parse  # noqa: E402
+
+
+def corpus(lines: int) -> str:
+    """
+    Concatena os exemplos válidos até obter pelo menos `lines` linhas.
+
+    Descartamos os exemplos que usam palavras reservadas como nomes de
+    variáveis, pois o lexer contextual do Lark os aceita e o scanner não.
+    """
+    lark_scanner = get_ast_parser("scanner")
+    sources = []
+    for path in sorted((BASE_DIR / "exemplos").rglob("*.lox")):
+        src = path.read_text()
+        try:
+            parse(src, cache=False)
+            lark_scanner.parse(src, start="start")
+        except Exception:
+            continue
+        sources.append(src.rstrip("\n") + "\n")
+
+    chunk = "".join(sources)
+    repeat = max(1, -(-lines // chunk.count("\n")))
+    return chunk * repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", "--repeat", type=int, default=5)
+    parser.add_argument("--lines", type=int, default=5_000)
+    args = parser.parse_args()
+
+    src = corpus(args.lines)
+    n_lines = src.count("\n")
+    lark = get_ast_parser("lark")
+    lark_scanner = get_ast_parser("scanner")
+    backends = {
+        "lark": lambda src: lark.parse(src, start="start"),
+        "lark+scanner": lambda src: lark_scanner.parse(src, start="start"),
+        "pratt": pratt_parse,
+    }
+    expected = backends["lark"](src)
+
+    print(f"{n_lines} linhas, {len(src) / 1024:.0f} KiB ({args.repeat} repetições)")
+    baseline = None
+    for name, parse_fn in backends.items():
+        assert parse_fn(src) == expected, f"{name} produziu uma árvore diferente"
+        times = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            parse_fn(src)
+            times.append(time.perf_counter() - start)
+        median = statistics.median(times)
+        rate = n_lines / median
+        line = f"{name:<14} {rate:>10,.0f} linhas/s  mediana={median * 1000:8.1f}ms"
+        if baseline is None:
+            baseline = median
+        else:
+            line += f"  ({baseline / median:.1f}x)"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Mede o custo de memória da tabela de posições (`lox.positions`).
+
+Para os maiores programas de `exemplos/`, compara a memória ocupada pela AST
+(medida com tracemalloc) com o tamanho da tabela de posições e do índice
+criado na primeira busca por um nó (`SourceMap.index`) e mostra o tempo
+necessário para construir a tabela na primeira consulta.
+
+Uso:
+
+    $ uv run python benchmarks/positions.py [--files N]
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+from pathlib import Path
+
+from lox import parse
+from lox.positions import source_map
+
+BASE_DIR = Path(__file__).parent.parent
+EXAMPLES = BASE_DIR / "exemplos"
+
+
+def largest_examples(count: int) -> list[tuple[Path, str]]:
+    """
+    Maiores exemplos que podem ser analisados sem erros.
+    """
+    examples = []
+    for path in sorted(EXAMPLES.rglob("*.lox"), key=lambda p: -p.stat().st_size):
+        src = path.read_text()
+        try:
+            parse(src, cache=False)
+        except Exception:
+            continue
+        examples.append((path, src))
+        if len(examples) == count:
+            break
+    return examples
+
+
+def measure(src: str) -> tuple[int, int, int, int, int, float]:
+    """
+    Retorna o número de nós, a memória da AST, a memória das tabelas de
+    posições, a memória do índice de nós, o número de linhas e o tempo de
+    construção das tabelas.
+    """
+    gc.collect()
+    tracemalloc.start()
+    tree = parse(src, cache=False)
+    ast_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    positions = source_map(tree)
+    assert positions is not None
+    start = time.perf_counter()
+    table_bytes = positions.nbytes()
+    elapsed = time.perf_counter() - start
+    positions.index(tree)
+    index_bytes = positions.nbytes() - table_bytes
+    nodes, lines = len(positions.offsets), len(positions.line_starts)
+    return nodes, ast_bytes, table_bytes, index_bytes, lines, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=5, help="número de exemplos")
+    args = parser.parse_args()
+
+    print(
+        f"{'exemplo':<40} {'nós':>7} {'AST':>10} {'posições':>10} {'B/nó':>6} {'%':>6} "
+        f"{'índice':>10} {'B/nó':>6} {'build':>8}"
+    )
+    for path, src in largest_examples(args.files):
+        nodes, ast_bytes, table_bytes, index_bytes, _, elapsed = measure(src)
+        name = str(path.relative_to(EXAMPLES))
+        print(
+            f"{name:<40} {nodes:>7} {ast_bytes:>10} {table_bytes:>10} "
+            f"{table_bytes / nodes:>6.1f} {100 * table_bytes / ast_bytes:>5.1f}% "
+            f"{index_bytes:>10} {index_bytes / nodes:>6.1f} {elapsed * 1000:>6.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Compara `Node.pretty` com a impressão em fluxo de `Node.write_pretty`.
+
+Para programas sintéticos grandes, mede o tempo até a primeira escrita, o
+tempo total e o pico de memória (tracemalloc) durante a impressão, sem contar
+a árvore. A saída é descartada.
+
+Uso:
+
+    $ uv run python benchmarks/pretty_stream.py [--lines N] [--shape NOME]
+"""
+
+import argparse
+import os
+import time
+import tracemalloc
+
+os.environ["LOX_NO_CACHE"] = "1"
+
+from lox import parse  # noqa: E402
+from lox.synth import SHAPES, generate  # noqa: E402
+
+
+class Sink:
+    # Arquivo que descarta a saída, registrando o instante da primeira escrita.
+    def __init__(self):
+        self.first: float | None = None
+
+    def write(self, data: str) -> int:
+        if self.first is None:
+            self.first = time.perf_counter()
+        return len(data)
+
+
+def measure(fn) -> tuple[float, float, int]:
+    sink = Sink()
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(sink)
+    total = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    first = (sink.first or start) - start
+    return first, total, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", type=int, default=20_000)
+    parser.add_argument("--shape", choices=[*SHAPES, "all"], default="all")
+    args = parser.parse_args()
+
+    shapes = SHAPES if args.shape == "all" else [args.shape]
+    print(f"{'formato':<14} {'modo':<14} {'1ª escrita':>11} {'total':>9} {'pico':>10}")
+    for shape in shapes:
+        tree = parse(generate(args.lines, shape))
+        modes = {
+            "pretty": lambda out: out.write(tree.pretty()),
+            "write_pretty": lambda out: tree.write_pretty(out),
+        }
+        for name, fn in modes.items():
+            first, total, peak = measure(fn)
+            print(f"{shape:<14} {name:<14} {first * 1000:>9.1f}ms {total:>8.2f}s {peak / 2**20:>8.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
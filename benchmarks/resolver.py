@@ -0,0 +1,79 @@
+"""
+Mede o ganho da resolução estática de variáveis (`lox.resolver`).
+
+Executa os programas de `exemplos/benchmark` duas vezes: com a árvore
+produzida por `lox.parse` (variáveis resolvidas, acessadas por índice) e com
+uma cópia em que os endereços foram apagados (busca pelo nome em cada escopo,
+como antes do passe). O argumento de `fib(35)` é reduzido com `--n` para que
+o interpretador termine em poucos segundos. A saída dos programas é
+descartada.
+
+Uso:
+
+    $ uv run python benchmarks/resolver.py [--n N] [--repeat N] [arquivos...]
+"""
+
+import argparse
+import contextlib
+import dataclasses
+import io
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+os.environ["LOX_NO_CACHE"] = "1"
+
+from lox import Ctx, parse  # noqa: E402
+from lox.node import ANALYSIS, Node  # noqa: E402
+
+BENCHMARKS = Path(__file__).parent.parent / "exemplos" / "benchmark"
+
+# Tamanho padrão do problema para cada programa (fib recursivo é exponencial).
+DEFAULT_N = {"fib.lox": 22, "fib_loop.lox": 20_000}
+
+
+def unresolve(tree: Node) -> None:
+    """
+    Restaura os valores padrão dos atributos preenchidos pelos passes de
+    análise, fazendo a árvore usar a busca de variáveis pelo nome.
+    """
+    for node in tree.descendants():
+        for f in dataclasses.fields(node):  # type: ignore[arg-type]
+            if ANALYSIS in f.metadata:
+                setattr(node, f.name, f.default)
+
+
+def run(tree: Node) -> float:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        tree.eval(Ctx.from_dict({}))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("files", nargs="*", default=sorted(DEFAULT_N))
+    parser.add_argument("--n", type=int, help="argumento usado no lugar de 35")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    sys.setrecursionlimit(10_000)
+
+    print(f"{'programa':<16} {'n':>7} {'por nome':>10} {'resolvido':>10} {'ganho':>7}")
+    for name in args.files:
+        path = BENCHMARKS / name if not Path(name).exists() else Path(name)
+        n = args.n or DEFAULT_N.get(path.name, 20)
+        src = re.sub(r"\bfib\(35\)", f"fib({n})", path.read_text())
+
+        resolved = parse(src)
+        by_name = parse(src)
+        unresolve(by_name)
+
+        before = min(run(by_name) for _ in range(args.repeat))
+        after = min(run(resolved) for _ in range(args.repeat))
+        print(f"{path.name:<16} {n:>7} {before:>9.2f}s {after:>9.2f}s {before / after:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Mede a avaliação de um conjunto de regras com `lox.rules.compile_rules`.
+
+Gera um conjunto sintético de regras (expressões) que combinam algumas
+subexpressões comuns, como `price * qty` e `customer.address.zone`, e compara
+avaliar cada árvore de `lox.parse_expr` separadamente com avaliar o conjunto
+compilado, em que cada subexpressão compartilhada é calculada uma única vez
+por ambiente.
+
+Uso:
+
+    $ uv run python benchmarks/rule_batch.py [--rules N] [--envs N]
+"""
+
+import argparse
+import os
+import random
+import time
+from types import SimpleNamespace
+
+os.environ["LOX_NO_CACHE"] = "1"
+
+from lox import Ctx, parse_expr  # noqa: E402
+from lox.rules import compile_rules  # noqa: E402
+
+# Subexpressões comuns a muitas regras.
+BASE = [
+    "price * qty",
+    "price * qty * (1 - discount)",
+    "customer.address.zone",
+    "customer.score * weight",
+    "(price - cost) / price",
+    "qty * unit_weight + packaging",
+]
+OPS = ["+", "-", "*"]
+CMP = [">", "<", ">=", "<="]
+
+
+def make_rules(n: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    rules = []
+    for _ in range(n):
+        left = f"({rng.choice(BASE)}) {rng.choice(OPS)} ({rng.choice(BASE)})"
+        right = f"({rng.choice(BASE)}) {rng.choice(OPS)} {rng.randint(1, 100)}"
+        rule = f"{left} {rng.choice(CMP)} {right}"
+        if rng.random() < 0.3:
+            rule = f"{rule} and ({rng.choice(BASE)}) > {rng.randint(1, 50)}"
+        rules.append(rule)
+    return rules
+
+
+def make_env(rng: random.Random) -> dict:
+    address = SimpleNamespace(zone=float(rng.randint(1, 9)))
+    customer = SimpleNamespace(address=address, score=rng.random() * 10)
+    return {
+        "price": rng.uniform(10, 100),
+        "qty": float(rng.randint(1, 50)),
+        "discount": rng.random() / 2,
+        "cost": rng.uniform(1, 10),
+        "weight": rng.random(),
+        "unit_weight": rng.random() * 3,
+        "packaging": 0.5,
+        "customer": customer,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rules", type=int, default=2_000)
+    parser.add_argument("--envs", type=int, default=50)
+    args = parser.parse_args()
+
+    sources = make_rules(args.rules)
+    exprs = [parse_expr(src) for src in sources]
+    rng = random.Random(1)
+    envs = [make_env(rng) for _ in range(args.envs)]
+
+    start = time.perf_counter()
+    rules = compile_rules(exprs)
+    compile_time = time.perf_counter() - start
+    print(f"{len(rules)} regras: {rules.source_nodes} nós -> {rules.nodes} nós, {rules.shared} compartilhados")
+    print(f"compilação: {compile_time * 1000:.1f}ms")
+
+    start = time.perf_counter()
+    expected = []
+    for env in envs:
+        ctx = Ctx.from_dict(env)
+        expected.append([expr.eval(ctx) for expr in exprs])
+    before = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = [rules.eval(env) for env in envs]
+    after = time.perf_counter() - start
+
+    assert results == expected
+    print(f"separadas:  {before * 1000:8.1f}ms ({before / args.envs * 1000:.2f}ms por ambiente)")
+    print(f"compiladas: {after * 1000:8.1f}ms ({after / args.envs * 1000:.2f}ms por ambiente, {before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Mede o custo de consultas sobre os pais de um nó na árvore sintática.
+
+Compara as implementações originais (que percorrem todos os ancestrais ou
+buscam o nó em toda a árvore) com a cadeia de escopos dos cursores e o
+`ParentIndex`:
+
+    function_scope:  função mais próxima de cada nó, consultada durante um
+                     percurso com `Cursor.descendants` (como em validate_tree).
+    Node.cursor:     cursor para nós escolhidos aleatoriamente, a partir do
+                     cursor da raiz.
+
+Uso:
+
+    $ uv run python benchmarks/scope_queries.py [--lines N] [--depth N]
+"""
+
+import argparse
+import os
+import random
+import time
+
+os.environ["LOX_NO_CACHE"] = "1"
+
+from lox import parse  # noqa: E402
+from lox.ast import Function  # noqa: E402
+from lox.synth import generate  # noqa: E402
+
+
+def linear_function_scope(cursor):
+    for parent in cursor.parents():
+        if isinstance(parent.node, Function):
+            return parent
+    return None
+
+
+def linear_cursor(node, cursor):
+    pending = [cursor]
+    while pending:
+        cursor = pending.pop()
+        if cursor.node is node:
+            return cursor
+        pending.extend(cursor.children())
+    raise ValueError(node)
+
+
+def indexed_function_scope(cursor):
+    try:
+        return cursor.function_scope()
+    except ValueError:
+        return None
+
+
+def timeit(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", type=int, default=20_000)
+    parser.add_argument("--depth", type=int, default=200)
+    parser.add_argument("--lookups", type=int, default=200, help="chamadas de Node.cursor")
+    args = parser.parse_args()
+
+    tree = parse(generate(args.lines, "nesting", depth=args.depth))
+    nodes = list(tree.descendants())
+    sample = random.Random(0).sample(nodes, min(args.lookups, len(nodes)))
+    print(f"{args.lines} linhas, {len(nodes)} nós, profundidade até {args.depth}")
+
+    before = timeit(lambda: [linear_function_scope(c) for c in tree.cursor().descendants()])
+    after = timeit(lambda: [indexed_function_scope(c) for c in tree.cursor().descendants()])
+    print(f"{'function_scope':<16} antes={before * 1000:8.1f}ms  depois={after * 1000:8.1f}ms  ({before / after:.1f}x)")
+
+    root = tree.cursor()
+    before = timeit(lambda: [linear_cursor(node, root) for node in sample])
+    after = timeit(lambda: [node.cursor(root) for node in sample])
+    print(f"{'Node.cursor':<16} antes={before * 1000:8.1f}ms  depois={after * 1000:8.1f}ms  ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Mede o tempo de inicialização do interpretador (`import lox`).
+
+Compara três cenários, cada um em um processo Python novo:
+
+    sem cache:   LOX_NO_CACHE=1, o Lark reconstrói as tabelas LALR.
+    cache frio:  pasta de cache vazia, as tabelas são construídas e salvas.
+    cache quente: as tabelas são carregadas do arquivo salvo anteriormente.
+
+Uso:
+
+    $ uv run python benchmarks/startup.py [-n REPETIÇÕES]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent
+
+
+def run_once(env: dict[str, str], code: str = "import lox") -> float:
+    """
+    Executa o código em um novo processo e retorna o tempo gasto em segundos.
+    """
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], env=env, cwd=BASE_DIR, check=True)
+    return time.perf_counter() - start
+
+
+def measure(env: dict[str, str], repeat: int, setup=None) -> list[float]:
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        times.append(run_once(env))
+    return times
+
+
+def report(name: str, times: list[float], baseline: float | None = None) -> float:
+    median = statistics.median(times)
+    line = f"{name:<14} mediana={median * 1000:8.1f}ms  min={min(times) * 1000:8.1f}ms"
+    if baseline is not None:
+        line += f"  ({baseline / median:.1f}x mais rápido)"
+    print(line)
+    return median
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", "--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    base_env = {k: v for k, v in os.environ.items() if k != "LOX_NO_CACHE"}
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_dir = Path(tmp)
+        env = {**base_env, "LOX_CACHE_DIR": tmp}
+
+        def clear():
+            for path in cache_dir.iterdir():
+                path.unlink()
+
+        nocache = measure({**env, "LOX_NO_CACHE": "1"}, args.repeat)
+        cold = measure(env, args.repeat, setup=clear)
+        warm = measure(env, args.repeat)
+
+    print(f"python -c 'import lox' ({args.repeat} repetições)")
+    baseline = report("sem cache", nocache)
+    report("cache frio", cold, baseline)
+    report("cache quente", warm, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Compara a execução normal com a execução em fluxo (`lox --stream`).
+
+Gera um script com muitos comandos simples e mede, em um processo novo para
+cada modo, o tempo até a primeira linha impressa, o tempo total e o pico de
+memória (RSS) do processo.
+
+Uso:
+
+    $ uv run python benchmarks/streaming.py [--statements N]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent
+
+RUNNER = """
+import resource, sys
+from lox.cli import main
+main()
+sys.stdout.flush()
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, file=sys.stderr)
+"""
+
+
+def generate(path: Path, statements: int) -> None:
+    with path.open("w") as fd:
+        fd.write("var total = 0;\nprint total;\n")
+        for i in range(statements):
+            fd.write(f"total = total + {i % 10};\n")
+        fd.write("print total;\n")
+
+
+def run(path: Path, *flags: str) -> tuple[float, float, int]:
+    """
+    Executa o script e retorna o tempo até a primeira saída, o tempo total
+    (em segundos) e o pico de memória (em KiB).
+    """
+    env = {**os.environ, "LOX_NO_CACHE": "1"}
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-c", f"import sys; sys.argv = {['lox', *flags, str(path)]!r}\n{RUNNER}"],
+        cwd=BASE_DIR,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    assert proc.stdout is not None
+    proc.stdout.readline()
+    first = time.perf_counter() - start
+    _, stderr = proc.communicate()
+    total = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(stderr)
+    return first, total, int(stderr.split()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--statements", type=int, default=200_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "script.lox"
+        generate(path, args.statements)
+        print(f"{args.statements} comandos, {path.stat().st_size / 2**20:.1f} MiB")
+        for name, flags in [("normal", ()), ("--stream", ("--stream",))]:
+            first, total, rss = run(path, *flags)
+            print(
+                f"{name:<10} primeira saída={first * 1000:8.0f}ms  "
+                f"total={total:6.2f}s  memória={rss / 1024:7.1f}MiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Compara o despacho de `Node.visit` por busca no MRO com o `Visitor` compilado.
+
+A implementação antiga (copiada abaixo) percorre o MRO de cada objeto e
+captura um `KeyError` para cada tipo sem tratador, inclusive para valores
+que não são nós. Medimos três visitantes típicos:
+
+    Var:     coleta nomes de variáveis (apenas nós).
+    Node:    visita todos os nós.
+    object:  visita nós e valores, como `Example.check_fully_converted`.
+
+Uso:
+
+    $ uv run python benchmarks/visit_dispatch.py [--lines N] [--repeat N]
+"""
+
+import argparse
+import os
+import time
+from pathlib import Path
+
+os.environ["LOX_NO_CACHE"] = "1"
+
+from lox import parse  # noqa: E402
+from lox.ast import Var  # noqa: E402
+from lox.node import Node, field_table  # noqa: E402
+from lox.synth import generate  # noqa: E402
+
+EXAMPLES = Path(__file__).parent.parent / "exemplos"
+
+
+def mro_visit_once(obj, visitors):
+    for subtype in type(obj).mro():
+        try:
+            visitor = visitors[subtype]
+            visitor(obj)
+            break
+        except KeyError:
+            continue
+
+
+def mro_visit(root, visitors):
+    pending = [(root, True)]
+    while pending:
+        obj, expand = pending.pop()
+        if not expand:
+            mro_visit_once(obj, visitors)
+            continue
+        tasks = []
+        for name, kind in field_table(type(obj)).fields:
+            value = getattr(obj, name)
+            if kind == "value":
+                tasks.append((value, False))
+            elif isinstance(value, Node):
+                tasks.append((value, True))
+            elif isinstance(value, (list, tuple)):
+                tasks.extend((item, isinstance(item, Node)) for item in value)
+            else:
+                tasks.append((value, False))
+        pending.append((obj, False))
+        pending.extend(reversed(tasks))
+
+
+def corpus() -> list[Node]:
+    trees = []
+    for path in sorted(EXAMPLES.rglob("*.lox")):
+        try:
+            trees.append(parse(path.read_text()))
+        except Exception:
+            continue
+    return trees
+
+
+def best(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", type=int, default=20_000, help="linhas do programa sintético")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    noop = lambda obj: None  # noqa: E731
+    visitors = {"Var": {Var: noop}, "Node": {Node: noop}, "object": {object: noop}}
+    inputs = {"exemplos": corpus(), "synth:mixed": [parse(generate(args.lines, "mixed"))]}
+
+    print(f"{'árvores':<14} {'visitante':<8} {'MRO':>10} {'compilado':>10} {'ganho':>7}")
+    for label, trees in inputs.items():
+        for name, table in visitors.items():
+            before = best(lambda: [mro_visit(tree, table) for tree in trees], args.repeat)
+            after = best(lambda: [tree.visit(table) for tree in trees], args.repeat)
+            print(f"{label:<14} {name:<8} {before * 1000:>8.1f}ms {after * 1000:>8.1f}ms {before / after:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,7 @@ from .ast import Expr, Stmt, Value
 from .ctx import Ctx
 from .errors import SemanticError
 from .node import Node
-from .parser import lex, parse, parse_cst, parse_expr
+from .parser import PARSE_PASSES, lex, parse, parse_any, parse_cst, parse_expr
 
 __all__ = [
     "Ctx",
@@ -18,7 +18,9 @@ __all__ = [
     "Node",
     "parse_cst",
     "parse",
+    "parse_any",
     "parse_expr",
+    "parse_many",
     "Stmt",
     "SemanticError",
 ]
@@ -34,13 +36,15 @@ def eval(
 
     Args:
         src:
-            Código fonte em formato de string ou um nó AST.
+            Código fonte em formato de string ou um nó AST. O código pode ser
+            um programa ou uma expressão isolada (veja `lox.parse_any`).
         env:
             Ambiente onde as variáveis serão avaliadas. Se omitido, um novo
             ambiente vazio será criado. Aceita um dicionário mapeando nomes de
             variáveis para seus valores ou uma instância de `Ctx`.
         skip_validation:
-            Se `True`, ignora a validação do código fonte antes da avaliação.
+            Se `True`, ignora a validação, a remoção de açúcar sintático e a
+            resolução de variáveis antes da avaliação.
     """
     if env is None:
         env = Ctx.from_dict({})
@@ -50,14 +54,34 @@ def eval(
     if isinstance(src, Node):
         ast = src
     else:
-        ast = parse(src)
+        ast = parse_any(src)
 
     if not skip_validation:
-        ast.validate_tree()
+        from .passes import run_passes
+
+        # Executa os mesmos passes de `parse`: árvores montadas à mão também
+        # são validadas, perdem o açúcar sintático e têm as variáveis
+        # resolvidas. Árvores produzidas por `parse` já foram processadas e
+        # não são percorridas novamente.
+        run_passes(ast, PARSE_PASSES)
 
     try:
         return ast.eval(env)
     except Exception as e:
+        from .positions import error_location
+
         print(f"Programa terminou com um erro: {e}")
+        if (location := error_location(e)) is not None:
+            print("Posição:", location)
         print("Variáveis:", env)
         raise
+
+
+def __getattr__(name: str):
+    # `parse_many` é carregado somente quando for usado, para que `import lox`
+    # não importe `lox.batch` (e o `multiprocessing`).
+    if name == "parse_many":
+        from .batch import parse_many
+
+        return parse_many
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -3,10 +3,10 @@ from dataclasses import dataclass
 from typing import Callable
 from .runtime import LoxFunction, LoxReturn, LoxClass, print as lox_print
 
-from .ctx import Ctx
+from .ctx import Ctx, UNSET
 
 # Importações para a validação semântica
-from .node import Node, Cursor
+from .node import Node, Cursor, analysis_field
 from .errors import SemanticError
 
 # Palavras reservadas da linguagem Lox
@@ -22,11 +22,13 @@ Value = bool | str | float | None
 
 class Expr(Node, ABC):
     """Classe base para expressões."""
+    __slots__ = ()
 
 class Stmt(Node, ABC):
     """Classe base para comandos."""
+    __slots__ = ()
 
-@dataclass
+@dataclass(slots=True)
 class Program(Node):
     """Representa um programa."""
     stmts: list[Stmt]
@@ -37,7 +39,7 @@ class Program(Node):
 
 # EXPRESSÕES
 
-@dataclass
+@dataclass(slots=True)
 class BinOp(Expr):
     """Uma operação infixa com dois operandos."""
     left: Expr
@@ -49,32 +51,65 @@ class BinOp(Expr):
         right_value = self.right.eval(ctx)
         return self.op(left_value, right_value)
 
-@dataclass
+@dataclass(slots=True)
 class Var(Expr):
     """Uma variável no código."""
     name: str
 
+    # Endereço calculado por `lox.resolver`: número de escopos entre o uso e
+    # a declaração e a posição da variável nesse escopo. Variáveis globais
+    # têm slot -1 e são buscadas pelo nome a partir do escopo raiz. Se
+    # depth == -1, a variável não foi resolvida e é buscada pelo nome.
+    depth: int = analysis_field(-1)
+    slot: int = analysis_field(-1)
+
     def eval(self, ctx: Ctx):
+        depth = self.depth
+        if depth >= 0:
+            while depth:
+                ctx = ctx.parent  # type: ignore[assignment]
+                depth -= 1
+            if self.slot >= 0:
+                value = ctx.slots[self.slot]  # type: ignore[index]
+                if value is not UNSET:
+                    return value
+                # Ainda não declarada neste escopo: continua pelo nome.
+                ctx = ctx.parent  # type: ignore[assignment]
         try:
             return ctx[self.name]
         except KeyError:
             raise NameError(f"variável {self.name} não existe!")
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Literal(Expr):
-    """Representa valores literais no código."""
+    """
+    Representa valores literais no código.
+
+    Literais são imutáveis: o parser compartilha um único nó entre todas as
+    ocorrências do mesmo valor (veja `literal_pool`). Para mudar um literal,
+    substitua o nó no pai.
+    """
     value: Value
 
     def eval(self, ctx: Ctx):
         return self.value
 
-@dataclass
+def literal_pool() -> dict[type, dict[Value, Literal]]:
+    """
+    Tabela vazia para compartilhar nós `Literal` durante a análise sintática.
+
+    Os literais são separados por tipo, pois em Python True == 1.0 e os dois
+    teriam a mesma chave em um único dicionário.
+    """
+    return {float: {}, str: {}, bool: {}, type(None): {}}
+
+@dataclass(slots=True)
 class ExprStmt(Stmt):
     expr: Expr
     def eval(self, ctx: Ctx):
         self.expr.eval(ctx)
 
-@dataclass
+@dataclass(slots=True)
 class And(Expr):
     """Uma operação 'and'."""
     left: Expr
@@ -85,7 +120,7 @@ class And(Expr):
             return left_val
         return self.right.eval(ctx)
 
-@dataclass
+@dataclass(slots=True)
 class Or(Expr):
     """Uma operação 'or'."""
     left: Expr
@@ -98,7 +133,7 @@ class Or(Expr):
             return left_val
         return self.right.eval(ctx)
 
-@dataclass
+@dataclass(slots=True)
 class UnaryOp(Expr):
     """Uma operação prefixa com um operando."""
     operand: Expr
@@ -108,7 +143,7 @@ class UnaryOp(Expr):
         value = self.operand.eval(ctx)
         return self.op(value)
 
-@dataclass
+@dataclass(slots=True)
 class Call(Expr):
     """Uma chamada de função."""
     callee: Expr
@@ -121,26 +156,41 @@ class Call(Expr):
             return func(*args)
         raise TypeError(f"'{func}' não é uma função!")
 
-@dataclass
+@dataclass(slots=True)
 class This(Expr):
     """Acesso ao `this`."""
 
-@dataclass
+@dataclass(slots=True)
 class Super(Expr):
     """Acesso a método ou atributo da superclasse."""
 
-@dataclass
+@dataclass(slots=True)
 class Assign(Expr):
     """Atribuição de variável."""
     name: str
     value: Expr
 
+    # Endereço da variável (veja `Var`).
+    depth: int = analysis_field(-1)
+    slot: int = analysis_field(-1)
+
     def eval(self, ctx: Ctx):
         result = self.value.eval(ctx)
+        depth = self.depth
+        if depth >= 0:
+            while depth:
+                ctx = ctx.parent  # type: ignore[assignment]
+                depth -= 1
+            if self.slot >= 0:
+                slots = ctx.slots
+                if slots[self.slot] is not UNSET:  # type: ignore[index]
+                    slots[self.slot] = result  # type: ignore[index]
+                    return result
+                ctx = ctx.parent  # type: ignore[assignment]
         ctx.assign(self.name, result)
         return result
 
-@dataclass
+@dataclass(slots=True)
 class Getattr(Expr):
     """Acesso a atributo de um objeto."""
     obj: Expr
@@ -153,7 +203,7 @@ class Getattr(Expr):
         except AttributeError:
             raise AttributeError(f"O objeto {obj_value} não possui o atributo '{self.name}'")
 
-@dataclass
+@dataclass(slots=True)
 class Setattr(Expr):
     """Atribuição de atributo de um objeto."""
     obj: Expr
@@ -168,7 +218,7 @@ class Setattr(Expr):
 
 # COMANDOS
 
-@dataclass
+@dataclass(slots=True)
 class Print(Stmt):
     """Representa uma instrução de impressão."""
     expr: Expr
@@ -177,7 +227,7 @@ class Print(Stmt):
         value = self.expr.eval(ctx)
         lox_print(value)
 
-@dataclass
+@dataclass(slots=True)
 class Return(Stmt):
     """Representa uma instrução de retorno."""
     value: Expr | None
@@ -186,15 +236,18 @@ class Return(Stmt):
         return_value = self.value.eval(ctx) if self.value else None
         raise LoxReturn(return_value)
 
-@dataclass
+@dataclass(slots=True)
 class VarDef(Stmt):
     """Representa uma declaração de variável."""
     name: str
     initializer: Expr
 
+    # Posição da variável no escopo atual (-1 se global ou não resolvida).
+    slot: int = analysis_field(-1)
+
     def eval(self, ctx: Ctx):
         value = self.initializer.eval(ctx)
-        ctx.var_def(self.name, value)
+        ctx.declare(self.slot, self.name, value)
 
     # Validação Semântica para VarDef
     def validate_self(self, cursor: Cursor):
@@ -205,7 +258,7 @@ class VarDef(Stmt):
                 token=self.name
             )
 
-@dataclass
+@dataclass(slots=True)
 class If(Stmt):
     """Representa uma instrução condicional."""
     condition: Expr
@@ -219,7 +272,7 @@ class If(Stmt):
         else:
             self.else_branch.eval(ctx)
 
-@dataclass
+@dataclass(slots=True)
 class While(Stmt):
     """Representa um laço de repetição."""
     condition: Expr
@@ -232,13 +285,21 @@ class While(Stmt):
                 break
             self.body.eval(ctx)
 
-@dataclass
+@dataclass(slots=True)
 class Block(Node):
     """Representa um bloco de comandos."""
     stmts: list[Stmt]
 
+    # Nomes declarados no bloco e as suas posições, calculados por
+    # `lox.resolver`. Se None, o bloco usa um escopo baseado em dicionário.
+    names: dict[str, int] | None = analysis_field(None)
+
     def eval(self, ctx: Ctx):
-        new_ctx = ctx.push({})
+        names = self.names
+        if names is None:
+            new_ctx = ctx.push({})
+        else:
+            new_ctx = Ctx({}, ctx, [UNSET] * len(names), names)
         for stmt in self.stmts:
             stmt.eval(new_ctx)
 
@@ -251,22 +312,28 @@ class Block(Node):
                 if stmt.name in seen:
                     raise SemanticError(
                         f"Variable '{stmt.name}' has already been declared in this block.",
-                        token=stmt.name
+                        token=stmt.name,
+                        node=stmt,
                     )
                 seen.add(stmt.name)
 
-@dataclass
+@dataclass(slots=True)
 class Function(Stmt):
     """Representa uma declaração de função."""
     name: str
     params: list[Var]
     body: Block
 
+    # Posição do nome da função no escopo atual e posições dos parâmetros no
+    # escopo criado a cada chamada (veja `Var` e `Block`).
+    slot: int = analysis_field(-1)
+    frame: dict[str, int] | None = analysis_field(None)
+
     def eval(self, ctx: Ctx):
         # ... (código eval existente, sem alterações)
         param_names = [p.name for p in self.params]
-        function = LoxFunction(self.name, param_names, self.body, ctx)
-        ctx.var_def(self.name, function)
+        function = LoxFunction(self.name, param_names, self.body, ctx, self.frame)
+        ctx.declare(self.slot, self.name, function)
         return None
 
     # Validação Semântica para Function
@@ -282,7 +349,8 @@ class Function(Stmt):
             if param.name in RESERVED_WORDS:
                 raise SemanticError(
                     f"Cannot use reserved word '{param.name}' as a parameter name.",
-                    token=param.name
+                    token=param.name,
+                    node=param,
                 )
         
         # 1. Verifica parâmetros duplicados
@@ -291,7 +359,8 @@ class Function(Stmt):
             if param.name in param_names:
                 raise SemanticError(
                     f"Duplicate parameter name '{param.name}' in function declaration.",
-                    token=param.name
+                    token=param.name,
+                    node=param,
                 )
             param_names.add(param.name)
 
@@ -301,15 +370,19 @@ class Function(Stmt):
                 if stmt.name in param_names:
                     raise SemanticError(
                         f"Variable '{stmt.name}' shadows a function parameter.",
-                        token=stmt.name
+                        token=stmt.name,
+                        node=stmt,
                     )
 
-@dataclass
+@dataclass(slots=True)
 class Class(Stmt):
     """Representa uma declaração de classe."""
     name: str
 
+    # Posição do nome da classe no escopo atual (veja `VarDef`).
+    slot: int = analysis_field(-1)
+
     def eval(self, ctx: Ctx):
         klass = LoxClass(name=self.name)
-        ctx.var_def(self.name, klass)
+        ctx.declare(self.slot, self.name, klass)
         return None
\ No newline at end of file
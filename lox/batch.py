@@ -0,0 +1,183 @@
+"""
+Análise sintática de muitos arquivos em paralelo.
+
+Ferramentas de lint e pré-compilação precisam analisar, validar e remover o
+açúcar sintático de milhares de arquivos. Como a análise é limitada pela CPU,
+`parse_many` distribui os arquivos entre vários processos. Cada processo
+carrega a gramática uma única vez e devolve a árvore serializada com o
+`pickle` (a mesma representação usada em `lox.cache`) ou um registro
+descrevendo o erro.
+
+Uso:
+
+    >>> for result in parse_many(paths, workers=8):
+    ...     if result.error:
+    ...         print(result.error)
+    ...     else:
+    ...         compile(result.tree)
+"""
+
+import os
+import pickle
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from .ast import Program
+
+# Número de arquivos enviados para cada processo de uma só vez.
+CHUNK_SIZE = 8
+
+
+@dataclass(frozen=True)
+class ErrorRecord:
+    """
+    Descrição de um erro encontrado ao analisar um arquivo.
+
+    Attributes:
+        path:
+            Caminho do arquivo.
+        kind:
+            "syntax" para erros de sintaxe, "semantic" para erros detectados
+            por `validate_tree`, "io" para erros de leitura do arquivo e
+            "internal" para outras falhas do compilador.
+        message:
+            Mensagem de erro.
+        line, column:
+            Posição do erro no arquivo (começando em 1), se conhecida.
+    """
+
+    path: str
+    kind: str
+    message: str
+    line: int | None = None
+    column: int | None = None
+
+    def __str__(self) -> str:
+        location = self.path
+        if self.line is not None:
+            location += f":{self.line}:{self.column}"
+        summary = self.message.splitlines()[0] if self.message else ""
+        return f"{location}: {summary}"
+
+
+@dataclass(frozen=True)
+class ParseResult:
+    """
+    Resultado da análise de um arquivo.
+
+    Attributes:
+        path:
+            Caminho do arquivo.
+        data:
+            Árvore sintática serializada com o `pickle`, ou None em caso de
+            erro.
+        error:
+            Registro do erro, ou None se a análise foi bem sucedida.
+    """
+
+    path: str
+    data: bytes | None = None
+    error: ErrorRecord | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def tree(self) -> Program | None:
+        """
+        Árvore sintática do arquivo (desserializada a cada acesso).
+        """
+        if self.data is None:
+            return None
+        return pickle.loads(self.data)
+
+
+def parse_many(
+    paths: Iterable[str | Path],
+    workers: int | None = None,
+    backend: str | None = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[ParseResult]:
+    """
+    Analisa, valida e remove o açúcar sintático de vários arquivos em
+    paralelo.
+
+    Os resultados são produzidos na mesma ordem dos arquivos, à medida que
+    ficam prontos. Erros não interrompem o processamento: cada arquivo com
+    erro produz um `ParseResult` com o campo `error` preenchido.
+
+    Args:
+        paths:
+            Caminhos dos arquivos.
+        workers:
+            Número de processos. O padrão é o número de CPUs. Com 1 (ou 0),
+            analisa os arquivos no processo atual.
+        backend:
+            Parser utilizado. Veja `lox.parse`.
+        chunk_size:
+            Número de arquivos enviados para cada processo de uma só vez.
+    """
+    paths = [str(path) for path in paths]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(paths))
+
+    if workers <= 1:
+        _init_worker(backend)
+        for path in paths:
+            yield parse_file(path, backend)
+        return
+
+    import multiprocessing
+
+    with multiprocessing.Pool(workers, _init_worker, (backend,)) as pool:
+        jobs = [(path, backend) for path in paths]
+        yield from pool.imap(_parse_job, jobs, chunksize=chunk_size)
+
+
+def parse_file(path: str, backend: str | None = None) -> ParseResult:
+    """
+    Analisa um único arquivo e retorna a árvore serializada ou o erro.
+    """
+    from lark.exceptions import UnexpectedInput
+
+    from .errors import SemanticError
+    from .parser import parse
+
+    try:
+        with open(path, "r") as fd:
+            src = fd.read()
+    except (OSError, UnicodeDecodeError) as e:
+        return ParseResult(path, error=ErrorRecord(path, "io", str(e)))
+
+    try:
+        tree = parse(src, backend=backend)
+        data = pickle.dumps(tree, protocol=pickle.HIGHEST_PROTOCOL)
+    except UnexpectedInput as e:
+        line, column = (e.line, e.column) if e.line > 0 else (None, None)
+        record = ErrorRecord(path, "syntax", str(e), line, column)
+    except SemanticError as e:
+        line = column = None
+        if (location := e.location) is not None:
+            line, column = location.line, location.column
+        record = ErrorRecord(path, "semantic", str(e), line, column)
+    except Exception as e:
+        # Ex.: RecursionError em programas muito aninhados.
+        record = ErrorRecord(path, "internal", f"{type(e).__name__}: {e}")
+    else:
+        return ParseResult(path, data)
+    return ParseResult(path, error=record)
+
+
+def _init_worker(backend: str | None) -> None:
+    # Carrega as tabelas LALR uma única vez por processo.
+    from .parser import default_backend, default_lexer, get_ast_parser
+
+    if (backend or default_backend()) == "lark":
+        get_ast_parser(default_lexer())
+
+
+def _parse_job(job: tuple[str, str | None]) -> ParseResult:
+    return parse_file(*job)
@@ -0,0 +1,177 @@
+"""
+Cache em disco para as árvores sintáticas produzidas pelo parser.
+
+Funciona de forma parecida com a pasta `__pycache__` do Python: a árvore já
+validada e sem açúcar sintático é serializada com o `pickle` em um arquivo
+`.loxc`, cujo nome é o hash do código fonte. Na próxima execução com o mesmo
+código, carregamos a árvore do disco e evitamos a análise sintática.
+
+O hash também inclui uma "impressão digital" dos arquivos que definem a forma
+da árvore (gramática, transformer e nós) e dos passes executados antes de
+salvá-la, como os endereços calculados por `lox.resolver`. Se algum deles
+mudar, todas as entradas antigas são ignoradas automaticamente.
+
+Os arquivos de cache são carregados com o `pickle` e, portanto, são tratados
+como código confiável: quem puder escrever na pasta de cache pode executar
+código no processo que carregar uma árvore. Por isso a pasta é criada com
+permissão de acesso apenas para o usuário, e pastas de outro usuário ou que
+possam ser modificadas por outros usuários são ignoradas (veja `is_private`).
+Não aponte LOX_CACHE_DIR para uma pasta compartilhada.
+
+Variáveis de ambiente:
+    LOX_CACHE_DIR:
+        Pasta onde os arquivos `.loxc` são salvos. O padrão é
+        `$XDG_CACHE_HOME/lox` ou `~/.cache/lox`.
+    LOX_NO_CACHE:
+        Se definida com um valor não vazio, desabilita o cache.
+"""
+
+import hashlib
+import os
+import pickle
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .node import Node
+
+DIR = Path(__file__).parent
+SUFFIX = ".loxc"
+
+# Arquivos que determinam a árvore produzida a partir de um código fonte,
+# inclusive os passes de `parser.PARSE_PASSES`.
+FINGERPRINT_FILES = (
+    "grammar.lark",
+    "transformer.py",
+    "ast.py",
+    "node.py",
+    "scanner.py",
+    "pratt.py",
+    "parser.py",
+    "passes.py",
+    "resolver.py",
+    "ctx.py",
+)
+
+
+def is_enabled() -> bool:
+    """
+    Verifica se o cache está habilitado.
+    """
+    return not os.environ.get("LOX_NO_CACHE")
+
+
+def cache_dir() -> Path:
+    """
+    Retorna a pasta onde os arquivos de cache são salvos.
+    """
+    if path := os.environ.get("LOX_CACHE_DIR"):
+        return Path(path)
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "lox"
+
+
+def is_private(directory: Path) -> bool:
+    """
+    Verifica se a pasta pertence ao usuário atual e se outros usuários não
+    podem escrever nela.
+
+    Em sistemas sem o conceito de dono (ex.: Windows), verifica apenas se a
+    pasta existe.
+    """
+    try:
+        info = directory.stat()
+    except OSError:
+        return False
+    if not hasattr(os, "getuid"):
+        return True
+    return info.st_uid == os.getuid() and not info.st_mode & 0o022
+
+
+@lru_cache(maxsize=1)
+def fingerprint() -> str:
+    """
+    Hash dos arquivos que definem a estrutura da árvore sintática.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{sys.version_info[:2]}".encode())
+    for name in FINGERPRINT_FILES:
+        digest.update(name.encode())
+        digest.update((DIR / name).read_bytes())
+    return digest.hexdigest()
+
+
+def cache_path(src: str, kind: str = "start") -> Path:
+    """
+    Caminho do arquivo de cache para o código fonte.
+
+    O parâmetro `kind` distingue o tipo de análise realizada (programa,
+    expressão, etc), já que o mesmo texto produz árvores diferentes em cada
+    caso.
+    """
+    digest = hashlib.sha256()
+    digest.update(fingerprint().encode())
+    digest.update(kind.encode())
+    digest.update(b"\0")
+    digest.update(src.encode("utf-8", "surrogatepass"))
+    return cache_dir() / (digest.hexdigest() + SUFFIX)
+
+
+def load(src: str, kind: str = "start") -> "Node | None":
+    """
+    Carrega a árvore sintática do cache, se existir.
+
+    Retorna None se não houver entrada válida para o código fonte ou se a
+    pasta de cache não for privada (veja `is_private`).
+    """
+    path = cache_path(src, kind)
+    if not is_private(path.parent):
+        return None
+    try:
+        with path.open("rb") as fd:
+            return pickle.load(fd)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # Arquivo corrompido ou incompatível: ignoramos e refazemos a análise.
+        return None
+
+
+def store(src: str, tree: "Node", kind: str = "start") -> None:
+    """
+    Salva a árvore sintática no cache.
+
+    Falhas (pasta sem permissão de escrita, árvore profunda demais para o
+    pickle, etc) são ignoradas silenciosamente, pois o cache é apenas uma
+    otimização.
+    """
+    path = cache_path(src, kind)
+    try:
+        data = pickle.dumps(tree, protocol=pickle.HIGHEST_PROTOCOL)
+        path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        if not is_private(path.parent):
+            return
+
+        # Escrevemos em um arquivo temporário e renomeamos para que outros
+        # processos nunca leiam um arquivo pela metade.
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    except (OSError, RecursionError, pickle.PicklingError):
+        pass
+
+
+def clear() -> int:
+    """
+    Remove todos os arquivos de cache e retorna quantos foram apagados.
+    """
+    removed = 0
+    for path in cache_dir().glob("*" + SUFFIX):
+        try:
+            path.unlink()
+            removed += 1
+        except OSError:
+            pass
+    return removed
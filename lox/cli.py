@@ -13,12 +13,16 @@ padrão do Python e não requer instalação de dependências externas.
 """
 
 import argparse
-
-from lark import Token
+import os
+import sys
 
 from . import eval as lox_eval
+from . import positions
 from .ctx import Ctx
-from .parser import lex, parse, parse_cst, parse_expr
+from .errors import SemanticError
+from .parser import default_lexer, lex, parse, parse_any, parse_cst
+from .passes import OPTIMIZATION_PASSES, run_passes, timed
+from .scanner import scan
 #from .runtime import show_repr as lox_repr
 
 
@@ -34,6 +38,16 @@ def make_argparser():
         action="store_true",
         help="Imprime a árvore sintática.",
     )
+    parser.add_argument(
+        "--max-depth",
+        type=int,
+        help="Com --ast, abrevia os nós mais profundos que esse limite.",
+    )
+    parser.add_argument(
+        "--max-children",
+        type=int,
+        help="Com --ast, mostra no máximo esse número de itens de cada lista.",
+    )
     parser.add_argument(
         "-l",
         "--lex",
@@ -46,6 +60,37 @@ def make_argparser():
         action="store_true",
         help="Imprime a árvore sintática concreta produzida pelo Lark.",
     )
+    parser.add_argument(
+        "--lexer",
+        choices=["lark", "scanner"],
+        help="Analisador léxico usado (o padrão é o valor de LOX_LEXER ou lark).",
+    )
+    parser.add_argument(
+        "--parser",
+        choices=["lark", "pratt"],
+        help="Parser usado (o padrão é o valor de LOX_PARSER ou lark).",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Lê o arquivo em blocos e executa cada declaração assim que é analisada.",
+    )
+    parser.add_argument(
+        "-O",
+        "--optimize",
+        action="store_true",
+        help="Otimiza a árvore sintática antes de executar ou imprimir (dobra de constantes e eliminação de código morto).",
+    )
+    parser.add_argument(
+        "--dce-report",
+        action="store_true",
+        help="Com -O, mostra quantos nós foram removidos pela eliminação de código morto.",
+    )
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Mostra o tempo gasto em cada passe sobre a árvore sintática (validação, etc).",
+    )
     parser.add_argument(
         "-p",
         "--pm",
@@ -61,17 +106,66 @@ def make_argparser():
     return parser
 
 
+def make_check_argparser():
+    parser = argparse.ArgumentParser(
+        prog="lox check",
+        description="Analisa e valida arquivos Lox em paralelo, sem executá-los.",
+    )
+    parser.add_argument(
+        "paths",
+        nargs="+",
+        help="Arquivos ou pastas (pastas são percorridas em busca de arquivos .lox).",
+    )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        help="Número de processos (o padrão é o número de CPUs).",
+    )
+    parser.add_argument(
+        "--parser",
+        choices=["lark", "pratt"],
+        help="Parser usado (o padrão é o valor de LOX_PARSER ou lark).",
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Imprime um registro JSON por arquivo com erro.",
+    )
+    return parser
+
+
 def main():
     """
     Função principal que cria a interface de linha de comando (CLI) para o compilador Lox.
     """
+    if sys.argv[1:2] == ["check"]:
+        return check(sys.argv[2:])
+
     parser = make_argparser()
     args = parser.parse_args()
+    if args.lexer:
+        os.environ["LOX_LEXER"] = args.lexer
+    if args.parser:
+        os.environ["LOX_PARSER"] = args.parser
 
     # Inicia o repl, se requisitado
     if args.file == "repl":
         return repl()
 
+    # Executa o arquivo em fluxo, sem carregar o programa inteiro na memória
+    if args.stream and not (args.show or args.ast or args.cst or args.lex):
+        from .stream import eval_file
+
+        try:
+            eval_file(args.file)
+        except FileNotFoundError:
+            print(f"Arquivo {args.file} não encontrado.")
+            exit(1)
+        except Exception as e:
+            on_error(e, args.pm, args.file)
+        return
+
     # Lê arquivo de entrada
     try:
         with open(args.file, "r") as f:
@@ -91,21 +185,58 @@ def main():
         print()
 
     if not args.ast and not args.cst and not args.lex:
-        try:
-            lox_eval(source)
-        except Exception as e:
-            on_error(e, args.pm)
+        with timed() as timings:
+            try:
+                ast = parse(source, cache=False if args.timings else None)
+                if (source_map := positions.source_map(ast)) is not None:
+                    source_map.path = args.file
+                if args.optimize:
+                    ast = optimize(ast, args.dce_report)
+                lox_eval(ast)
+            except Exception as e:
+                on_error(e, args.pm, args.file)
+            finally:
+                if args.timings:
+                    print_timings(timings)
 
     else:
         debug_source(source, args)
 
 
+def print_timings(timings: dict[str, float]) -> None:
+    """
+    Imprime o tempo de cada passe na saída de erro.
+    """
+    for name, seconds in timings.items():
+        print(f"{name:<12} {seconds * 1000:8.2f}ms", file=sys.stderr)
+
+
+def optimize(ast, report: bool):
+    """
+    Executa as otimizações da opção -O e, se pedido, imprime o número de nós
+    removidos na saída de erro.
+    """
+    from .optimizer import removals
+
+    with removals() as removed:
+        ast = run_passes(ast, OPTIMIZATION_PASSES)
+    if report:
+        for reason, count in removed.items():
+            print(f"{reason:<12} {count:8d} nós", file=sys.stderr)
+        print(f"{'total':<12} {sum(removed.values()):8d} nós", file=sys.stderr)
+    return ast
+
+
 def debug_source(source: str, args):
     """
     Mostra informações de depuração sobre o código Lox passado como argumento.
     """
+    from lark import Token
+
     if args.ast:
         ast = parse(source)
+        if args.optimize:
+            ast = optimize(ast, args.dce_report)
         for node in ast.lark_descendents():
             if isinstance(node, Token):
                 descr = repr(node)
@@ -117,15 +248,52 @@ def debug_source(source: str, args):
             msg += tail
             print(msg)
 
-        print(ast.pretty())
+        ast.write_pretty(sys.stdout, max_depth=args.max_depth, max_children=args.max_children)
 
     if args.cst:
         cst = parse_cst(source)
         print(cst.pretty())
 
     if args.lex:
-        for token in lex(source):
-            print(f"{token.type}: {token.value}")
+        if (args.lexer or default_lexer()) == "scanner":
+            # Evita criar um objeto Token para cada lexema.
+            for name, text in scan(source).named():
+                print(f"{name}: {text}")
+        else:
+            for token in lex(source):
+                print(f"{token.type}: {token.value}")
+
+
+def check(argv: list[str]):
+    """
+    Subcomando `lox check`: analisa, valida e remove o açúcar sintático de
+    vários arquivos em paralelo (veja `lox.batch`) e reporta os erros.
+    """
+    import json
+    from dataclasses import asdict
+    from pathlib import Path
+
+    from .batch import parse_many
+
+    args = make_check_argparser().parse_args(argv)
+    paths = []
+    for path in map(Path, args.paths):
+        paths.extend(sorted(path.rglob("*.lox")) if path.is_dir() else [path])
+
+    errors = 0
+    for result in parse_many(paths, workers=args.workers, backend=args.parser):
+        if result.error is None:
+            continue
+        errors += 1
+        if args.json:
+            print(json.dumps(asdict(result.error), ensure_ascii=False))
+        else:
+            print(result.error)
+
+    if not args.json:
+        print(f"{len(paths)} arquivo(s) verificado(s), {errors} com erro.")
+    if errors:
+        exit(1)
 
 
 def repl():
@@ -147,12 +315,6 @@ def repl():
         ask = lambda: input("lox> ")  # noqa: E731
         print = builtins.print
 
-    def parse_any(src: str):
-        try:
-            return parse_expr(src)
-        except Exception:
-            return parse(src)
-
     print("Iniciando REPL do Lox. Digite 'exit' para sair.")
     ctx = Ctx.from_dict({})
     while True:
@@ -175,7 +337,13 @@ def repl():
             print(lox_repr(value))
 
 
-def on_error(exception: Exception, pm: bool):
+def on_error(exception: Exception, pm: bool, path: str | None = None):
+    location = getattr(exception, "location", None)
+    if isinstance(exception, SemanticError) and location is not None:
+        if path is not None:
+            location = location._replace(path=path)
+        print(f"{location}: {exception}")
+
     if not pm:
         raise exception
 
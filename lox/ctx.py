@@ -1,7 +1,7 @@
 import math
 import time
 from dataclasses import field
-from typing import TYPE_CHECKING, Iterator, Optional, TypeVar
+from typing import TYPE_CHECKING, Iterator, Optional, TypeVar, cast
 
 from lox.ast import dataclass
 
@@ -31,16 +31,26 @@ class _Builtins(dict):
 
 BUILTINS = _Builtins()
 
+# Valor de um slot cuja variável ainda não foi declarada no escopo.
+UNSET: "Value" = cast("Value", object())
+
 
 @dataclass
 class Ctx:
     """
     Contexto de execução. Por enquanto é só um dicionário que armazena nomes
     das variáveis e seus respectivos valores.
+
+    Escopos de blocos e funções analisados por `lox.resolver` guardam as
+    variáveis em uma lista (`slots`), acessada por índice. O dicionário
+    `names` associa cada nome ao seu índice, de modo que os métodos abaixo,
+    que usam nomes, continuam funcionando nesses escopos.
     """
 
     scope: ScopeDict = field(default_factory=dict)
     parent: Optional["Ctx"] = field(default_factory=lambda: Ctx(BUILTINS, None))
+    slots: list["Value"] | None = field(default=None, repr=False)
+    names: dict[str, int] | None = field(default=None, repr=False)
 
     @classmethod
     def from_dict(cls, env: ScopeDict) -> "Ctx":
@@ -55,6 +65,8 @@ class Ctx:
         """
         if name in self.scope:
             return self.scope[name]
+        elif self.names is not None and (value := self._slot(name)) is not UNSET:
+            return value
         elif self.parent is not None:
             return self.parent[name]
         raise KeyError(f"Variable '{name}' not found in context.")
@@ -65,6 +77,8 @@ class Ctx:
         """
         if name in self.scope:
             self.scope[name] = value
+        elif self.names is not None and self._slot(name) is not UNSET:
+            self.slots[self.names[name]] = value  # type: ignore[index]
         elif self.parent is not None:
             self.parent[name] = value
         else:
@@ -74,23 +88,59 @@ class Ctx:
         """
         Verifica se uma variável existe no contexto.
         """
-        return name in self.scope or (self.parent is not None and name in self.parent)
+        return (
+            name in self.scope
+            or (self.names is not None and self._slot(name) is not UNSET)
+            or (self.parent is not None and name in self.parent)
+        )
 
     def var_def(self, name: str, value: "Value") -> None:
         """
         Define uma variável no contexto atual.
         """
+        if self.names is not None and name in self.names:
+            self.declare(self.names[name], name, value)
+            return
         if name in self.scope and not self.is_global():
             raise KeyError(f"Variable '{name}' already defined in the current scope.")
         self.scope[name] = value
 
+    def declare(self, slot: int, name: str, value: "Value") -> None:
+        """
+        Define uma variável no slot dado do contexto atual. Slots negativos
+        indicam variáveis sem endereço fixo, definidas por nome.
+        """
+        if slot < 0:
+            self.var_def(name, value)
+            return
+        slots = self.slots
+        assert slots is not None, "escopo sem slots"
+        if slots[slot] is not UNSET:
+            raise KeyError(f"Variable '{name}' already defined in the current scope.")
+        slots[slot] = value
+
+    def variables(self) -> ScopeDict:
+        """
+        Variáveis definidas no escopo mais interno (sem os escopos pais).
+        """
+        if self.names is None:
+            return self.scope
+        slots = cast(list, self.slots)
+        values = {name: slots[i] for name, i in self.names.items() if slots[i] is not UNSET}
+        return {**self.scope, **values}
+
+    def _slot(self, name: str) -> "Value":
+        # Valor da variável no slot correspondente ao nome, ou UNSET.
+        index = self.names.get(name)  # type: ignore[union-attr]
+        return UNSET if index is None else self.slots[index]  # type: ignore[index]
+
     def to_dict(self) -> ScopeDict:
         """
         Converte o contexto para um dicionário.
         """
         if self.parent is None:
-            return self.scope.copy()
-        return {**self.parent.to_dict(), **self.scope}
+            return self.variables().copy()
+        return {**self.parent.to_dict(), **self.variables()}
 
     def iter_scopes(self, reverse: bool = False) -> Iterator[ScopeDict]:
         """
@@ -99,9 +149,9 @@ class Ctx:
         if reverse:
             if self.parent is not None:
                 yield from self.parent.iter_scopes(reverse=True)
-            yield self.scope
+            yield self.variables()
         else:
-            yield self.scope
+            yield self.variables()
             if self.parent is not None:
                 yield from self.parent.iter_scopes()
 
@@ -121,7 +171,7 @@ class Ctx:
         """
         if self.parent is None:
             raise RuntimeError("Cannot pop the global scope.")
-        return self.scope, self.parent
+        return self.variables(), self.parent
 
     def push(self, env: ScopeDict) -> "Ctx":
         """
@@ -144,6 +194,8 @@ class Ctx:
         """
         if key in self.scope:
             self.scope[key] = value
+        elif self.names is not None and self._slot(key) is not UNSET:
+            self.slots[self.names[key]] = value  # type: ignore[index]
         elif self.parent is not None:
             self.parent.assign(key, value)
         else:
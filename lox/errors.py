@@ -14,11 +14,19 @@ if TYPE_CHECKING:
 class SemanticError(Exception):
     """
     Exceção para erros semânticos.
+
+    Attributes:
+        node:
+            Nó que falhou na validação, se conhecido.
+        location:
+            Posição do nó no código fonte (veja `lox.positions`).
     """
 
-    def __init__(self, msg, token=None):
+    def __init__(self, msg, token=None, node=None):
         super().__init__(msg)
         self.token = token
+        self.node = node
+        self.location = None
 
 
 class ForceReturn(Exception):
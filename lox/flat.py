@@ -0,0 +1,619 @@
+"""
+Representação plana da árvore sintática ("struct of arrays").
+
+Em vez de um objeto Python por nó, a árvore é guardada em poucos arrays
+tipados:
+
+    kinds:    classe de cada nó (índice na tabela `classes`).
+    offsets:  posição do primeiro atributo de cada nó em `slots`.
+    slots:    um inteiro por atributo, que referencia um nó, uma lista (em
+              `lists`), um valor (na tabela de valores) ou None.
+    lists:    listas de filhos, no formato [tamanho, item, item, ...].
+
+Os valores (nomes, números, strings, funções dos operadores) ficam em uma
+tabela separada, sem repetições, e só são decodificados quando usados.
+
+Nós são acessados por objetos leves (`FlatNode`) que expõem a mesma API de
+`lox.node.Node`: atributos, `children`, `descendants`, `visit`, `pretty` e
+`eval`. O `eval` usa a implementação da classe original, então uma árvore
+plana pode ser executada diretamente. Views também passam em testes de
+`isinstance` com as classes de `lox.ast`.
+
+A árvore pode ser salva em um arquivo e carregada com `mmap`, sem
+desserialização: vários processos podem compartilhar a mesma imagem do
+programa compilado, cujas páginas são carregadas sob demanda pelo sistema
+operacional.
+
+Uso:
+
+    >>> flat = flatten(lox.parse(src))
+    >>> flat.save("programa.loxf")
+    >>> image = load("programa.loxf")
+    >>> image.root.eval(ctx)
+"""
+
+import dataclasses
+import importlib
+import json
+import mmap
+import pickle
+import struct
+import sys
+from array import array
+from functools import cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Iterator
+
+from .node import Node
+
+if TYPE_CHECKING:
+    from .visitor import Visitor
+
+MAGIC = b"LOXF"
+VERSION = 1
+
+# Tipos de referência em `slots` e `lists`: os 2 bits menos significativos
+# indicam o tipo e os demais o índice.
+NODE, LIST, VALUE, NONE = range(4)
+
+# Tipos de valores na tabela de valores.
+V_FALSE, V_TRUE, V_FLOAT, V_STR, V_REF, V_PICKLE = range(6)
+
+# Formato do cabeçalho: magic, versão, ordem dos bytes (0 = little endian),
+# tamanho dos metadados em JSON e o número de itens de cada array.
+HEADER = struct.Struct("<4sHHIIIIIII")
+ALIGN = 8
+
+
+class FlatTree:
+    """
+    Árvore sintática armazenada em arrays tipados.
+
+    Use `flatten` para construir a árvore a partir de uma AST e `load` para
+    carregar uma árvore salva com `save`.
+    """
+
+    __slots__ = (
+        "classes",
+        "kinds",
+        "offsets",
+        "slots",
+        "lists",
+        "value_tags",
+        "value_offsets",
+        "blob",
+        "passes",
+        "_fields",
+        "_values",
+        "_views",
+        "_mmap",
+    )
+
+    def __init__(
+        self,
+        classes: list[type],
+        kinds: Any,
+        offsets: Any,
+        slots: Any,
+        lists: Any,
+        value_tags: Any,
+        value_offsets: Any,
+        blob: Any,
+        passes: tuple[str, ...] = (),
+    ):
+        self.classes = classes
+        self.kinds = kinds
+        self.offsets = offsets
+        self.slots = slots
+        self.lists = lists
+        self.value_tags = value_tags
+        self.value_offsets = value_offsets
+        self.blob = blob
+        # Passes (`lox.passes`) já executados na árvore original.
+        self.passes = passes
+        self._fields = [
+            {name: i for i, name in enumerate(field_names(cls))} for cls in classes
+        ]
+        self._values: list[Any] | None = None
+        self._views: list["FlatNode | None"] | None = None
+        self._mmap: mmap.mmap | None = None
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    @property
+    def root(self) -> "FlatNode":
+        """
+        Nó raiz da árvore, marcado com os passes já executados na árvore
+        original (de modo que `lox.eval` não os executa novamente).
+        """
+        root = self.node(0)
+        if self.passes:
+            from .passes import mark
+
+            mark(root, *self.passes)
+        return root
+
+    def node(self, index: int) -> "FlatNode":
+        """
+        Retorna a view do nó com o índice dado.
+
+        Cada nó tem uma única view, de modo que comparações com `is` e
+        tabelas indexadas por `id` funcionam como na árvore original.
+        """
+        views = self._views
+        if views is None:
+            views = self._views = [None] * len(self.kinds)
+        if (view := views[index]) is None:
+            view = views[index] = FlatNode(self, index)
+        return view
+
+    def value(self, index: int) -> Any:
+        """
+        Decodifica o valor com o índice dado (com cache).
+        """
+        values = self._values
+        if values is None:
+            values = self._values = [_MISSING] * (len(self.value_offsets) - 1)
+        if (value := values[index]) is _MISSING:
+            value = values[index] = self._decode_value(index)
+        return value
+
+    def _decode_value(self, index: int) -> Any:
+        tag = self.value_tags[index]
+        data = bytes(self.blob[self.value_offsets[index] : self.value_offsets[index + 1]])
+        if tag == V_FALSE:
+            return False
+        if tag == V_TRUE:
+            return True
+        if tag == V_FLOAT:
+            return struct.unpack("<d", data)[0]
+        if tag == V_STR:
+            return sys.intern(data.decode("utf8"))
+        if tag == V_REF:
+            return _resolve(data.decode("utf8"))
+        return pickle.loads(data)
+
+    def decode(self, ref: int) -> Any:
+        """
+        Converte uma referência de `slots` ou `lists` no objeto
+        correspondente.
+        """
+        kind = ref & 3
+        if kind == NODE:
+            return self.node(ref >> 2)
+        if kind == VALUE:
+            return self.value(ref >> 2)
+        if kind == LIST:
+            start = ref >> 2
+            lists = self.lists
+            return [self.decode(lists[i]) for i in range(start + 1, start + 1 + lists[start])]
+        return None
+
+    def refs(self, index: int) -> Iterator[int]:
+        """
+        Referências dos atributos do nó, na ordem de declaração.
+        """
+        start = self.offsets[index]
+        end = start + len(self._fields[self.kinds[index]])
+        return iter(self.slots[start:end])
+
+    def child_indices(self, index: int) -> list[int]:
+        """
+        Índices dos filhos do nó, na mesma ordem de `Node.children`.
+        """
+        result = []
+        lists = self.lists
+        for ref in self.refs(index):
+            kind = ref & 3
+            if kind == NODE:
+                result.append(ref >> 2)
+            elif kind == LIST:
+                start = ref >> 2
+                for i in range(start + 1, start + 1 + lists[start]):
+                    if lists[i] & 3 == NODE:
+                        result.append(lists[i] >> 2)
+        return result
+
+    def to_node(self, index: int = 0) -> Node:
+        """
+        Reconstrói a árvore de objetos a partir do nó dado.
+
+        Nós compartilhados na árvore original continuam compartilhados.
+        """
+        built: dict[int, Node] = {}
+        pending = [(index, False)]
+        while pending:
+            i, ready = pending.pop()
+            if i in built:
+                continue
+            if not ready:
+                pending.append((i, True))
+                pending.extend((child, False) for child in self.child_indices(i))
+                continue
+            cls = self.classes[self.kinds[i]]
+            values = [self._materialize(ref, built) for ref in self.refs(i)]
+            init = _init_flags(cls)
+            node = cls(*(value for value, flag in zip(values, init) if flag))
+            # Atributos que não são argumentos do construtor (ex.: os
+            # preenchidos por `lox.resolver`).
+            for name, value, flag in zip(field_names(cls), values, init):
+                if not flag:
+                    setattr(node, name, value)
+            built[i] = node
+        return built[index]
+
+    def _materialize(self, ref: int, built: dict[int, Node]) -> Any:
+        kind = ref & 3
+        if kind == NODE:
+            return built[ref >> 2]
+        if kind == LIST:
+            start = ref >> 2
+            lists = self.lists
+            return [self._materialize(lists[i], built) for i in range(start + 1, start + 1 + lists[start])]
+        return self.decode(ref)
+
+    def nbytes(self) -> int:
+        """
+        Tamanho dos arrays e da tabela de valores, em bytes.
+        """
+        arrays = (self.kinds, self.offsets, self.slots, self.lists, self.value_tags, self.value_offsets, self.blob)
+        return sum(memoryview(data).nbytes for data in arrays)
+
+    #
+    # Serialização
+    #
+    def save(self, path: str | Path) -> None:
+        """
+        Salva a árvore em um arquivo que pode ser carregado com `load`.
+        """
+        with open(path, "wb") as fd:
+            fd.write(self.to_bytes())
+
+    def to_bytes(self) -> bytes:
+        """
+        Serializa a árvore no formato lido por `load`.
+        """
+        info = {"classes": [_qualified_name(cls) for cls in self.classes], "passes": list(self.passes)}
+        meta = json.dumps(info).encode()
+        sections = [self.kinds, self.offsets, self.slots, self.lists, self.value_tags, self.value_offsets, self.blob]
+        header = HEADER.pack(
+            MAGIC,
+            VERSION,
+            0 if sys.byteorder == "little" else 1,
+            len(meta),
+            *(len(section) for section in sections[:-1]),
+        )
+        parts = [header, meta]
+        size = len(header) + len(meta)
+        for section in sections:
+            data = bytes(memoryview(section))
+            padding = -size % ALIGN
+            parts.append(b"\0" * padding)
+            parts.append(data)
+            size += padding + len(data)
+        return b"".join(parts)
+
+    def close(self) -> None:
+        """
+        Libera o arquivo mapeado em memória (as views deixam de funcionar).
+        """
+        if self._mmap is not None:
+            for name in ("kinds", "offsets", "slots", "lists", "value_tags", "value_offsets", "blob"):
+                section = getattr(self, name)
+                if isinstance(section, memoryview):
+                    section.release()
+            self._mmap.close()
+            self._mmap = None
+
+
+def load(path: str | Path, use_mmap: bool = True) -> FlatTree:
+    """
+    Carrega uma árvore salva com `FlatTree.save`.
+
+    Por padrão, o arquivo é mapeado em memória (somente leitura) e os arrays
+    apontam diretamente para o arquivo, sem cópias.
+    """
+    with open(path, "rb") as fd:
+        if use_mmap:
+            data: Any = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            data = fd.read()
+    tree = from_buffer(data)
+    if isinstance(data, mmap.mmap):
+        tree._mmap = data
+    return tree
+
+
+def from_buffer(data: Any) -> FlatTree:
+    """
+    Lê uma árvore serializada por `FlatTree.to_bytes` a partir de um buffer
+    (bytes, mmap, etc.), sem copiar os arrays.
+    """
+    buffer = memoryview(data)
+    magic, version, byteorder, meta_size, *counts = HEADER.unpack_from(buffer)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("arquivo não contém uma árvore Lox plana compatível")
+    pos = HEADER.size
+    meta = json.loads(bytes(buffer[pos : pos + meta_size]))
+    pos += meta_size
+
+    swap = byteorder != (0 if sys.byteorder == "little" else 1)
+    sections = []
+    for typecode, count in zip("HIIIBIB", [*counts, None]):
+        pos += -pos % ALIGN
+        if count is None:  # o blob vai até o fim do arquivo
+            count = len(buffer) - pos
+        size = count * array(typecode).itemsize
+        section = buffer[pos : pos + size].cast(typecode)
+        if swap and section.itemsize > 1:
+            copy = array(typecode, section)
+            copy.byteswap()
+            section = copy
+        sections.append(section)
+        pos += size
+
+    classes = [_resolve(name) for name in meta["classes"]]
+    return FlatTree(classes, *sections, passes=tuple(meta.get("passes", ())))
+
+
+def flatten(root: Node) -> FlatTree:
+    """
+    Converte uma árvore de objetos na representação plana.
+
+    Nós compartilhados (ex.: literais) são armazenados uma única vez. Os nós
+    devem ser dataclasses, como as classes de `lox.ast`.
+    """
+    classes: list[type] = []
+    class_ids: dict[type, int] = {}
+    kinds = array("H")
+    offsets = array("I")
+    slots = array("I")
+    lists = array("I")
+    values = _ValueTable()
+
+    index: dict[int, int] = {id(root): 0}
+    order: list[Node] = [root]
+
+    def ref(obj: Any) -> int:
+        if obj is None:
+            return NONE
+        if isinstance(obj, Node):
+            key = id(obj)
+            if key not in index:
+                index[key] = len(order)
+                order.append(obj)
+            return index[key] << 2 | NODE
+        if isinstance(obj, (list, tuple)):
+            start = len(lists)
+            lists.append(len(obj))
+            lists.extend([0] * len(obj))
+            for i, item in enumerate(obj, start + 1):
+                lists[i] = ref(item)
+            return start << 2 | LIST
+        return values.add(obj) << 2 | VALUE
+
+    # `order` cresce à medida que novos nós são encontrados, então os filhos
+    # de cada nó ficam em posições consecutivas.
+    i = 0
+    while i < len(order):
+        node = order[i]
+        cls = type(node)
+        if (kind := class_ids.get(cls)) is None:
+            if not dataclasses.is_dataclass(cls):
+                raise TypeError(f"{cls.__name__} não é uma dataclass")
+            kind = class_ids[cls] = len(classes)
+            classes.append(cls)
+        kinds.append(kind)
+        offsets.append(len(slots))
+        start = len(slots)
+        names = field_names(cls)
+        slots.extend([0] * len(names))
+        for j, name in enumerate(names):
+            slots[start + j] = ref(getattr(node, name))
+        i += 1
+
+    from .passes import marks
+
+    tags, value_offsets, blob = values.encode()
+    passes = tuple(sorted(marks(root)))
+    return FlatTree(classes, kinds, offsets, slots, lists, tags, value_offsets, blob, passes)
+
+
+class FlatNode:
+    """
+    View de um nó de uma `FlatTree`.
+
+    Atributos são decodificados sob demanda. Métodos que não são definidos
+    aqui (ex.: `eval`, `validate_self`, `cursor`) usam a implementação da
+    classe original do nó.
+    """
+
+    __slots__ = ("tree", "index", "__weakref__")
+    __hash__ = None  # type: ignore[assignment]
+
+    def __init__(self, tree: FlatTree, index: int):
+        self.tree = tree
+        self.index = index
+
+    @property  # type: ignore[misc]
+    def __class__(self) -> type:  # type: ignore[override]
+        # Faz `isinstance(view, BinOp)` funcionar como na árvore original.
+        return self.tree.classes[self.tree.kinds[self.index]]
+
+    def __getattr__(self, name: str) -> Any:
+        tree = self.tree
+        kind = tree.kinds[self.index]
+        fields = tree._fields[kind]
+        if (pos := fields.get(name)) is not None:
+            return tree.decode(tree.slots[tree.offsets[self.index] + pos])
+        attr = getattr(tree.classes[kind], name)
+        if callable(attr) and hasattr(attr, "__get__"):
+            return attr.__get__(self)
+        return attr
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, FlatNode) and other.tree is self.tree and other.index == self.index:
+            return True
+        return self.__class__.__eq__(self, other)
+
+    def __repr__(self) -> str:
+        cls = self.__class__
+        names = (f.name for f in dataclasses.fields(cls) if f.repr)
+        args = ", ".join(f"{name}={getattr(self, name)!r}" for name in names)
+        return f"{cls.__name__}({args})"
+
+    def eval(self, ctx):
+        return self.__class__.eval(self, ctx)
+
+    def children(self) -> Iterator["FlatNode"]:
+        tree = self.tree
+        return map(tree.node, tree.child_indices(self.index))
+
+    def descendants(self) -> Iterator["FlatNode"]:
+        tree = self.tree
+        pending = [self.index]
+        while pending:
+            index = pending.pop()
+            yield tree.node(index)
+            pending.extend(reversed(tree.child_indices(index)))
+
+    def is_leaf(self) -> bool:
+        return all(ref & 3 in (VALUE, NONE) for ref in self.tree.refs(self.index))
+
+    def visit(self, visitors: "dict[type, Callable[[Any], Any]] | Visitor") -> None:
+        """
+        Equivalente a `Node.visit`: visita os atributos (em pós-ordem) e
+        depois o próprio nó.
+        """
+        from .visitor import Visitor
+
+        if not isinstance(visitors, Visitor):
+            visitors = Visitor(post=visitors)
+        tree = self.tree
+        pending: list[tuple[Any, Any]] = [(None, self)]
+        while pending:
+            handler, obj = pending.pop()
+            if handler is not None:
+                handler(obj)
+                continue
+            # Views são despachadas pela classe do nó, e não por FlatNode.
+            pre, post = visitors.handlers(obj.__class__)
+            if post is not None:
+                pending.append((post, obj))
+            if not isinstance(obj, FlatNode):
+                if pre is not None:
+                    pre(obj)
+                continue
+            if pre is not None and pre(obj) is False:
+                continue
+            tasks: list[tuple[Any, Any]] = []
+            for ref in tree.refs(obj.index):
+                kind = ref & 3
+                if kind == NODE or (visitors.leaves and kind != LIST):
+                    tasks.append((None, tree.decode(ref)))
+                elif kind == LIST:
+                    tasks.extend(
+                        (None, item)
+                        for item in tree.decode(ref)
+                        if visitors.leaves or isinstance(item, FlatNode)
+                    )
+            pending.extend(reversed(tasks))
+
+    def pretty(self, indent: int = 2, max_depth: int | None = None, max_children: int | None = None) -> str:
+        # A impressão é usada apenas para depuração: reconstruímos a
+        # subárvore e reaproveitamos `Node.pretty`.
+        return self.tree.to_node(self.index).pretty(indent, max_depth, max_children)
+
+    def to_node(self) -> Node:
+        """
+        Reconstrói a subárvore de objetos a partir deste nó.
+        """
+        return self.tree.to_node(self.index)
+
+    def replace_child(self, old: Any, new: Any) -> None:
+        raise TypeError("árvores planas não podem ser modificadas")
+
+
+def field_names(cls: type) -> tuple[str, ...]:
+    """
+    Nomes de todos os atributos da dataclass, na ordem de declaração,
+    inclusive os que não são argumentos do construtor.
+    """
+    return tuple(f.name for f in dataclasses.fields(cls))
+
+
+@cache
+def _init_flags(cls: type) -> tuple[bool, ...]:
+    # Indica quais atributos de `field_names(cls)` são argumentos do construtor.
+    return tuple(f.init for f in dataclasses.fields(cls))
+
+
+class _ValueTable:
+    # Tabela de valores sem repetições, codificada em um único bloco de bytes.
+    # Valores que não são hashable (ex.: os dicionários de `lox.resolver`) são
+    # identificados pelo id, de modo que um objeto compartilhado por vários
+    # nós continua compartilhado depois de decodificado.
+
+    def __init__(self):
+        self.index: dict[tuple[Any, Any], int] = {}
+        self.values: list[Any] = []
+
+    def add(self, value: Any) -> int:
+        try:
+            key = (type(value), value)
+            hash(key)
+        except TypeError:  # valor não hashable
+            key = (_ValueTable, id(value))
+        if (i := self.index.get(key)) is not None:
+            return i
+        i = len(self.values)
+        self.values.append(value)
+        self.index[key] = i
+        return i
+
+    def encode(self) -> tuple[array, array, array]:
+        tags = array("B")
+        offsets = array("I", [0])
+        blob = bytearray()
+        for value in self.values:
+            tag, data = _encode_value(value)
+            tags.append(tag)
+            blob += data
+            offsets.append(len(blob))
+        return tags, offsets, array("B", blob)
+
+
+def _encode_value(value: Any) -> tuple[int, bytes]:
+    if value is False:
+        return V_FALSE, b""
+    if value is True:
+        return V_TRUE, b""
+    if type(value) is float:
+        return V_FLOAT, struct.pack("<d", value)
+    if type(value) is str:
+        return V_STR, value.encode("utf8")
+    name = _qualified_name(value)
+    try:
+        if _resolve(name) is value:
+            return V_REF, name.encode("utf8")
+    except (ImportError, AttributeError, ValueError):
+        pass
+    return V_PICKLE, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _qualified_name(obj: Any) -> str:
+    return f"{getattr(obj, '__module__', '')}:{getattr(obj, '__qualname__', '')}"
+
+
+def _resolve(name: str) -> Any:
+    module, _, qualname = name.partition(":")
+    if not module or not qualname:
+        raise ValueError(f"nome inválido: {name!r}")
+    obj: Any = importlib.import_module(module)
+    for part in qualname.split("."):
+        obj = getattr(obj, part)
+    return obj
+
+
+_MISSING = object()
@@ -4,26 +4,43 @@ ATENÇÃO: EVITE MODIFICAR ESTE ARQUIVO!
 Define estrutura de dados básicas para as árvores sintáticas.
 """
 
+import collections.abc
 from abc import ABC
 from dataclasses import dataclass, field
-from functools import singledispatch
-from types import BuiltinFunctionType, FunctionType, MethodDescriptorType, MethodType
+from functools import cache, singledispatch
+from types import (
+    BuiltinFunctionType,
+    FunctionType,
+    MethodDescriptorType,
+    MappingProxyType,
+    MethodType,
+    UnionType,
+)
 from typing import (
     TYPE_CHECKING,
     Any,
     Callable,
     Generic,
+    IO,
     Iterable,
     Iterator,
+    NamedTuple,
     Optional,
     TypeVar,
+    Union,
     cast,
+    get_args,
+    get_origin,
+    get_type_hints,
 )
 
-from lark import Token, Tree
+from .errors import SemanticError
 
 if TYPE_CHECKING:
+    from lark import Token, Tree
+
     from .ast import Class, Function
+    from .visitor import Visitor
 
 
 N = TypeVar("N", bound="Node", contravariant=True)
@@ -36,38 +53,108 @@ class Node(ABC):
     O módulo `abc` é usado para criar uma classe abstrata. Isso significa que
     não podemos instanciar essa classe diretamente. Em vez disso, devemos
     criar subclasses que implementem os métodos abstratos definidos aqui.
+
+    Os nós de `lox.ast` são dataclasses com `__slots__`: os atributos ficam
+    armazenados diretamente no objeto, sem um dicionário por instância, o que
+    reduz bastante a memória ocupada por árvores grandes. O slot `__weakref__`
+    permite associar informações externas à árvore (ex.: `lox.positions`).
     """
 
+    __slots__ = ("__weakref__",)
+
+    @property
+    def __dict__(self) -> MappingProxyType[str, Any]:  # type: ignore[override]
+        """
+        Atributos declarados do nó, somente para leitura.
+
+        Nós com `__slots__` não possuem um `__dict__` de verdade. Este
+        mapeamento mantém `vars(node)` funcionando para consultas, mas não
+        aceita modificações (levanta `TypeError`): use `setattr(node, nome,
+        valor)` para alterar o nó.
+        """
+        return MappingProxyType({name: getattr(self, name) for name in field_table(type(self)).names})
+
     def eval(self, ctx):
         name = type(self).__name__
         raise NotImplementedError(f"Método eval não implementado para {name}!")
 
-    def pretty(self, indent: int = 2) -> str:
+    def pretty(
+        self,
+        indent: int = 2,
+        max_depth: int | None = None,
+        max_children: int | None = None,
+    ) -> str:
         """
         Método para imprimir a árvore sintática de forma legível.
 
         O parâmetro `indent` é usado para controlar a indentação da impressão.
+        Os limites `max_depth` e `max_children` são descritos em
+        `write_pretty`.
         """
         parts = []
-        for indent_level, line in self._pretty_lines():
+        for indent_level, line in self._pretty_lines(max_depth=max_depth, max_children=max_children):
             parts.append(indent * indent_level * " ")
             parts.append(line)
             parts.append("\n")
         return "".join(parts)
 
+    def write_pretty(
+        self,
+        file: IO[str],
+        indent: int = 2,
+        max_depth: int | None = None,
+        max_children: int | None = None,
+    ) -> None:
+        """
+        Escreve a mesma saída de `pretty` em um arquivo, à medida que as
+        linhas são produzidas.
+
+        Ao contrário de `pretty`, não monta a string inteira na memória, de
+        modo que a impressão de árvores enormes começa imediatamente.
+
+        Args:
+            file:
+                Arquivo (ou objeto com um método `write`) de destino.
+            indent:
+                Espaços por nível de indentação.
+            max_depth:
+                Nós mais profundos que isso (a raiz tem profundidade 0) são
+                impressos de forma abreviada, como `Block(...)`. Nós que
+                cabem em uma linha são sempre impressos por completo.
+            max_children:
+                Listas com mais itens que isso mostram apenas os primeiros
+                itens, seguidos de uma linha indicando quantos foram omitidos.
+        """
+        lines = self._pretty_lines(max_depth=max_depth, max_children=max_children)
+        parts: list[str] = []
+        for indent_level, line in lines:
+            parts.append(indent * indent_level * " ")
+            parts.append(line)
+            parts.append("\n")
+            if len(parts) >= 3 * PRETTY_CHUNK_LINES:
+                file.write("".join(parts))
+                parts.clear()
+        file.write("".join(parts))
+
     def is_leaf(self) -> bool:
         """
         Método que verifica se o nó é uma folha na árvore sintática.
 
         Um nó é considerado uma folha se não tem filhos do tipo `Node`.
         """
-        for name in self.__annotations__:
+        for name, _ in field_table(type(self)).children:
             value = getattr(self, name)
             if isinstance(value, (Node, list, tuple, dict)):
                 return False
         return True
 
-    def _pretty_lines(self, indent_level: int = 0, end="") -> Iterator[tuple[int, str]]:
+    def _pretty_lines(
+        self,
+        indent_level: int = 0,
+        end="",
+        max_depth: int | None = None,
+        max_children: int | None = None,
+    ) -> Iterator[tuple[int, str]]:
         """
         Método auxiliar para imprimir a árvore sintática de forma legível.
 
@@ -75,105 +162,44 @@ class Node(ABC):
         """
         # Um pouquinho de Python avançado aqui.
         # O método `_pretty_lines` é um gerador. Cada yield retorna uma dupla com
-        # o nível de indentação da linha e o conteúdo a ser impresso
+        # o nível de indentação da linha e o conteúdo a ser impresso.
         #
-        # No caso simples, imprimimos a classe usando str(self). Fazemos isso se
-        # a classe não tiver nenhum filho do tipo Node.
-        if can_print_as_leaf(self):
-            yield indent_level, str(self)
-            return
-
-        # No caso mais complexo, começamos com a linha de abertura, imprimindo
-        # o nome da classe e um parêntese de abertura
-        yield indent_level, str(self.__class__.__name__) + "("
-
-        # O attributo "__annotations__" é um dicionário que contém os nomes dos
-        # atributos declarados e seus tipos correspondentes. Vamos pegar os tipos
-        # na ordem de declaração e imprimir o nome e valores correspondentes
-        for attr in self.__annotations__:
-            # attr é o nome do atributo. Obtemos o valor do atributo usando a
-            # função `getattr` do Python
-            value = getattr(self, attr)
-
-            # Se o valor for um objeto do tipo `Node`, chamamos o método `pretty_lines`
-            # recursivamente. Caso contrário, usamos a implementação genérica
-            # do método `pretty`
-            if isinstance(value, Node):
-                yield from self._pretty_lines_node(attr + "=", value, indent_level)
-            elif isinstance(value, (list, tuple)):
-                yield from self._pretty_lines_list(attr, value, indent_level)
-            else:
-                yield indent_level + 1, f"{attr}={pretty(value)}"
-                continue
-
-        # Terminamos fechando o parênteses que foi aberto na primeira linha
-        yield indent_level, ")" + end
-
-    def _pretty_lines_node(
-        self,
-        prefix: str,
-        value: "Node",
-        indent_level: int = 0,
-    ) -> Iterator[tuple[int, str]]:
-        """
-        Método auxiliar para imprimir nós de forma legível.
-        """
-        lines = iter(value._pretty_lines(indent_level + 1))
-        (_, first_line) = next(lines)
-
-        # Tratamos a primeira linha de forma diferente, pois ela é prefixada
-        # com o nome do atributo.
-        yield indent_level + 1, prefix + first_line
-
-        # O comando "yield from" gera todos os valores remanescentes do
-        # iterador `lines`.
-        yield from lines
-
-    def _pretty_lines_list(
-        self,
-        attr: str,
-        value: list[Any] | tuple[Any],
-        indent_level: int = 0,
-    ) -> Iterator[tuple[int, str]]:
-        """
-        Método auxiliar para imprimir listas de forma legível.
-        """
-        if all(not isinstance(item, Node) for item in value):
-            yield indent_level + 1, f"{attr}={list(value)}"
-            return
-
-        yield indent_level + 1, f"{attr}=["
-
-        for item in value:
-            if isinstance(item, Node):
-                yield from item._pretty_lines(indent_level + 2, end=",")
+        # Não chamamos `_pretty_lines` recursivamente para cada filho: em
+        # programas muito aninhados isso estoura o limite de recursão do Python
+        # e cada linha teria que atravessar todos os geradores dos nós pais.
+        # Em vez disso, usamos uma pilha de tarefas. Uma tarefa é uma linha
+        # pronta (nível, texto) ou um nó a ser expandido (nível, nó, prefixo,
+        # fim, profundidade). As tarefas são empilhadas em ordem inversa para
+        # que a primeira seja a próxima a sair da pilha.
+        #
+        # `depths` é apenas um cache para `can_print_as_leaf`. Ele é esvaziado
+        # de tempos em tempos para que a memória usada não cresça com o
+        # tamanho da árvore.
+        depths: dict[int, int] = {}
+        pending: list[tuple] = [(indent_level, self, "", end, 0)]
+        while pending:
+            task = pending.pop()
+            if isinstance(task[1], str):
+                yield task
             else:
-                yield indent_level + 2, pretty(item) + ","
-        yield indent_level + 1, "]"
+                if len(depths) > PRETTY_CACHE_SIZE:
+                    depths.clear()
+                pending.extend(reversed(_pretty_tasks(*task, depths, max_depth, max_children)))
 
-    def visit(self, visitors: dict[type["Node"], Callable[[N], Any]]) -> None:
+    def visit(self, visitors: "dict[type[Node], Callable[[N], Any]] | Visitor") -> None:
         """
         Recebe um dicionário de tipos associados a funções.
 
         Executa a função correspondente ao tipo para cada nó na árvore sintática.
+        Os filhos são visitados antes do próprio nó. Também aceita uma
+        instância de `lox.visitor.Visitor`, que permite tratadores em
+        pré-ordem.
         """
+        from .visitor import Visitor
 
-        # Primeiro visitamos os filhos do nó atual.
-        for name in self.__annotations__:
-            value = getattr(self, name)
-            if isinstance(value, Node):
-                value.visit(visitors)
-            elif isinstance(value, (list, tuple)):
-                for item in value:
-                    if isinstance(item, Node):
-                        item.visit(visitors)
-                    else:
-                        visit_once(item, visitors)
-            else:
-                visit_once(value, visitors)
-
-        # Agora visitamos self
-        visit_once(self, visitors)
+        if not isinstance(visitors, Visitor):
+            visitors = Visitor(post=visitors)
+        visitors.walk(self)
 
     def children(self) -> Iterable["Node"]:
         """
@@ -183,16 +209,16 @@ class Node(ABC):
         do nó atual. Isso é útil para percorrer a árvore sintática de forma
         recursiva.
         """
-        for name in self.__annotations__:
+        for name, kind in field_table(type(self)).children:
             value = getattr(self, name)
-            if isinstance(value, Node):
-                yield value
-            elif isinstance(value, (list, tuple)):
+            if kind is LIST or (kind is ANY and isinstance(value, (list, tuple))):
                 for item in value:
                     if isinstance(item, Node):
                         yield item
+            elif isinstance(value, Node):
+                yield value
 
-    def lark_descendents(self) -> Iterable[Tree | Token]:
+    def lark_descendents(self) -> Iterable["Tree | Token"]:
         """
         Retorna todos os descendentes do nó atual.
 
@@ -203,19 +229,28 @@ class Node(ABC):
         método ajuda a encontrar nós não-tranformados que podem ter escapado seu
         Transformer.
         """
-        for name in self.__annotations__:
-            value = getattr(self, name)
-            if isinstance(value, (Tree, Token)):
-                yield value
+        from lark import Token, Tree
 
-            if isinstance(value, Node):
-                yield from value.lark_descendents()
-            elif isinstance(value, (list, tuple)):
-                for item in value:
-                    if isinstance(item, Node):
-                        yield from item.lark_descendents()
-                    elif isinstance(item, (Tree, Token)):
-                        yield item
+        # A pilha contém nós a serem percorridos e objetos do Lark prontos
+        # para serem produzidos, na ordem inversa em que aparecem.
+        pending: list[Any] = [self]
+        while pending:
+            node = pending.pop()
+            if not isinstance(node, Node):
+                yield node
+                continue
+
+            found: list[Any] = []
+            # Tokens são strings, então podem aparecer em qualquer atributo.
+            for name in field_table(type(node)).names:
+                value = getattr(node, name)
+                if isinstance(value, (Tree, Token, Node)):
+                    found.append(value)
+                elif isinstance(value, (list, tuple)):
+                    for item in value:
+                        if isinstance(item, (Node, Tree, Token)):
+                            found.append(item)
+            pending.extend(reversed(found))
 
     def descendants(self) -> Iterable[Any]:
         """
@@ -225,9 +260,13 @@ class Node(ABC):
         descendentes do nó atual. Isso é útil para percorrer a árvore sintática
         de forma recursiva.
         """
-        yield self
-        for child in self.children():
-            yield from child.descendants()
+        # Percurso em pré-ordem com uma pilha explícita, para não estourar o
+        # limite de recursão em programas muito aninhados.
+        pending: list[Node] = [self]
+        while pending:
+            node = pending.pop()
+            yield node
+            pending.extend(reversed(list(node.children())))
 
     def cursor(self, cursor: Optional["Cursor[N]"] = None) -> "Cursor[N]":
         """
@@ -242,13 +281,20 @@ class Node(ABC):
         if cursor.node is self:
             return cursor
 
-        # Busca em largura
-        pending = [cursor]
-        while pending:
-            cursor = pending.pop()
-            if cursor.node is self:
-                return cursor
-            pending.extend(cursor.children())
+        # Em vez de procurar o nó em toda a árvore, usamos um índice com o pai
+        # de cada nó, construído uma única vez e guardado no cursor de origem.
+        # Se a árvore foi modificada depois disso, o caminho encontrado pode
+        # ser inválido e reconstruímos o índice.
+        for rebuild in (False, True):
+            index = cursor._index
+            if index is None or rebuild:
+                index = cursor._index = ParentIndex(cursor.node)
+            path = index.path(self)
+            if path is not None and _is_valid_path(path):
+                result = cast("Cursor[Node]", cursor)
+                for node in path[1:]:
+                    result = Cursor(node, result)
+                return cast("Cursor[N]", result)
         raise ValueError("O cursor não aponta para o nó atual")
 
     def replace_child(self, old: "Node", new: "Node") -> None:
@@ -258,7 +304,7 @@ class Node(ABC):
         O método `replace_child` substitui um filho do nó atual por um novo
         nó. Isso é útil para modificar a árvore sintática de forma recursiva.
         """
-        for name in self.__annotations__:
+        for name, _ in field_table(type(self)).children:
             value = getattr(self, name)
             if isinstance(value, Node):
                 if value is old:
@@ -285,12 +331,14 @@ class Node(ABC):
         """
         Remove açúcar sintático do nó atual e todos os filhos.
         """
-        pending = [self.cursor()]
+        # `desugar_self` não recebe um cursor, então percorremos os nós
+        # diretamente, sem criar um cursor para cada um deles.
+        pending: list[Node] = [self]
 
         while pending:
-            cursor = pending.pop()
-            cursor.node.desugar_self()
-            pending.extend(cursor.children())
+            node = pending.pop()
+            node.desugar_self()
+            pending.extend(node.children())
 
     def validate_self(self, cursor: "Cursor[Node]"):
         """
@@ -307,10 +355,15 @@ class Node(ABC):
         Valida o nó atual e todos os filhos.
         """
         for cursor in self.cursor().descendants():
-            cursor.node.validate_self(cursor)
+            try:
+                cursor.node.validate_self(cursor)
+            except SemanticError as e:
+                if e.node is None:
+                    e.node = cursor.node
+                raise
 
 
-@dataclass
+@dataclass(slots=True)
 class Cursor(Generic[N]):
     """
     Classe que representa um cursor para navegar na árvore sintática.
@@ -319,6 +372,11 @@ class Cursor(Generic[N]):
     node: N
     parent_cursor: Optional["Cursor[Node]"] = field(default=None, repr=False)
 
+    # Cursor da função ou classe mais próxima acima deste nó, calculado sob
+    # demanda (veja `scope`) e índice de pais usado por `Node.cursor`.
+    _scope: Any = field(default=NotImplemented, init=False, repr=False, compare=False)
+    _index: Optional["ParentIndex"] = field(default=None, init=False, repr=False, compare=False)
+
     def parent(self) -> "Cursor[Node]":
         """
         Retorna o nó pai do cursor.
@@ -337,9 +395,10 @@ class Cursor(Generic[N]):
         O método `root` retorna o nó raiz do cursor. Isso é útil para
         navegar na árvore sintática de forma recursiva.
         """
-        if not self.parent_cursor:
-            return cast("Cursor[Node]", self)
-        return self.parent_cursor.root()
+        cursor = cast("Cursor[Node]", self)
+        while cursor.parent_cursor:
+            cursor = cursor.parent_cursor
+        return cursor
 
     def is_root(self) -> bool:
         """
@@ -400,11 +459,14 @@ class Cursor(Generic[N]):
         descendentes do nó atual. Isso é útil para navegar na árvore sintática
         de forma recursiva.
         """
-        if skip is None or not skip(self):
-            if not skip_self:
-                yield cast("Cursor[Node]", self)
-            for child in self.children():
-                yield from child.descendants(skip)
+        pending = [cast("Cursor[Node]", self)]
+        while pending:
+            cursor = pending.pop()
+            if skip is not None and skip(cursor):
+                continue
+            if not (skip_self and cursor is self):
+                yield cursor
+            pending.extend(reversed(list(cursor.children())))
 
     def is_scoped_to(self, scope: type[Node]) -> bool:
         """
@@ -414,20 +476,62 @@ class Cursor(Generic[N]):
         escopo específico. Isso é útil para verificar se o nó atual
         está dentro de uma classe ou função.
         """
+        from .ast import Class, Function
+
+        # Funções e classes são encontradas pela cadeia de escopos; outros
+        # tipos exigem percorrer todos os pais.
+        if issubclass(scope, (Function, Class)):
+            parent = self.scope()
+            while parent is not None:
+                if isinstance(parent.node, scope):
+                    return True
+                parent = parent.scope()
+            return False
+
         for parent in self.parents():
             if isinstance(parent.node, scope):
                 return True
         return False
 
+    def scope(self) -> Optional["Cursor[Node]"]:
+        """
+        Retorna o cursor da função ou classe mais próxima que contém o nó
+        atual (excluindo o próprio nó), ou None.
+
+        O resultado é guardado em cada cursor do caminho percorrido. Como
+        irmãos compartilham os mesmos cursores pais, consultar o escopo de
+        todos os nós de uma árvore tem custo linear.
+        """
+        from .ast import Class, Function
+
+        path = []
+        cursor: Cursor[Node] = cast("Cursor[Node]", self)
+        scope = None
+        while (known := cursor._scope) is NotImplemented:
+            path.append(cursor)
+            parent = cursor.parent_cursor
+            if parent is None or isinstance(parent.node, (Function, Class)):
+                scope = parent
+                break
+            cursor = parent
+        else:
+            scope = known
+
+        for cursor in path:
+            cursor._scope = scope
+        return scope
+
     def class_scope(self) -> "Cursor[Class]":
         """
         Retorna um cursor para o nó de classe pai do nó atual.
         """
         from .ast import Class
 
-        for parent in self.parents():
+        parent = self.scope()
+        while parent is not None:
             if isinstance(parent.node, Class):
                 return parent
+            parent = parent.scope()
         raise ValueError("O cursor não está dentro de uma classe")
 
     def function_scope(self, root=False) -> "Cursor[Function]":
@@ -442,17 +546,132 @@ class Cursor(Generic[N]):
         from .ast import Function
 
         cursor = None
-        for parent in self.parents():
+        parent = self.scope()
+        while parent is not None:
             if isinstance(parent.node, Function):
                 cursor = parent
                 if not root:
                     return cursor
+            parent = parent.scope()
 
         if cursor is None:
             raise ValueError("O cursor não está dentro de uma função")
         return cursor
 
 
+class ParentIndex:
+    """
+    Índice com o pai de cada nó de uma árvore sintática.
+
+    O índice é construído em uma única passada e responde em tempo constante
+    qual é o pai de um nó. A função ou classe mais próxima que contém um nó
+    é encontrada percorrendo apenas a cadeia de escopos (funções e classes),
+    e não todos os ancestrais.
+
+    O índice reflete a árvore no momento da construção: se a árvore for
+    modificada, construa um novo índice. Nós compartilhados (ex.: literais,
+    veja `LoxTransformer`) aparecem em vários lugares da árvore; o índice
+    associa cada um ao primeiro pai encontrado em pré-ordem.
+
+    Uso:
+
+        >>> index = ParentIndex(tree)
+        >>> index.parent(node)
+        >>> index.enclosing(node, Function)
+    """
+
+    __slots__ = ("root", "_parents", "_scopes")
+
+    def __init__(self, root: Node):
+        from .ast import Class, Function
+
+        self.root = root
+        parents: dict[int, Node] = {}
+        scopes: dict[int, Node] = {}
+        pending: list[tuple[Node, Node | None]] = [(root, None)]
+        while pending:
+            node, scope = pending.pop()
+            if scope is not None:
+                scopes[id(node)] = scope
+            if isinstance(node, (Function, Class)):
+                scope = node
+            for child in node.children():
+                if id(child) not in parents and child is not root:
+                    parents[id(child)] = node
+                    pending.append((child, scope))
+        self._parents = parents
+        self._scopes = scopes
+
+    def __contains__(self, node: Node) -> bool:
+        return node is self.root or id(node) in self._parents
+
+    def __len__(self) -> int:
+        return len(self._parents) + 1
+
+    def parent(self, node: Node) -> Node | None:
+        """
+        Retorna o pai do nó, ou None se for a raiz ou não pertencer à árvore.
+        """
+        return self._parents.get(id(node))
+
+    def ancestors(self, node: Node) -> Iterator[Node]:
+        """
+        Percorre os ancestrais do nó, do pai até a raiz.
+        """
+        parents = self._parents
+        while (node := parents.get(id(node))) is not None:  # type: ignore[assignment]
+            yield node
+
+    def path(self, node: Node) -> list[Node] | None:
+        """
+        Retorna a lista de nós da raiz até o nó (inclusive), ou None se o nó
+        não pertencer à árvore.
+        """
+        if node not in self:
+            return None
+        path = [node, *self.ancestors(node)]
+        path.reverse()
+        return path
+
+    def enclosing(self, node: Node, scope: type[Node]) -> Node | None:
+        """
+        Retorna o nó do tipo `scope` mais próximo que contém o nó (excluindo
+        o próprio nó), ou None.
+
+        Para funções e classes, percorre apenas a cadeia de escopos.
+        """
+        from .ast import Class, Function
+
+        if not issubclass(scope, (Function, Class)):
+            return next((n for n in self.ancestors(node) if isinstance(n, scope)), None)
+
+        scopes = self._scopes
+        parent = scopes.get(id(node))
+        while parent is not None and not isinstance(parent, scope):
+            parent = scopes.get(id(parent))
+        return parent
+
+    def cursor(self, node: Node) -> Cursor[Node]:
+        """
+        Retorna um cursor para o nó, com os cursores de todos os pais.
+        """
+        path = self.path(node)
+        if path is None:
+            raise ValueError("O nó não pertence à árvore")
+        cursor: Cursor[Node] = Cursor(path[0])
+        for child in path[1:]:
+            cursor = Cursor(child, cursor)
+        return cursor
+
+
+def _is_valid_path(path: list[Node]) -> bool:
+    # Verifica se cada nó do caminho ainda é filho do anterior.
+    return all(
+        any(child is node for child in parent.children())
+        for parent, node in zip(path, path[1:])
+    )
+
+
 @singledispatch
 def pretty(obj: Any) -> str:
     """
@@ -495,36 +714,235 @@ def visit_once(obj: Node, visitors: dict[type[Node], Callable[[N], Any]]) -> Non
     """
     Visita um nó e executa a primeira função consistente com o tipo do objecto.
     """
-    for subtype in type(obj).mro():
-        try:
-            visitor = visitors[subtype]
-            visitor(obj)  # type: ignore
-            break
-        except KeyError:
-            continue
+    from .visitor import resolve
+
+    if (visitor := resolve(visitors, type(obj))) is not None:
+        visitor(obj)  # type: ignore
 
 
-def can_print_as_leaf(node: Node) -> bool:
+def can_print_as_leaf(node: Node, depths: dict[int, int] | None = None) -> bool:
     """
     Verifica se o nó pode ser impresso como uma folha.
 
-    Um nó pode ser impresso como uma folha se não tem filhos do tipo `Node`.
+    Um nó pode ser impresso como uma folha se não tem filhos do tipo `Node`,
+    ou se tem um único filho que também pode ser impresso como uma folha,
+    desde que a cadeia não tenha mais que `MAX_LEAF_DEPTH` nós.
+
+    O dicionário opcional `depths` guarda resultados intermediários, de modo
+    que verificar todos os nós de uma árvore tem custo linear.
     """
+    depth = _leaf_depth(node, {} if depths is None else depths)
+    return 0 < depth <= MAX_LEAF_DEPTH
+
+
+# Cadeias maiores que isso são impressas em várias linhas. Além de ilegível, a
+# representação em uma única linha usa `repr` recursivamente.
+MAX_LEAF_DEPTH = 100
+
+
+def _leaf_depth(node: Node, depths: dict[int, int]) -> int:
+    # Comprimento da cadeia de nós com um único filho que começa em `node`,
+    # ou -1 se a cadeia termina em um nó com vários filhos.
+    chain = []
+    depth = 0
     while node:
+        if (known := depths.get(id(node))) is not None:
+            depth = known
+            break
+        chain.append(node)
+
         args = []
-        for attr in node.__annotations__:
+        for attr, _ in field_table(type(node)).children:
             obj = getattr(node, attr)
             if isinstance(obj, (list, tuple)) and obj:
-                return False
+                args = None
+                break
             elif isinstance(obj, Node):
                 args.append(obj)
 
         match args:
             case []:
-                return True
+                break
             case [arg]:
                 node = arg
             case _:
-                return False
+                depth = -1
+                break
+
+    for item in reversed(chain):
+        if depth >= 0:
+            depth += 1
+        depths[id(item)] = depth
+    return depth
+
+
+def _pretty_tasks(
+    level: int,
+    node: Node,
+    prefix: str,
+    end: str,
+    depth: int,
+    depths: dict[int, int],
+    max_depth: int | None = None,
+    max_children: int | None = None,
+) -> list[tuple]:
+    # Linhas (e nós a expandir) que representam o nó em `Node._pretty_lines`.
+    #
+    # No caso simples, imprimimos a classe usando str(node). Fazemos isso se
+    # a classe não tiver nenhum filho do tipo Node.
+    if can_print_as_leaf(node, depths):
+        return [(level, prefix + str(node))]
+
+    # Abaixo da profundidade máxima, mostramos apenas o nome da classe.
+    if max_depth is not None and depth >= max_depth:
+        return [(level, prefix + type(node).__name__ + "(...)" + end)]
+
+    # No caso mais complexo, começamos com a linha de abertura, imprimindo
+    # o nome da classe e um parêntese de abertura. O prefixo é o nome do
+    # atributo que contém o nó, quando houver.
+    tasks: list[tuple] = [(level, prefix + type(node).__name__ + "(")]
+
+    # A tabela de atributos contém os nomes declarados em "__annotations__",
+    # na ordem de declaração. Imprimimos o nome e o valor correspondentes.
+    for attr in field_table(type(node)).names:
+        value = getattr(node, attr)
+        if isinstance(value, Node):
+            tasks.append((level + 1, value, attr + "=", "", depth + 1))
+        elif isinstance(value, (list, tuple)):
+            omitted = 0
+            if max_children is not None and len(value) > max_children:
+                omitted = len(value) - max_children
+                value = value[:max_children]
+            if all(not isinstance(item, Node) for item in value):
+                items = ", ".join(map(repr, value))
+                if omitted:
+                    items += f", ... (+{omitted})" if items else f"... (+{omitted})"
+                tasks.append((level + 1, f"{attr}=[{items}]"))
+                continue
+            tasks.append((level + 1, f"{attr}=["))
+            for item in value:
+                if isinstance(item, Node):
+                    tasks.append((level + 2, item, "", ",", depth + 1))
+                else:
+                    tasks.append((level + 2, pretty(item) + ","))
+            if omitted:
+                tasks.append((level + 2, f"... (+{omitted} itens omitidos)"))
+            tasks.append((level + 1, "]"))
+        else:
+            tasks.append((level + 1, f"{attr}={pretty(value)}"))
 
-    return True
+    # Terminamos fechando o parênteses que foi aberto na primeira linha
+    tasks.append((level, ")" + end))
+    return tasks
+
+
+# Linhas acumuladas por `Node.write_pretty` antes de cada escrita.
+PRETTY_CHUNK_LINES = 1024
+
+# Tamanho máximo do cache de `can_print_as_leaf` durante a impressão.
+PRETTY_CACHE_SIZE = 100_000
+
+
+# Tipos de atributos em `FieldTable`.
+VALUE = "value"  # valor que nunca é um nó (str, float, Callable, ...)
+NODE = "node"  # um único nó filho (ou None)
+LIST = "list"  # lista ou tupla de nós filhos
+ANY = "any"  # tipo desconhecido: verificado a cada acesso
+
+
+class FieldTable(NamedTuple):
+    """
+    Descrição dos atributos de uma classe de nós.
+
+    Attributes:
+        names:
+            Nomes dos atributos declarados, na ordem de `__annotations__`.
+            Atributos criados com `analysis_field` não são incluídos.
+        fields:
+            Pares (nome, tipo) de todos os atributos, onde tipo é VALUE, NODE,
+            LIST ou ANY.
+        children:
+            Apenas os pares que podem conter nós filhos (exclui VALUE).
+    """
+
+    names: tuple[str, ...]
+    fields: tuple[tuple[str, str], ...]
+    children: tuple[tuple[str, str], ...]
+
+
+@cache
+def field_table(cls: type) -> FieldTable:
+    """
+    Retorna a tabela de atributos da classe, calculada uma única vez.
+
+    Os percursos na árvore usam esta tabela para ignorar atributos que não
+    podem conter nós (nomes, valores, funções) e evitar testes de
+    `isinstance` em cada atributo de cada nó. O tipo de cada atributo é
+    deduzido a partir das anotações da classe. Anotações desconhecidas são
+    tratadas como ANY e verificadas dinamicamente, como antes.
+    """
+    annotations = _own_annotations(cls)
+    dataclass_fields = getattr(cls, "__dataclass_fields__", {})
+    annotations = {
+        name: hint
+        for name, hint in annotations.items()
+        if name not in dataclass_fields or ANALYSIS not in dataclass_fields[name].metadata
+    }
+    try:
+        hints = get_type_hints(cls)
+    except Exception:
+        hints = {}
+    fields = tuple((name, _field_kind(hints.get(name, annotations[name]))) for name in annotations)
+    children = tuple((name, kind) for name, kind in fields if kind is not VALUE)
+    return FieldTable(tuple(annotations), fields, children)
+
+
+def analysis_field(default: Any) -> Any:
+    """
+    Declara um atributo de nó preenchido por um passe de análise (ex.: o
+    endereço de uma variável calculado por `lox.resolver`).
+
+    O atributo não faz parte da estrutura da árvore: não é argumento do
+    construtor e é ignorado por `==`, `repr`, `pretty`, pelos percursos e
+    pela tabela de atributos.
+    """
+    return field(default=default, init=False, repr=False, compare=False, metadata={ANALYSIS: True})
+
+
+# Chave que identifica atributos de `analysis_field` nos metadados da dataclass.
+ANALYSIS = "lox_analysis"
+
+
+def _own_annotations(cls: type) -> dict[str, Any]:
+    # Reproduz a busca de `node.__annotations__` em uma instância: usa o
+    # primeiro dicionário de anotações encontrado na MRO.
+    for klass in cls.__mro__:
+        if "__annotations__" in vars(klass):
+            return vars(klass)["__annotations__"]
+    return getattr(cls, "__annotations__", {})
+
+
+def _field_kind(hint: Any) -> str:
+    origin = get_origin(hint)
+    if origin is None:
+        if not isinstance(hint, type):
+            return VALUE if hint is None else ANY
+        if issubclass(hint, Node):
+            return NODE
+        if issubclass(hint, (list, tuple)):
+            return LIST
+        if issubclass(hint, (str, int, float, type(None))):
+            return VALUE
+        return ANY
+    if origin in (Union, UnionType):
+        kinds = {_field_kind(arg) for arg in get_args(hint)}
+        if kinds == {VALUE}:
+            return VALUE
+        if kinds <= {NODE, VALUE}:
+            return NODE
+        return ANY
+    if origin is collections.abc.Callable:
+        return VALUE
+    if isinstance(origin, type) and issubclass(origin, (list, tuple)):
+        return LIST
+    return ANY
@@ -0,0 +1,318 @@
+"""
+Otimizações sobre a árvore sintática.
+
+Os passes deste módulo são registrados em `lox.passes`, mas não são
+executados por `lox.parse`: a árvore resultante não corresponde mais ao
+código fonte. Use a opção -O da linha de comando ou `run_passes`.
+
+Dobra de constantes (`fold`): expressões como `60 * 60 * 24`, `"a" + "b"` ou
+`-(1)` são calculadas por `BinOp.eval`/`UnaryOp.eval` a cada execução,
+inclusive dentro de laços. Este passe substitui operações cujos operandos são
+literais por um único `Literal`, usando as próprias funções de
+`lox.runtime`, de modo que o resultado é exatamente o que seria calculado em
+tempo de execução. Operações que levantariam `LoxError` (ex.: divisão por
+zero ou tipos incompatíveis) são mantidas e continuam falhando ao serem
+executadas.
+
+`and`/`or` com o operando da esquerda literal são substituídos pelo operando
+que seria retornado. Também são aplicadas identidades seguras quando o outro
+operando certamente é um número (literal numérico ou resultado de `-`,
+`*`, `/`): `x * 1`, `1 * x`, `x / 1`, `x - 0` e `-(-x)` viram `x`.
+`x + 0` não é simplificado, pois -0 + 0 é 0.
+
+Eliminação de código morto (`eliminate_dead_code`): remove os comandos que
+nunca são executados por virem depois de um `return` (ou de um comando que
+sempre retorna, como um `if` em que os dois ramos retornam ou um
+`while (true)`), substitui `if`s com condição literal pelo ramo escolhido,
+remove `while`s com condição literal falsa e remove as funções e classes
+globais que nunca são usadas pelo programa. Essa última etapa supõe que a
+árvore é o programa inteiro: não a use em árvores cujas funções são
+chamadas de fora (ex.: no REPL).
+
+O número de nós removidos por cada motivo pode ser obtido com `removals()`,
+de forma semelhante a `lox.passes.timed()`.
+
+Uso:
+
+    >>> tree = run_passes(lox.parse(src), ["fold", "dce"])
+    >>> with removals() as removed:
+    ...     tree = run_passes(lox.parse(src), ["dce"])
+    >>> removed
+    {'unreachable': 3, 'branch': 4, 'unused': 12}
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator
+
+from .ast import And, Assign, BinOp, Block, Class, Function, If, Literal, Or, Program, Return, UnaryOp, Var, While
+from .node import Node, field_table
+from .runtime import LoxError, add, eq, ge, gt, le, lt, mul, ne, neg, not_, sub, truediv
+
+# Operadores sem efeitos colaterais que podem ser calculados antes da execução.
+FOLDABLE = frozenset([add, sub, mul, truediv, eq, ne, lt, le, gt, ge, neg, not_])
+
+# Operadores que sempre retornam números (ou levantam LoxError).
+NUMERIC = frozenset([sub, mul, truediv, neg])
+
+# Dicionário que acumula os nós removidos, ativado por `removals()`.
+_REMOVED: ContextVar[dict[str, int] | None] = ContextVar("lox_removed_nodes", default=None)
+
+
+def fold(tree: Node) -> Node:
+    """
+    Dobra as constantes da árvore (modifica os nós) e retorna a nova raiz.
+    """
+    # Os nós são visitados em pós-ordem, de modo que os filhos já foram
+    # simplificados quando o pai é visitado. `done` guarda o nó original junto
+    # com o resultado para que o id não seja reutilizado por outro objeto.
+    done: dict[int, tuple[Node, Node]] = {}
+    pending: list[tuple[Node, bool]] = [(tree, False)]
+    while pending:
+        node, ready = pending.pop()
+        if id(node) in done:
+            continue
+        if not ready:
+            pending.append((node, True))
+            pending.extend((child, False) for child in node.children())
+            continue
+        _update_children(node, done)
+        done[id(node)] = (node, simplify(node))
+    return done[id(tree)][1]
+
+
+def simplify(node: Node) -> Node:
+    """
+    Versão simplificada do nó, supondo que os filhos já foram simplificados.
+    Retorna o próprio nó se não houver nada a fazer.
+    """
+    if isinstance(node, BinOp) and node.op in FOLDABLE:
+        left, right, op = node.left, node.right, node.op
+        if isinstance(left, Literal) and isinstance(right, Literal):
+            return _apply(node, op, left.value, right.value)
+        if (op is mul or op is truediv) and _is_one(right) or op is sub and _is_zero(right):
+            return left if is_numeric(left) else node
+        if op is mul and _is_one(left):
+            return right if is_numeric(right) else node
+    elif isinstance(node, UnaryOp) and node.op in FOLDABLE:
+        operand = node.operand
+        if isinstance(operand, Literal):
+            return _apply(node, node.op, operand.value)
+        if node.op is neg and isinstance(operand, UnaryOp) and operand.op is neg and is_numeric(operand.operand):
+            return operand.operand
+    elif isinstance(node, (And, Or)) and isinstance(node.left, Literal):
+        value = node.left.value
+        truthy = value is not False and value is not None
+        if truthy == isinstance(node, Or):
+            return node.left
+        return node.right
+    return node
+
+
+def is_numeric(expr: Node) -> bool:
+    """
+    Verifica se a expressão certamente produz um número (ou um erro).
+    """
+    # A soma de dois números é um número: verificamos os dois operandos.
+    pending = [expr]
+    while pending:
+        expr = pending.pop()
+        if isinstance(expr, BinOp) and expr.op is add:
+            pending.extend((expr.left, expr.right))
+        elif isinstance(expr, Literal):
+            if not isinstance(expr.value, float):
+                return False
+        elif not isinstance(expr, (BinOp, UnaryOp)) or expr.op not in NUMERIC:
+            return False
+    return True
+
+
+def _apply(node: Node, op: Any, *args: Any) -> Node:
+    try:
+        return Literal(op(*args))
+    except LoxError:
+        return node
+
+
+def _is_one(expr: Node) -> bool:
+    return isinstance(expr, Literal) and type(expr.value) is float and expr.value == 1.0
+
+
+def _is_zero(expr: Node) -> bool:
+    # Apenas 0 positivo: x - (-0) muda o sinal de x = -0.
+    return isinstance(expr, Literal) and type(expr.value) is float and str(expr.value) == "0.0"
+
+
+def _update_children(node: Node, done: dict[int, tuple[Node, Node]]) -> None:
+    # Substitui os filhos do nó pelas suas versões simplificadas.
+    for name, _ in field_table(type(node)).children:
+        value = getattr(node, name)
+        if isinstance(value, Node):
+            new = done[id(value)][1]
+            if new is not value:
+                setattr(node, name, new)
+        elif isinstance(value, list):
+            for i, item in enumerate(value):
+                if isinstance(item, Node) and (new := done[id(item)][1]) is not item:
+                    value[i] = new
+
+
+#
+# Eliminação de código morto
+#
+def eliminate_dead_code(tree: Node, removed: dict[str, int] | None = None) -> Node:
+    """
+    Remove o código morto da árvore (modifica os nós) e retorna a nova raiz.
+
+    Args:
+        tree:
+            Raiz da árvore.
+        removed:
+            Dicionário onde o número de nós removidos é acumulado, com as
+            chaves "unreachable" (comandos depois de um `return`), "branch"
+            (`if`/`while` com condição literal) e "unused" (funções e
+            classes globais não usadas). Se omitido, usa o dicionário de
+            `removals()`, se houver.
+    """
+    if removed is None:
+        removed = _REMOVED.get()
+    counts: dict[str, int] = {} if removed is None else removed
+
+    # Em pré-ordem invertida, os filhos de cada nó são processados antes do
+    # próprio nó.
+    for node in reversed(list(tree.descendants())):
+        _prune_children(node, counts)
+    if (new := _collapse(tree)) is not tree:
+        _count(counts, "branch", tree, new)
+        tree = Block([]) if new is None else new
+    if isinstance(tree, Program):
+        _remove_unused(tree, counts)
+    return tree
+
+
+@contextmanager
+def removals() -> Iterator[dict[str, int]]:
+    """
+    Acumula, no dicionário retornado, o número de nós removidos pela
+    eliminação de código morto dentro do bloco `with`.
+    """
+    removed: dict[str, int] = {}
+    token = _REMOVED.set(removed)
+    try:
+        yield removed
+    finally:
+        _REMOVED.reset(token)
+
+
+def terminates(stmt: Node) -> bool:
+    """
+    Verifica se o comando nunca termina normalmente (sempre retorna ou entra
+    em um laço infinito), de modo que os comandos seguintes são inalcançáveis.
+
+    Supõe que os filhos já foram processados por `eliminate_dead_code`.
+    """
+    if isinstance(stmt, Return):
+        return True
+    if isinstance(stmt, Block):
+        return bool(stmt.stmts) and terminates(stmt.stmts[-1])
+    if isinstance(stmt, If):
+        return terminates(stmt.then_branch) and terminates(stmt.else_branch)
+    if isinstance(stmt, While):
+        # Lox não tem `break`: só é possível sair do laço com `return`.
+        return _constant(stmt.condition) is True
+    return False
+
+
+def _constant(expr: Node) -> bool | None:
+    # Veracidade de uma condição literal, ou None se não for literal.
+    if not isinstance(expr, Literal):
+        return None
+    return expr.value is not False and expr.value is not None
+
+
+def _collapse(stmt: Node) -> Node | None:
+    # Substitui `if`/`while` com condição literal. None remove o comando.
+    if isinstance(stmt, If) and (truthy := _constant(stmt.condition)) is not None:
+        branch = stmt.then_branch if truthy else stmt.else_branch
+        return None if isinstance(branch, Block) and not branch.stmts else branch
+    if isinstance(stmt, While) and _constant(stmt.condition) is False:
+        return None
+    return stmt
+
+
+def _prune_children(node: Node, counts: dict[str, int]) -> None:
+    # Simplifica os comandos filhos do nó e descarta os comandos de cada
+    # lista que vêm depois de um comando que não termina.
+    for name, _ in field_table(type(node)).children:
+        value = getattr(node, name)
+        if isinstance(value, Node):
+            if (new := _collapse(value)) is not value:
+                _count(counts, "branch", value, new)
+                setattr(node, name, Block([]) if new is None else new)
+        elif isinstance(value, list):
+            stmts: list[Node] = []
+            for i, item in enumerate(value):
+                new = _collapse(item)
+                if new is not item:
+                    _count(counts, "branch", item, new)
+                if new is None:
+                    continue
+                stmts.append(new)
+                if terminates(new):
+                    for dead in value[i + 1:]:
+                        _count(counts, "unreachable", dead, None)
+                    break
+            if len(stmts) != len(value) or any(a is not b for a, b in zip(stmts, value)):
+                value[:] = stmts
+
+
+def _remove_unused(program: Program, counts: dict[str, int]) -> None:
+    # Uma função ou classe global é usada se o nome aparecer em um comando
+    # que não é uma declaração de função ou classe, ou em uma declaração
+    # usada.
+    uses = [_names_used(stmt) for stmt in program.stmts]
+    pending: list[str] = []
+    for stmt, names in zip(program.stmts, uses):
+        if not isinstance(stmt, (Function, Class)):
+            pending.extend(names)
+
+    live: set[str] = set()
+    while pending:
+        name = pending.pop()
+        if name in live:
+            continue
+        live.add(name)
+        for stmt, names in zip(program.stmts, uses):
+            if isinstance(stmt, (Function, Class)) and stmt.name == name:
+                pending.extend(names)
+
+    stmts = []
+    for stmt in program.stmts:
+        if isinstance(stmt, (Function, Class)) and stmt.name not in live:
+            _count(counts, "unused", stmt, None)
+        else:
+            stmts.append(stmt)
+    program.stmts[:] = stmts
+
+
+def _names_used(stmt: Node) -> set[str]:
+    # Nomes de variáveis lidos ou atribuídos no comando. Os parâmetros das
+    # funções são declarações e não contam como usos.
+    names: set[str] = set()
+    pending = [stmt]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, (Var, Assign)):
+            names.add(node.name)
+        if isinstance(node, Function):
+            pending.append(node.body)
+        else:
+            pending.extend(node.children())
+    return names
+
+
+def _count(counts: dict[str, int], reason: str, old: Node, new: Node | None) -> None:
+    size = sum(1 for _ in old.descendants())
+    if new is not None:
+        size -= sum(1 for _ in new.descendants())
+    counts[reason] = counts.get(reason, 0) + size
@@ -0,0 +1,112 @@
+"""
+Análise léxica em paralelo para códigos fonte muito grandes.
+
+O código fonte é dividido em trechos em quebras de linha "seguras", isto é,
+que não estão dentro de uma string ou de um comentário. Uma quebra de linha
+nessas condições sempre termina o token anterior, então cada trecho pode ser
+analisado de forma independente por `lox.scanner.scan` em um processo
+separado. Os tokens de cada trecho são deslocados para as posições corretas
+no código fonte e concatenados no mesmo `array('I')` de `Tokens`.
+
+O resultado é idêntico ao de `scan(src)` e, portanto, ao de `lox.lex`. Linhas
+e colunas são calculadas a partir das posições, como em `Tokens`.
+
+Uso:
+
+    >>> tokens = scan_parallel(src, workers=8)
+    >>> list(tokens.lark_tokens()) == list(lox.lex(src))
+    True
+"""
+
+import os
+import re
+from array import array
+
+from .scanner import Tokens, scan, scan_data
+
+# Tamanho mínimo de cada trecho, em caracteres. Trechos menores não compensam
+# o custo de enviar o texto para outro processo.
+MIN_CHUNK = 1 << 20
+
+# Strings (ou aspas sem fechamento, que o scanner trata como um caractere
+# inválido) e comentários. Quebras de linha dentro de strings não separam
+# tokens, e aspas dentro de comentários não iniciam strings. Todo `"` ou `//`
+# fora destes trechos é o início de um token, portanto percorrer apenas estes
+# casos reproduz o comportamento do scanner.
+OPAQUE_REGEX = re.compile(r'"[^"]*"|"|//[^\n]*')
+
+
+def split_points(src: str, parts: int) -> list[int]:
+    """
+    Retorna posições de quebras de linha seguras que dividem o código fonte
+    em até `parts` trechos de tamanhos parecidos.
+
+    As posições retornadas são crescentes e cada uma aponta para um "\\n"
+    fora de strings e comentários.
+    """
+    points: list[int] = []
+    size = len(src)
+    if parts <= 1:
+        return points
+
+    opaque = OPAQUE_REGEX.finditer(src)
+    block_start = block_end = -1  # trecho opaco atual
+    for k in range(1, parts):
+        pos = src.find("\n", max(k * size // parts, points[-1] + 1 if points else 0))
+        while pos != -1:
+            # Avança até o primeiro trecho opaco que termina após `pos`.
+            while block_end <= pos:
+                match = next(opaque, None)
+                if match is None:
+                    block_start = block_end = size + 1
+                    break
+                block_start, block_end = match.span()
+            if not (block_start <= pos < block_end):
+                break
+            pos = src.find("\n", block_end)
+        if pos == -1:
+            break
+        points.append(pos)
+    return points
+
+
+def scan_parallel(
+    src: str,
+    workers: int | None = None,
+    keep_comments: bool = False,
+    min_chunk: int = MIN_CHUNK,
+) -> Tokens:
+    """
+    Versão paralela de `lox.scanner.scan`.
+
+    Args:
+        src:
+            Código fonte.
+        workers:
+            Número de processos. O padrão é o número de CPUs.
+        keep_comments:
+            Veja `scan`.
+        min_chunk:
+            Tamanho mínimo de cada trecho. Códigos menores que dois trechos
+            são analisados no processo atual.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    parts = min(workers, len(src) // max(min_chunk, 1))
+    if parts <= 1:
+        return scan(src, keep_comments)
+
+    bounds = [0, *(pos + 1 for pos in split_points(src, parts)), len(src)]
+    jobs = [(src[a:b], keep_comments, a) for a, b in zip(bounds, bounds[1:])]
+
+    import multiprocessing
+
+    data = array("I")
+    with multiprocessing.Pool(min(workers, len(jobs))) as pool:
+        for part in pool.imap(_scan_chunk, jobs):
+            data.extend(part)
+    return Tokens(src, data)
+
+
+def _scan_chunk(job: tuple[str, bool, int]) -> array:
+    return scan_data(*job)
@@ -5,32 +5,193 @@ Define a gramática da Linguagem e funções para realizar a análise sintática
 análise léxica, etc.
 """
 
+import os
+from functools import lru_cache
 from pathlib import Path
-from typing import Iterator
-
-from lark import Lark, Token, Tree
+from typing import TYPE_CHECKING, Iterator
 
+from . import cache as ast_cache
 from .ast import Expr, Program
-from .transformer import LoxTransformer
+from .errors import SemanticError
+
+if TYPE_CHECKING:
+    from lark import Lark, Token, Tree
 
 DIR = Path(__file__).parent
 GRAMMAR_PATH = DIR / "grammar.lark"
 
+# Passes executados em toda árvore produzida pelo parser (veja `lox.passes`).
+PARSE_PASSES = ("validate", "desugar", "resolve")
+
+
+def lark_cache(name: str) -> str | bool:
+    """
+    Retorna o caminho do arquivo com as tabelas LALR pré-compiladas.
+
+    A construção do autômato LALR a partir da gramática é a parte mais cara da
+    inicialização do Lark. Com a opção `cache`, o Lark salva as tabelas
+    serializadas neste arquivo e as carrega nas próximas execuções. O arquivo
+    guarda um hash da gramática, das opções e da versão do Lark e é
+    reconstruído automaticamente quando algum deles muda.
+
+    Retorna False se o cache estiver desabilitado ou se a pasta de cache não
+    puder ser escrita ou não for privada (veja `lox.cache.is_private`), pois
+    o Lark também carrega as tabelas com o `pickle`.
+    """
+    if not ast_cache.is_enabled():
+        return False
+    directory = ast_cache.cache_dir()
+    try:
+        directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+    except OSError:
+        return False
+    if not os.access(directory, os.W_OK) or not ast_cache.is_private(directory):
+        return False
+    return str(directory / f"{name}.lark")
+
+
+def default_lexer() -> str:
+    """
+    Lexer usado pelo parser: "lark" (padrão) ou "scanner".
+
+    O valor pode ser escolhido com a variável de ambiente LOX_LEXER. O
+    "scanner" é o analisador léxico escrito à mão do módulo `lox.scanner`.
+    """
+    lexer = os.environ.get("LOX_LEXER") or "lark"
+    if lexer not in LEXERS:
+        raise ValueError(f"LOX_LEXER inválido: {lexer!r} (use {' ou '.join(LEXERS)})")
+    return lexer
+
+
+LEXERS = ("lark", "scanner")
+
+
+def default_backend() -> str:
+    """
+    Parser usado por `parse` e `parse_expr`: "lark" (padrão) ou "pratt".
+
+    O valor pode ser escolhido com a variável de ambiente LOX_PARSER. O
+    "pratt" é o parser descendente recursivo do módulo `lox.pratt`, que
+    constrói a AST diretamente, sem passar pelo Lark.
+    """
+    backend = os.environ.get("LOX_PARSER") or "lark"
+    if backend not in BACKENDS:
+        raise ValueError(
+            f"LOX_PARSER inválido: {backend!r} (use {' ou '.join(BACKENDS)})"
+        )
+    return backend
+
+
+BACKENDS = ("lark", "pratt")
+
+
+# Os parsers são construídos somente quando forem usados pela primeira vez.
+# Isso evita importar o Lark (e carregar as tabelas LALR) em um simples
+# `import lox` e evita construir o parser da CST, que só é usado para depuração.
+@lru_cache(maxsize=len(LEXERS))
+def get_ast_parser(lexer: str = "lark") -> "Lark":
+    """
+    Parser que produz diretamente a AST, usando o LoxTransformer.
+
+    Args:
+        lexer:
+            "lark" usa o lexer contextual do Lark e "scanner" usa o
+            analisador léxico de `lox.scanner`.
+    """
+    from lark import Lark
+
+    from .transformer import LoxTransformer
+
+    if lexer == "scanner":
+        from .scanner import lark_scanner_class
+
+        return Lark(
+            GRAMMAR_PATH.open(),
+            transformer=LoxTransformer(),
+            parser="lalr",
+            lexer=lark_scanner_class(),
+            start=["start", "expr", "repl"],
+            cache=lark_cache("ast-parser-scanner"),
+        )
+    return Lark(
+        GRAMMAR_PATH.open(),
+        transformer=LoxTransformer(),
+        parser="lalr",
+        start=["start", "expr", "repl"],
+        cache=lark_cache("ast-parser"),
+    )
+
+
+@lru_cache(maxsize=1)
+def get_cst_parser() -> "Lark":
+    """
+    Parser que produz a árvore do Lark, sem transformações.
+    """
+    from lark import Lark
+
+    return Lark(
+        GRAMMAR_PATH.open(),
+        parser="lalr",
+        start=["start", "expr"],
+        cache=lark_cache("cst-parser"),
+    )
+
 
-ast_parser = Lark(
-    GRAMMAR_PATH.open(),
-    transformer=LoxTransformer(),
-    parser="lalr",
-    start=["start", "expr"],
-)
-cst_parser = Lark(
-    GRAMMAR_PATH.open(),
-    parser="lalr",
-    start=["start", "expr"],
-)
+def __getattr__(name: str):
+    # Mantém compatibilidade com os antigos atributos `ast_parser` e
+    # `cst_parser` deste módulo.
+    if name == "ast_parser":
+        return get_ast_parser()
+    if name == "cst_parser":
+        return get_cst_parser()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
-def parse(src: str) -> Program:
+def lark_parse(src: str, start: str):
+    """
+    Executa o parser do Lark com o lexer escolhido por `default_lexer()`.
+    """
+    from lark.exceptions import UnexpectedToken
+
+    lexer = default_lexer()
+    parser = get_ast_parser(lexer)
+    try:
+        return parser.parse(src, start=start)
+    except UnexpectedToken as e:
+        # Com o parser interativo, str(e) tenta calcular os tokens aceitos
+        # alimentando o parser (e o LoxTransformer) com tokens vazios, o que
+        # falha em `LoxTransformer.NUMBER`. A mensagem usa `e.expected`.
+        e.interactive_parser = None
+        # Preenche o token anterior, como faz o lexer contextual do Lark.
+        if lexer == "scanner" and e.token_history is None:
+            from .scanner import previous_token
+
+            if (previous := previous_token(src, e.token)) is not None:
+                e.token_history = [previous]
+        raise
+    finally:
+        # Descarta os literais compartilhados desta análise (veja
+        # `LoxTransformer`).
+        parser.options.transformer.reset()
+
+
+def run_parser(src: str, start: str, backend: str | None = None):
+    """
+    Executa o parser escolhido e retorna a AST, antes da análise semântica.
+    """
+    backend = backend or default_backend()
+    if backend == "pratt":
+        from .pratt import pratt_parse
+
+        return pratt_parse(src, start)
+    if backend != "lark":
+        raise ValueError(f"parser inválido: {backend!r} (use {' ou '.join(BACKENDS)})")
+    return lark_parse(src, start)
+
+
+def parse(
+    src: str, cache: bool | None = None, backend: str | None = None
+) -> Program:
     """
     Função que recebe um código fonte e retorna a árvore sintática.
 
@@ -41,15 +202,23 @@ def parse(src: str) -> Program:
     Args:
         src (str):
             Código fonte a ser analisado.
+        cache (bool):
+            Se True, reutiliza a árvore salva no cache em disco (veja o
+            módulo `lox.cache`). O padrão é usar o cache, a não ser que a
+            variável de ambiente LOX_NO_CACHE esteja definida.
+        backend (str):
+            "lark" usa o parser LALR do Lark e "pratt" usa o parser
+            descendente recursivo de `lox.pratt`. Os dois produzem a mesma
+            árvore e os mesmos erros. Se omitido, usa `default_backend()`.
     """
-    tree = ast_parser.parse(src, start="start")
+    tree = parse_start(src, "start", cache, backend)
     assert isinstance(tree, Program), f"Esperava um Program, mas recebi {type(tree)}"
-    tree.validate_tree()
-    tree.desugar_tree()
     return tree
 
 
-def parse_expr(src: str) -> Expr:
+def parse_expr(
+    src: str, cache: bool | None = None, backend: str | None = None
+) -> Expr:
     """
     Função que recebe um código fonte e retorna a árvore sintática
     representando uma expressão.
@@ -62,6 +231,11 @@ def parse_expr(src: str) -> Expr:
     Args:
         src (str):
             Código fonte a ser analisado.
+        cache (bool):
+            Se True, reutiliza a árvore salva no cache em disco. Veja a
+            função `parse`.
+        backend (str):
+            Parser utilizado. Veja a função `parse`.
 
     Examples:
         >>> parse_expr("1 + 2")
@@ -70,14 +244,73 @@ def parse_expr(src: str) -> Expr:
         >>> parse_expr("1 + 2 * 3").eval(Ctx())
         7
     """
-    tree = ast_parser.parse(src, start="expr")
+    tree = parse_start(src, "expr", cache, backend)
     assert isinstance(tree, Expr), f"Esperava um Expr, mas recebi {type(tree)}"
-    tree.validate_tree()
-    tree.desugar_tree()
     return tree
 
 
-def parse_cst(src: str, expr: bool = False) -> Tree:
+def parse_any(
+    src: str, cache: bool | None = None, backend: str | None = None
+) -> Program | Expr:
+    """
+    Analisa o código como uma expressão isolada ou como um programa.
+
+    Útil no REPL, onde o usuário pode digitar tanto `1 + 2` quanto
+    `print 1 + 2;`. A decisão é feita pelo próprio parser, em uma única
+    passada (regra `repl` da gramática), em vez de tentar `parse_expr` e, em
+    caso de erro, analisar o código novamente com `parse`. Como nenhum
+    programa válido é também uma expressão válida, o resultado para
+    programas é idêntico ao de `parse`.
+
+    Args:
+        src (str):
+            Código fonte a ser analisado.
+        cache (bool):
+            Veja a função `parse`.
+        backend (str):
+            Veja a função `parse`.
+
+    Examples:
+        >>> parse_any("1 + 2")
+        BinOp(left=Literal(value=1), right=Literal(value=2), op=op.add)
+        >>> parse_any("print 1;")
+        Program(stmts=[Print(expr=Literal(value=1))])
+    """
+    return parse_start(src, "repl", cache, backend)
+
+
+def parse_start(
+    src: str, start: str, cache: bool | None = None, backend: str | None = None
+) -> Program | Expr:
+    """
+    Analisa o código a partir da regra `start` da gramática ("start", "expr"
+    ou "repl"), valida a árvore e remove o açúcar sintático.
+    """
+    from . import passes, positions
+
+    if cache is None:
+        cache = ast_cache.is_enabled()
+    if cache and (tree := ast_cache.load(src, start)) is not None:
+        positions.register(tree, src, start)
+        passes.mark(tree, *PARSE_PASSES)
+        return tree  # type: ignore[return-value]
+
+    tree = run_parser(src, start, backend)
+    source_map = positions.register(tree, src, start)
+    try:
+        # Validação, remoção de açúcar sintático e resolução das variáveis.
+        tree = passes.run_passes(tree, PARSE_PASSES)
+    except SemanticError as e:
+        if e.node is not None:
+            e.location = source_map.location(e.node)
+        raise
+
+    if cache:
+        ast_cache.store(src, tree, start)
+    return tree
+
+
+def parse_cst(src: str, expr: bool = False) -> "Tree":
     """
     Similar a função `parse`, mas retorna a árvore sintática produzida pelo
     Lark.
@@ -92,11 +325,32 @@ def parse_cst(src: str, expr: bool = False) -> Tree:
             Se True, analisa o código como se fosse apenas uma expressão.
     """
     start = "expr" if expr else "start"
-    return cst_parser.parse(src, start=start)
+    return get_cst_parser().parse(src, start=start)
 
 
-def lex(src: str) -> Iterator[Token]:
+def lex(
+    src: str, lexer: str | None = None, workers: int | None = None
+) -> Iterator["Token"]:
     """
     Retorna um iterador sobre os tokens do código fonte.
+
+    Args:
+        src (str):
+            Código fonte a ser analisado.
+        lexer (str):
+            "lark" ou "scanner". Se omitido, usa o valor de `default_lexer()`.
+            Os dois produzem exatamente os mesmos tokens.
+        workers (int):
+            Se maior que 1, divide códigos grandes em trechos analisados em
+            paralelo pelo scanner (veja `lox.parallel_scan`), com o mesmo
+            resultado.
     """
-    return ast_parser.lex(src)
+    if workers is not None and workers > 1:
+        from .parallel_scan import scan_parallel
+
+        return scan_parallel(src, workers).lark_tokens()
+    if (lexer or default_lexer()) == "scanner":
+        from .scanner import scan
+
+        return scan(src).lark_tokens()
+    return get_ast_parser().lex(src)
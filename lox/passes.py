@@ -0,0 +1,364 @@
+"""
+Gerenciador de passes sobre a árvore sintática.
+
+Um passe é uma etapa de análise ou transformação da AST, como a validação
+semântica (`Node.validate_self`) ou a remoção de açúcar sintático
+(`Node.desugar_self`). O `PassManager` executa os passes na ordem em que
+foram registrados. Passes consecutivos que atuam nó a nó e que declaram
+`fusable=True` são executados em um único percurso: os passes em pré-ordem
+rodam quando o nó é encontrado, antes dos filhos, e os passes em pós-ordem
+(`post=True`) depois que toda a subárvore do nó foi visitada. Os demais
+passes têm um percurso próprio, de modo que cada passe vê a árvore inteira
+já processada pelos passes anteriores.
+
+A validação (pré-ordem) e a remoção de açúcar sintático (pós-ordem) são
+executadas no mesmo percurso. A validação de um nó acontece antes da remoção
+de açúcar do próprio nó, dos seus ancestrais e dos seus descendentes, mas
+depois da remoção de açúcar dos irmãos anteriores. Por isso `desugar_self`
+deve modificar apenas o próprio nó e `validate_self` deve consultar apenas
+os ancestrais do nó.
+
+Depois de executar um passe, a raiz da árvore é marcada e novas chamadas para
+o mesmo passe não fazem nada. É assim que `lox.eval` evita validar novamente
+uma árvore produzida por `lox.parse`. As marcas ficam em uma tabela separada,
+indexada pela raiz, e são descartadas junto com a árvore. Se a árvore for
+modificada, use `invalidate(tree)` ou `force=True`.
+
+Uso:
+
+    >>> run_passes(tree, ["validate", "desugar"])
+    >>> is_marked(tree, "validate")
+    True
+    >>> with timed() as timings:
+    ...     tree = lox.parse(src)
+    >>> timings
+    {'validate': 0.0012, 'desugar': 0.0003}
+"""
+
+import time
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator
+
+from .errors import SemanticError
+from .node import Cursor, Node
+
+# Passes executados sobre cada árvore, indexados por id(raiz).
+_MARKS: dict[int, set[str]] = {}
+
+# Dicionário que acumula os tempos dos passes, ativado por `timed()`.
+_TIMINGS: ContextVar[dict[str, float] | None] = ContextVar("lox_pass_timings", default=None)
+
+
+@dataclass(frozen=True)
+class Pass:
+    """
+    Descrição de um passe.
+
+    Attributes:
+        name:
+            Nome do passe.
+        visit:
+            Função executada em cada nó recebendo um cursor para o nó, em
+            pré-ordem (ou em pós-ordem, se `post` for True).
+        run:
+            Função que recebe a árvore inteira e retorna a nova raiz (ou None
+            para manter a raiz atual). Usada por passes que não podem ser
+            executados nó a nó. Exatamente um entre `visit` e `run` deve ser
+            fornecido.
+        requires:
+            Passes que devem ser executados antes deste.
+        post:
+            Se True, `visit` é executada depois de visitar todos os filhos do
+            nó.
+        fusable:
+            Se True, o passe (com `visit`) pode compartilhar o percurso com
+            outros passes `fusable` registrados logo antes ou logo depois
+            dele. Só é seguro para passes em pré-ordem que não modificam a
+            árvore e para passes em pós-ordem que modificam apenas o próprio
+            nó. Um passe em pré-ordem nunca é fundido com um passe em
+            pós-ordem registrado antes dele.
+    """
+
+    name: str
+    visit: Callable[[Cursor[Node]], None] | None = None
+    run: Callable[[Node], Node | None] | None = None
+    requires: tuple[str, ...] = ()
+    post: bool = False
+    fusable: bool = False
+
+    def __post_init__(self):
+        if (self.visit is None) == (self.run is None):
+            raise ValueError(f"passe {self.name!r}: forneça visit ou run")
+
+
+class PassManager:
+    """
+    Registro de passes que executa os passes pedidos na ordem de registro.
+    """
+
+    def __init__(self, passes: Iterable[Pass] = ()):
+        self.passes: dict[str, Pass] = {}
+        for item in passes:
+            self.register(item)
+
+    def register(self, item: Pass) -> Pass:
+        """
+        Registra um passe. Passes são executados na ordem de registro.
+        """
+        for name in item.requires:
+            if name not in self.passes:
+                raise ValueError(f"passe {item.name!r} requer {name!r}, que não foi registrado")
+        self.passes[item.name] = item
+        return item
+
+    def schedule(self, names: Iterable[str]) -> list[Pass]:
+        """
+        Retorna os passes pedidos e as suas dependências, na ordem de
+        execução.
+        """
+        wanted: set[str] = set()
+        pending = list(names)
+        while pending:
+            name = pending.pop()
+            if name in wanted:
+                continue
+            if name not in self.passes:
+                raise ValueError(f"passe desconhecido: {name!r}")
+            wanted.add(name)
+            pending.extend(self.passes[name].requires)
+        return [item for name, item in self.passes.items() if name in wanted]
+
+    def run(
+        self,
+        tree: Node,
+        names: Iterable[str] | None = None,
+        *,
+        force: bool = False,
+        timings: dict[str, float] | None = None,
+    ) -> Node:
+        """
+        Executa os passes na árvore e retorna a raiz resultante.
+
+        Args:
+            tree:
+                Raiz da árvore.
+            names:
+                Passes a executar (e as suas dependências). Se omitido,
+                executa todos os passes registrados.
+            force:
+                Executa os passes mesmo se a árvore já estiver marcada.
+            timings:
+                Dicionário onde os tempos de cada passe (em segundos) são
+                acumulados. Se omitido, usa o dicionário de `timed()`, se
+                houver.
+        """
+        schedule = self.schedule(self.passes if names is None else names)
+        if not force:
+            schedule = [item for item in schedule if not is_marked(tree, item.name)]
+        if timings is None:
+            timings = _TIMINGS.get()
+
+        group: list[Pass] = []
+        for item in [*schedule, None]:
+            if item is not None and item.visit is not None:
+                if not group or _fuses(group[-1], item):
+                    group.append(item)
+                    continue
+            if group:
+                _visit(tree, group, timings)
+                mark(tree, *(p.name for p in group))
+                group = []
+            if item is not None and item.visit is not None:
+                group.append(item)
+            elif item is not None and item.run is not None:
+                start = time.perf_counter()
+                root = item.run(tree) or tree
+                if timings is not None:
+                    _add(timings, item.name, time.perf_counter() - start)
+                # Uma nova raiz herda as marcas da anterior.
+                mark(root, *_MARKS.get(id(tree), ()), item.name)
+                tree = root
+        return tree
+
+
+def _fuses(last: Pass, item: Pass) -> bool:
+    # Em um percurso, os passes em pós-ordem rodam depois dos passes em
+    # pré-ordem. Um passe em pré-ordem registrado depois de um passe em
+    # pós-ordem precisa de um novo percurso para respeitar a ordem.
+    return last.fusable and item.fusable and (item.post or not last.post)
+
+
+def _visit(tree: Node, group: list[Pass], timings: dict[str, float] | None) -> None:
+    # Percurso com uma pilha explícita. Os passes em pré-ordem do grupo são
+    # executados quando o nó sai da pilha e os passes em pós-ordem quando ele
+    # sai da pilha pela segunda vez, depois de todos os filhos.
+    visits = [item.visit for item in group]
+    clock = time.perf_counter
+    spent = [0.0] * len(visits)
+    if timings is not None:
+        visits = [_timer(visit, spent, i, clock) for i, visit in enumerate(visits)]
+    pre = [visit for item, visit in zip(group, visits) if not item.post]
+    post = [visit for item, visit in zip(group, visits) if item.post]
+
+    walk_start = clock()
+    pending: list[tuple[Cursor[Node], bool]] = [(Cursor(tree), False)]
+    while pending:
+        cursor, done = pending.pop()
+        if done:
+            for visit in post:
+                visit(cursor)  # type: ignore[misc]
+            continue
+        for visit in pre:
+            visit(cursor)  # type: ignore[misc]
+        if post:
+            pending.append((cursor, True))
+        pending.extend([(child, False) for child in reversed(list(cursor.children()))])
+
+    if timings is not None:
+        for item, seconds in zip(group, spent):
+            _add(timings, item.name, seconds)
+        _add(timings, "walk", clock() - walk_start - sum(spent))
+
+
+def _timer(visit, spent: list[float], i: int, clock) -> Callable[[Cursor[Node]], None]:
+    # Acumula em spent[i] o tempo gasto por `visit`.
+    def timed_visit(cursor: Cursor[Node]) -> None:
+        start = clock()
+        visit(cursor)
+        spent[i] += clock() - start
+
+    return timed_visit
+
+
+def _add(timings: dict[str, float], name: str, seconds: float) -> None:
+    timings[name] = timings.get(name, 0.0) + seconds
+
+
+#
+# Marcas
+#
+def mark(tree: Node, *names: str) -> None:
+    """
+    Marca a árvore como processada pelos passes dados.
+    """
+    key = id(tree)
+    if key not in _MARKS:
+        _MARKS[key] = set()
+        weakref.finalize(tree, _MARKS.pop, key, None)
+    _MARKS[key].update(names)
+
+
+def is_marked(tree: Node, name: str) -> bool:
+    """
+    Verifica se o passe já foi executado na árvore.
+    """
+    return name in _MARKS.get(id(tree), ())
+
+
+def marks(tree: Node) -> frozenset[str]:
+    """
+    Passes já executados na árvore.
+    """
+    return frozenset(_MARKS.get(id(tree), ()))
+
+
+def invalidate(tree: Node) -> None:
+    """
+    Remove todas as marcas da árvore (ex.: após modificá-la).
+    """
+    if (marks := _MARKS.get(id(tree))) is not None:
+        marks.clear()
+
+
+@contextmanager
+def timed() -> Iterator[dict[str, float]]:
+    """
+    Acumula, no dicionário retornado, o tempo gasto em cada passe executado
+    dentro do bloco `with`. A chave "walk" contém o custo do percurso em si.
+    """
+    timings: dict[str, float] = {}
+    token = _TIMINGS.set(timings)
+    try:
+        yield timings
+    finally:
+        _TIMINGS.reset(token)
+
+
+#
+# Passes padrão
+#
+def validate(cursor: Cursor[Node]) -> None:
+    """
+    Análise semântica de um nó (veja `Node.validate_tree`).
+    """
+    node = cursor.node
+    try:
+        node.validate_self(cursor)
+    except SemanticError as e:
+        if e.node is None:
+            e.node = node
+        raise
+
+
+def desugar(cursor: Cursor[Node]) -> None:
+    """
+    Remoção de açúcar sintático de um nó (veja `Node.desugar_tree`).
+    """
+    cursor.node.desugar_self()
+
+
+def resolve(tree: Node) -> None:
+    """
+    Endereçamento estático das variáveis (veja `lox.resolver`).
+    """
+    from .resolver import resolve
+
+    resolve(tree)
+
+
+def fold(tree: Node) -> Node:
+    """
+    Dobra de constantes (veja `lox.optimizer`).
+    """
+    from .optimizer import fold
+
+    return fold(tree)
+
+
+def dce(tree: Node) -> Node:
+    """
+    Eliminação de código morto (veja `lox.optimizer`).
+    """
+    from .optimizer import eliminate_dead_code
+
+    return eliminate_dead_code(tree)
+
+
+VALIDATE = Pass("validate", visit=validate, fusable=True)
+DESUGAR = Pass("desugar", visit=desugar, post=True, fusable=True)
+FOLD = Pass("fold", run=fold, requires=("desugar",))
+DCE = Pass("dce", run=dce, requires=("fold",))
+RESOLVE = Pass("resolve", run=resolve, requires=("desugar",))
+
+#: Passes disponíveis. `lox.parse` e `lox.eval` executam apenas "validate",
+#: "desugar" e "resolve"; os demais são otimizações opcionais.
+default_manager = PassManager([VALIDATE, DESUGAR, FOLD, DCE, RESOLVE])
+
+#: Otimizações executadas pela opção -O da linha de comando.
+OPTIMIZATION_PASSES = ("fold", "dce")
+
+
+def run_passes(
+    tree: Node,
+    names: Iterable[str] | None = None,
+    *,
+    force: bool = False,
+    timings: dict[str, float] | None = None,
+) -> Node:
+    """
+    Executa os passes de `default_manager`. Veja `PassManager.run`.
+    """
+    return default_manager.run(tree, names, force=force, timings=timings)
@@ -0,0 +1,353 @@
+"""
+Tabela compacta com a posição de cada nó da AST no código fonte.
+
+Os nós de `lox.ast` não guardam linha e coluna. A opção `propagate_positions`
+do Lark resolveria o problema, mas criaria um objeto de metadados para cada
+nó. Aqui as posições ficam em uma tabela separada, associada à raiz da
+árvore:
+
+    * `offsets`: um `array('I')` com a posição (em caracteres) do início de
+      cada nó, na ordem de `Node.descendants()`. O índice de um nó nessa
+      ordem é o seu identificador.
+    * `line_starts`: um `array('I')` com a posição do início de cada linha,
+      usado para converter posições em linha e coluna com busca binária.
+
+São 4 bytes por nó e 4 bytes por linha do código fonte. A tabela só é
+construída quando alguém pede uma posição (em geral ao reportar um erro):
+até lá guardamos apenas uma referência ao código fonte. Para construí-la,
+analisamos o código novamente com a mesma gramática (`grammar.lark`) e o
+mesmo `LoxTransformer`, agora com as posições do Lark ativadas, anotando a
+posição dos nós criados, e percorremos as duas árvores em paralelo. Como as
+duas análises usam a mesma gramática, modificações em `grammar.lark` e no
+transformer valem também para as posições. A primeira consulta custa, então,
+cerca de uma análise completa do código fonte.
+
+Para encontrar o identificador de um nó, `SourceMap.index` constrói na
+primeira consulta um dicionário de id(nó) para o índice, que ocupa cerca de
+70 bytes por nó e fica guardado enquanto a árvore existir. Ele só é criado
+quando alguém procura um nó (ex.: `locate`), e `nbytes()` inclui o seu
+tamanho.
+
+Uso:
+
+    >>> tree = lox.parse(src)
+    >>> locate(tree.stmts[1])
+    Location(path='<string>', line=2, column=1)
+"""
+
+import sys
+import weakref
+from array import array
+from bisect import bisect_right
+from functools import lru_cache
+from types import TracebackType
+from typing import Any, Iterator, NamedTuple
+
+from .node import Node
+
+# Mapas de posições das árvores vivas, indexados por id(raiz).
+_SOURCE_MAPS: dict[int, "SourceMap"] = {}
+
+
+class Location(NamedTuple):
+    """
+    Posição no código fonte (linha e coluna começam em 1).
+    """
+
+    path: str
+    line: int
+    column: int
+
+    def __str__(self) -> str:
+        return f"{self.path}:{self.line}:{self.column}"
+
+
+class SourceMap:
+    """
+    Posições dos nós de uma árvore sintática.
+
+    Attributes:
+        path:
+            Nome do arquivo usado nas mensagens de erro.
+        line, column:
+            Posição do início do código fonte no arquivo, para árvores que
+            correspondem a apenas um trecho do arquivo.
+    """
+
+    __slots__ = ("root", "src", "start", "path", "line", "column", "_offsets", "_lines", "_ids")
+
+    def __init__(
+        self,
+        root: Node,
+        src: str,
+        start: str = "start",
+        path: str = "<string>",
+        line: int = 1,
+        column: int = 1,
+    ):
+        self.root = weakref.ref(root)
+        self.src: str | None = src
+        self.start = start
+        self.path = path
+        self.line = line
+        self.column = column
+        self._offsets: array | None = None
+        self._lines: array | None = None
+        self._ids: dict[int, int] | None = None
+
+    @property
+    def offsets(self) -> array:
+        """
+        Posição do início de cada nó, na ordem de `Node.descendants()`.
+        """
+        if self._offsets is None:
+            self._build()
+        return self._offsets  # type: ignore[return-value]
+
+    @property
+    def line_starts(self) -> array:
+        """
+        Posição do início de cada linha do código fonte.
+        """
+        if self._lines is None:
+            self._build()
+        return self._lines  # type: ignore[return-value]
+
+    def nbytes(self) -> int:
+        """
+        Memória usada pelas tabelas, em bytes, incluindo o índice criado por
+        `index()`, se ele já tiver sido construído.
+        """
+        size = sum(
+            len(table) * table.itemsize for table in (self.offsets, self.line_starts)
+        )
+        if (ids := self._ids) is not None:
+            size += sys.getsizeof(ids)
+            size += sum(sys.getsizeof(key) + sys.getsizeof(i) for key, i in ids.items())
+        return size
+
+    def index(self, node: Node) -> int | None:
+        """
+        Identificador do nó (sua posição em `root.descendants()`), ou None se
+        o nó não pertencer à árvore.
+
+        A primeira chamada percorre a árvore e guarda um dicionário com o
+        identificador de cada nó (veja `nbytes`).
+        """
+        if self._ids is None:
+            if (root := self.root()) is None:
+                return None
+            # Construído uma única vez. Um nó compartilhado (ex.: um literal)
+            # fica com a sua primeira ocorrência.
+            ids: dict[int, int] = {}
+            for i, other in enumerate(_preorder(root)):
+                ids.setdefault(id(other), i)
+            self._ids = ids
+        return self._ids.get(id(node))
+
+    def location(self, node_or_index: Node | int) -> Location | None:
+        """
+        Linha e coluna do início do nó (ou do nó com o identificador dado).
+        """
+        index = node_or_index
+        if isinstance(index, Node):
+            index = self.index(index)  # type: ignore[assignment]
+            if index is None:
+                return None
+        return self.offset_location(self.offsets[index])  # type: ignore[index]
+
+    def offset_location(self, offset: int) -> Location:
+        """
+        Converte uma posição no código fonte em linha e coluna.
+        """
+        lines = self.line_starts
+        line = bisect_right(lines, offset)
+        column = offset - lines[line - 1] + 1
+        if line == 1:
+            column += self.column - 1
+        return Location(self.path, line + self.line - 1, column)
+
+    def locations(self) -> Iterator[tuple[Node, Location]]:
+        """
+        Itera sobre todos os nós da árvore e suas posições.
+        """
+        if (root := self.root()) is None:
+            return
+        for node, offset in zip(_preorder(root), self.offsets):
+            yield node, self.offset_location(offset)
+
+    def _build(self) -> None:
+        src = self.src or ""
+        lines = array("I", [0])
+        pos = src.find("\n")
+        while pos != -1:
+            lines.append(pos + 1)
+            pos = src.find("\n", pos + 1)
+
+        offsets = array("I")
+        if (root := self.root()) is not None:
+            try:
+                twin, recorded = _record(src, self.start)
+            except Exception:
+                twin, recorded = None, {}
+            _fill(offsets, root, twin, recorded)
+
+        self._lines = lines
+        self._offsets = offsets
+        self.src = None  # Não precisamos mais do código fonte
+
+
+def register(root: Node, src: str, start: str = "start", **kwargs) -> SourceMap:
+    """
+    Associa o código fonte à árvore sintática produzida a partir dele.
+
+    O registro é removido automaticamente quando a árvore é destruída.
+    Aceita os mesmos argumentos nomeados de `SourceMap`.
+    """
+    key = id(root)
+    source_map = SourceMap(root, src, start, **kwargs)
+    if key not in _SOURCE_MAPS:
+        weakref.finalize(root, _SOURCE_MAPS.pop, key, None)
+    _SOURCE_MAPS[key] = source_map
+    return source_map
+
+
+def source_map(root: Node) -> SourceMap | None:
+    """
+    Retorna o mapa de posições da árvore, se existir.
+    """
+    return _SOURCE_MAPS.get(id(root))
+
+
+def locate(node: Node) -> Location | None:
+    """
+    Procura o nó em todas as árvores registradas e retorna sua posição.
+    """
+    for source_map in list(_SOURCE_MAPS.values()):
+        if (location := source_map.location(node)) is not None:
+            return location
+    return None
+
+
+def error_location(exc: BaseException) -> Location | None:
+    """
+    Posição do código Lox responsável pela exceção.
+
+    Para erros semânticos usamos o nó que falhou na validação. Para erros de
+    execução, o nó mais interno sendo avaliado no traceback cuja árvore ainda
+    está registrada. (Ex.: em `lox.stream`, a árvore de uma função declarada
+    em um bloco anterior já foi descartada, então reportamos a chamada.)
+    """
+    if (location := getattr(exc, "location", None)) is not None:
+        return location
+    if (node := getattr(exc, "node", None)) is not None:
+        return locate(node)
+    for node in reversed(evaluated_nodes(exc.__traceback__)):
+        if (location := locate(node)) is not None:
+            return location
+    return None
+
+
+def evaluated_nodes(tb: TracebackType | None) -> list[Node]:
+    """
+    Nós da AST sendo avaliados no traceback, do mais externo ao mais interno.
+    """
+    nodes = []
+    while tb is not None:
+        frame = tb.tb_frame
+        if frame.f_code.co_name == "eval":
+            if isinstance(node := frame.f_locals.get("self"), Node):
+                nodes.append(node)
+        tb = tb.tb_next
+    return nodes
+
+
+def _preorder(root: Node) -> Iterator[Node]:
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(reversed(list(node.children())))
+
+
+def _record(src: str, start: str) -> tuple[Node, dict[int, tuple[int, Any]]]:
+    cst = _positions_parser().parse(src, start=start)
+    transformer = _recording_transformer_class()()
+    tree = transformer.transform(cst)
+    return tree, transformer.recorded
+
+
+@lru_cache(maxsize=1)
+def _positions_parser() -> Any:
+    # Importamos o Lark somente quando for necessário, para não aumentar o
+    # tempo de `import lox`. O parser principal não calcula posições, pois
+    # isso criaria um objeto de metadados para cada nó de toda análise.
+    from lark import Lark
+
+    from .parser import GRAMMAR_PATH, lark_cache
+
+    return Lark(
+        GRAMMAR_PATH.open(),
+        parser="lalr",
+        propagate_positions=True,
+        start=["start", "expr", "repl"],
+        cache=lark_cache("positions-parser"),
+    )
+
+
+@lru_cache(maxsize=1)
+def _recording_transformer_class() -> type:
+    from .ast import Literal
+    from .transformer import LoxTransformer
+
+    class RecordingTransformer(LoxTransformer):
+        """
+        Transformer que anota a posição do primeiro token de cada nó criado.
+
+        Nós que não são retornados diretamente por um método do transformer
+        (ex.: o `while` criado a partir de um `for`) começam no mesmo lugar
+        que o nó pai e herdam a sua posição.
+        """
+
+        def __init__(self):
+            super().__init__()
+            self.recorded: dict[int, tuple[int, Any]] = {}
+
+        def literal(self, value):
+            # Cada ocorrência precisa do seu próprio nó para ter uma posição.
+            return Literal(value)
+
+        def _call_userfunc(self, tree, new_children=None):
+            node = super()._call_userfunc(tree, new_children)
+            if isinstance(node, Node) and not tree.meta.empty:
+                # Guardamos o próprio nó para que seu id não seja reutilizado.
+                self.recorded.setdefault(id(node), (tree.meta.start_pos, node))
+            return node
+
+        def _call_userfunc_token(self, token):
+            node = super()._call_userfunc_token(token)
+            if isinstance(node, Node):
+                self.recorded.setdefault(id(node), (token.start_pos, node))
+            return node
+
+    return RecordingTransformer
+
+
+def _fill(offsets: array, root: Node, twin: Node | None, recorded: dict) -> None:
+    # Percorre a árvore e a sua cópia produzida pelo parser em paralelo. Se as
+    # árvores divergirem (ex.: a árvore foi modificada após a análise), os nós
+    # herdam a posição do pai.
+    stack: list[tuple[Node, Node | None, int]] = [(root, twin, 0)]
+    while stack:
+        node, twin, offset = stack.pop()
+        children = list(node.children())
+        twins: list[Node | None] = [None] * len(children)
+        if twin is not None and type(twin) is type(node):
+            if (entry := recorded.get(id(twin))) is not None:
+                offset = entry[0]
+            twin_children = list(twin.children())
+            if len(twin_children) == len(children):
+                twins = twin_children  # type: ignore[assignment]
+        offsets.append(offset)
+        for child, child_twin in zip(reversed(children), reversed(twins)):
+            stack.append((child, child_twin, offset))
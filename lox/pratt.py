@@ -0,0 +1,612 @@
+"""
+Parser descendente recursivo (com precedência de operadores no estilo Pratt)
+alternativo ao parser LALR do Lark.
+
+O parser do Lark produz a AST em duas etapas: o algoritmo LALR reconhece as
+regras da gramática e, a cada redução, o `LoxTransformer` é chamado para
+construir o nó correspondente. Aqui os nós de `lox.ast` são construídos
+diretamente a partir dos tokens compactos de `lox.scanner`, sem árvores
+intermediárias nem despacho de callbacks.
+
+O parser reconhece exatamente a linguagem definida em `grammar.lark` e
+produz as mesmas árvores que o `LoxTransformer`. Os erros de sintaxe também
+são os mesmos: lançamos `lark.exceptions.UnexpectedToken` apontando para o
+mesmo token que o Lark apontaria. Para isso reproduzimos o comportamento do
+lexer contextual do Lark, que só considera os terminais aceitos no estado
+atual do parser:
+
+    * Palavras reservadas em posições que só aceitam identificadores são
+      tratadas como identificadores (ex.: `fun print() {}` ou `print and;`).
+    * "true", "false" e "nil" seguidos de letras formam um único identificador
+      nessas posições (ex.: `var nilable;`).
+    * "==" vira "=" após o nome de uma variável declarada e "!=" vira "!" no
+      início de uma expressão.
+
+O parser é escolhido com o argumento `backend="pratt"` das funções
+`lox.parse` e `lox.parse_expr` ou com a variável de ambiente LOX_PARSER.
+"""
+
+import re
+import sys
+from typing import TYPE_CHECKING, NoReturn
+
+from . import runtime as op
+from .ast import (
+    And,
+    Assign,
+    BinOp,
+    Block,
+    Call,
+    Class,
+    Expr,
+    ExprStmt,
+    Function,
+    Getattr,
+    If,
+    Literal,
+    Or,
+    Print,
+    Program,
+    Return,
+    Setattr,
+    Stmt,
+    UnaryOp,
+    Value,
+    Var,
+    VarDef,
+    While,
+    literal_pool,
+)
+from .scanner import (
+    BOOL,
+    COMMENT,
+    ERROR,
+    FIRST_KEYWORD,
+    FIRST_PUNCTUATION,
+    KEYWORDS,
+    N_KINDS,
+    NIL,
+    NUMBER,
+    PUNCTUATION,
+    SCANNER_REGEX,
+    STRING,
+    VAR,
+    WS,
+    scan,
+)
+
+if TYPE_CHECKING:
+    from lark import Token
+
+# Tipo especial para o fim do arquivo (os tipos do scanner começam em 1).
+END = 0
+
+
+def _keyword(word: str) -> int:
+    return FIRST_KEYWORD + KEYWORDS.index(word)
+
+
+def _punct(symbol: str) -> int:
+    return FIRST_PUNCTUATION + PUNCTUATION.index(symbol)
+
+
+K_CLASS = _keyword("class")
+K_ELSE = _keyword("else")
+K_FOR = _keyword("for")
+K_FUN = _keyword("fun")
+K_IF = _keyword("if")
+K_PRINT = _keyword("print")
+K_RETURN = _keyword("return")
+K_VAR = _keyword("var")
+K_WHILE = _keyword("while")
+K_AND = _keyword("and")
+K_OR = _keyword("or")
+
+EQUAL_EQUAL = _punct("==")
+BANG_EQUAL = _punct("!=")
+LPAR = _punct("(")
+RPAR = _punct(")")
+LBRACE = _punct("{")
+RBRACE = _punct("}")
+COMMA = _punct(",")
+DOT = _punct(".")
+SEMICOLON = _punct(";")
+MINUS = _punct("-")
+BANG = _punct("!")
+EQUAL = _punct("=")
+
+# Tokens que podem iniciar uma expressão (usados nas mensagens de erro).
+EXPR_START = (VAR, NUMBER, STRING, BOOL, NIL, LPAR, MINUS, BANG)
+
+# Palavras reservadas aceitas pelo lexer contextual do Lark logo após o fim de
+# uma declaração de variável e de um comando. As tabelas LALR juntam os
+# possíveis sucessores de todos os contextos, por isso "else" é aceito após
+# qualquer comando, e as declarações são aceitas após o `var` que inicia um
+# laço `for`. Nesses casos o token é uma palavra reservada e o erro de sintaxe
+# aponta para ela.
+DECL_FOLLOW = frozenset(
+    {K_CLASS, K_FUN, K_VAR, K_PRINT, K_IF, K_WHILE, K_FOR, K_RETURN}
+)
+STMT_FOLLOW = DECL_FOLLOW | {K_ELSE}
+
+# Precedência e função de cada operador binário. Segue a gramática: "and" e
+# "or" têm a mesma precedência e todos os operadores associam à esquerda.
+BINDING_POWER = [0] * N_KINDS
+BINARY_OPS: list = [None] * N_KINDS
+for _level, _ops in enumerate(
+    [
+        {"or": Or, "and": And},
+        {"==": op.eq, "!=": op.ne},
+        {">": op.gt, "<": op.lt, ">=": op.ge, "<=": op.le},
+        {"+": op.add, "-": op.sub},
+        {"*": op.mul, "/": op.truediv},
+    ],
+    start=1,
+):
+    for _symbol, _fn in _ops.items():
+        _kind = _keyword(_symbol) if _symbol.isalpha() else _punct(_symbol)
+        BINDING_POWER[_kind] = _level
+        BINARY_OPS[_kind] = _fn
+
+# Identificador, usado para reinterpretar palavras reservadas, "true", etc.
+IDENTIFIER_REGEX = re.compile(r"[a-zA-Z_]\w*")
+
+
+class Parser:
+    """
+    Parser descendente recursivo para a linguagem Lox.
+
+    Mantém o token atual nos atributos `kind`, `start` e `end` e consome os
+    tokens diretamente do array produzido por `lox.scanner.scan`.
+    """
+
+    __slots__ = (
+        "src",
+        "data",
+        "i",
+        "n",
+        "pending",
+        "literals",
+        "kind",
+        "start",
+        "end",
+        "prev_kind",
+        "prev_start",
+        "prev_end",
+        "follow_at",
+        "follow",
+    )
+
+    def __init__(self, src: str):
+        self.src = src
+        self.data = scan(src).data
+        self.i = 0
+        self.n = len(self.data)
+        self.pending: list[tuple[int, int, int]] = []
+        self.literals = literal_pool()
+        self.follow_at = -1
+        self.follow: frozenset[int] = frozenset()
+        self.kind = self.start = self.end = END
+        self.advance()
+        self.prev_kind = END
+
+    # Tokens ------------------------------------------------------------------
+    def advance(self) -> None:
+        """
+        Avança para o próximo token.
+        """
+        self.prev_kind = self.kind
+        self.prev_start = self.start
+        self.prev_end = self.end
+        if self.pending:
+            self.kind, self.start, self.end = self.pending.pop()
+        elif (i := self.i) < self.n:
+            data = self.data
+            self.kind = data[i]
+            self.start = data[i + 1]
+            self.end = data[i + 2]
+            self.i = i + 3
+        else:
+            self.kind = END
+            self.start = self.end = len(self.src)
+
+        # Como o Lark, só reclamamos de um caractere inválido quando o parser
+        # chega até ele.
+        if self.kind == ERROR:
+            from .scanner import default_names, raise_unexpected
+
+            raise_unexpected(self.src, self.start, default_names())
+
+    def relex(self, kind: int, end: int) -> None:
+        """
+        Substitui o token atual por um token do tipo `kind` que termina em
+        `end` e refaz a análise léxica dos tokens seguintes até voltar a
+        coincidir com os tokens do scanner.
+        """
+        self.kind = kind
+        self.end = end
+
+        src = self.src
+        data = self.data
+        i, n = self.i, self.n
+        pending = []
+        pos = end
+        while (m := SCANNER_REGEX.match(src, pos)) is not None:
+            if m.lastindex in (WS, COMMENT):
+                pos = m.end()
+                continue
+            while i < n and data[i + 1] < pos:
+                i += 3
+            if i < n and data[i + 1] == pos:
+                break
+            pending.append((m.lastindex, pos, m.end()))
+            pos = m.end()
+        else:
+            i = n
+        pending.reverse()
+        self.pending = pending  # type: ignore[assignment]
+        self.i = i
+
+    def as_name(self) -> None:
+        """
+        Reinterpreta o token atual como identificador, como faz o lexer
+        contextual do Lark nas posições que só aceitam um identificador.
+        """
+        kind = self.kind
+        if FIRST_KEYWORD <= kind < VAR:
+            self.kind = VAR
+        elif kind == BOOL or kind == NIL:
+            match = IDENTIFIER_REGEX.match(self.src, self.start)
+            self.relex(VAR, match.end())  # type: ignore[union-attr]
+
+    def expect(self, kind: int) -> None:
+        if self.kind != kind:
+            self.unexpected((kind,))
+        self.advance()
+
+    def end_statement(self, closing: int, follow: frozenset[int]) -> None:
+        """
+        Consome o token que encerra um comando e registra as palavras
+        reservadas aceitas pelo Lark no token seguinte.
+        """
+        self.expect(closing)
+        self.follow_at = self.start
+        self.follow = follow
+
+    def name(self) -> str:
+        """
+        Consome um identificador e retorna seu nome.
+        """
+        self.as_name()
+        if self.kind != VAR:
+            self.unexpected((VAR,))
+        name = sys.intern(self.src[self.start : self.end])
+        self.advance()
+        return name
+
+    def literal(self, value: Value) -> Literal:
+        """
+        Nó `Literal` compartilhado para o valor (veja `LoxTransformer`).
+        """
+        pool = self.literals[type(value)]
+        if (node := pool.get(value)) is None:
+            node = pool[value] = Literal(value)
+        return node
+
+    def unexpected(self, expected: tuple[int, ...] = ()) -> NoReturn:
+        """
+        Lança o mesmo erro que o parser do Lark lançaria no token atual.
+        """
+        from lark import Token
+        from lark.exceptions import UnexpectedToken
+
+        from .scanner import default_names, lark_token
+
+        names = default_names()
+        previous: "Token | None" = None
+        if self.prev_kind != END:
+            name = names[self.prev_kind] or "$END"
+            previous = lark_token(self.src, name, self.prev_start, self.prev_end)
+
+        if self.kind == END:
+            if previous is None:
+                token = Token("$END", "", 0, 1, 1)
+            else:
+                token = Token.new_borrow_pos("$END", "", previous)
+        else:
+            name = names[self.kind] or "$END"
+            token = lark_token(self.src, name, self.start, self.end)
+
+        raise UnexpectedToken(
+            token,
+            {names[kind] for kind in expected if names[kind] is not None},
+            token_history=None if previous is None else [previous],
+        )
+
+    # Declarações e comandos --------------------------------------------------
+    def program(self) -> Program:
+        stmts = []
+        while self.kind != END:
+            stmts.append(self.declaration())
+        return Program(stmts)
+
+    def repl(self) -> Program | Expr:
+        """
+        Expressão isolada ou programa (regra `repl` da gramática).
+        """
+        if self.kind == END or self.kind == LBRACE or self.kind in DECL_FOLLOW:
+            return self.program()
+        expr = self.expression()
+        if self.kind == END:
+            return expr
+        self.end_statement(SEMICOLON, STMT_FOLLOW)
+        stmts: list[Stmt] = [ExprStmt(expr)]
+        while self.kind != END:
+            stmts.append(self.declaration())
+        return Program(stmts)
+
+    def declaration(self) -> Stmt:
+        kind = self.kind
+        if kind == K_VAR:
+            return self.var_decl()
+        if kind == K_FUN:
+            return self.fun_decl()
+        if kind == K_CLASS:
+            return self.class_decl()
+        return self.statement()
+
+    def statement(self) -> Stmt:
+        kind = self.kind
+        if kind == K_PRINT:
+            self.advance()
+            expr = self.expression()
+            self.end_statement(SEMICOLON, STMT_FOLLOW)
+            return Print(expr)
+        if kind == LBRACE:
+            return self.block()
+        if kind == K_IF:
+            return self.if_cmd()
+        if kind == K_WHILE:
+            self.advance()
+            self.expect(LPAR)
+            condition = self.expression()
+            self.expect(RPAR)
+            return While(condition, self.statement())
+        if kind == K_FOR:
+            return self.for_cmd()
+        if kind == K_RETURN:
+            self.advance()
+            value = None
+            if self.kind != SEMICOLON:
+                value = self.expression()
+            self.end_statement(SEMICOLON, STMT_FOLLOW)
+            return Return(value)
+
+        expr = self.expression()
+        self.end_statement(SEMICOLON, STMT_FOLLOW)
+        return ExprStmt(expr)
+
+    def block(self) -> Block:
+        self.expect(LBRACE)
+        stmts = []
+        while self.kind != RBRACE:
+            stmts.append(self.declaration())
+        self.end_statement(RBRACE, STMT_FOLLOW)
+        return Block(stmts)
+
+    def if_cmd(self) -> If:
+        self.advance()
+        self.expect(LPAR)
+        condition = self.expression()
+        self.expect(RPAR)
+        then_branch = self.statement()
+        if self.kind == K_ELSE:
+            self.advance()
+            else_branch = self.statement()
+        else:
+            else_branch = Block([])
+        return If(condition, then_branch, else_branch)
+
+    def for_cmd(self) -> Stmt:
+        # Mesma tradução para while realizada por LoxTransformer.for_cmd.
+        self.advance()
+        self.expect(LPAR)
+        init: Stmt | Expr | None
+        if self.kind == K_VAR:
+            init = self.var_decl()
+        elif self.kind == SEMICOLON:
+            self.advance()
+            init = None
+        else:
+            init = self.expression()
+            self.expect(SEMICOLON)
+
+        condition: Expr = self.literal(True)
+        if self.kind != SEMICOLON:
+            condition = self.expression()
+        self.expect(SEMICOLON)
+
+        increment = None
+        if self.kind != RPAR:
+            increment = self.expression()
+        self.expect(RPAR)
+
+        body: list[Stmt] = [self.statement()]
+        if increment is not None:
+            body.append(ExprStmt(increment))
+        loop = While(condition, Block(body))
+        if init is not None:
+            return Block([init, loop])  # type: ignore[list-item]
+        return loop
+
+    def var_decl(self) -> VarDef:
+        self.advance()
+        name = self.name()
+        if self.kind == EQUAL_EQUAL:
+            self.relex(EQUAL, self.start + 1)
+        initializer: Expr = self.literal(None)
+        if self.kind == EQUAL:
+            self.advance()
+            initializer = self.expression()
+        self.end_statement(SEMICOLON, DECL_FOLLOW)
+        return VarDef(name, initializer)
+
+    def fun_decl(self) -> Function:
+        self.advance()
+        name = self.name()
+        self.expect(LPAR)
+        params = []
+        if self.kind != RPAR:
+            params.append(self.param())
+            while self.kind == COMMA:
+                self.advance()
+                params.append(self.param())
+        self.expect(RPAR)
+        if self.kind != LBRACE:
+            self.unexpected((LBRACE,))
+        return Function(name, params, self.block())
+
+    def param(self) -> Var:
+        return Var(self.name())
+
+    def class_decl(self) -> Class:
+        self.advance()
+        name = self.name()
+        self.expect(LBRACE)
+        self.expect(RBRACE)
+        return Class(name)
+
+    # Expressões --------------------------------------------------------------
+    def expression(self) -> Expr:
+        """
+        Expressão completa, incluindo atribuições.
+        """
+        expr = self.binary(0)
+        if self.kind != EQUAL:
+            return expr
+
+        # Somente `VAR = ...` e `atom.VAR = ...` são atribuições válidas. O
+        # alvo não pode estar entre parênteses, por isso verificamos se o
+        # último token consumido é o próprio identificador.
+        cls = type(expr)
+        if self.prev_kind != VAR or (cls is not Var and cls is not Getattr):
+            self.unexpected()
+        self.advance()
+        value = self.expression()
+        if cls is Var:
+            return Assign(expr.name, value)  # type: ignore[attr-defined]
+        return Setattr(expr.obj, expr.name, value)  # type: ignore[attr-defined]
+
+    def binary(self, min_power: int) -> Expr:
+        left = self.unary()
+        while True:
+            kind = self.kind
+            if kind == VAR:
+                kind = self.infix_keyword()
+            if (power := BINDING_POWER[kind]) <= min_power:
+                return left
+            self.advance()
+            right = self.binary(power)
+            if kind == K_OR or kind == K_AND:
+                left = BINARY_OPS[kind](left, right)
+            else:
+                left = BinOp(left, right, BINARY_OPS[kind])
+
+    def infix_keyword(self) -> int:
+        """
+        Após um operando, o Lark não aceita identificadores e reconhece "or" e
+        "and" mesmo quando colados a outras letras (ex.: `x orfalse`).
+        """
+        start = self.start
+        for word, kind in (("or", K_OR), ("and", K_AND)):
+            if self.src.startswith(word, start, self.end):
+                self.relex(kind, start + len(word))
+                return kind
+        return VAR
+
+    def unary(self) -> Expr:
+        kind = self.kind
+        if kind == BANG_EQUAL:
+            self.relex(BANG, self.start + 1)
+            kind = BANG
+        if kind == MINUS:
+            self.advance()
+            return UnaryOp(self.unary(), op.neg)
+        if kind == BANG:
+            self.advance()
+            return UnaryOp(self.unary(), op.not_)
+
+        expr = self.primary()
+        while True:
+            if self.kind == DOT:
+                self.advance()
+                expr = Getattr(expr, self.name())
+            elif self.kind == LPAR:
+                self.advance()
+                expr = Call(expr, self.arguments())
+            else:
+                return expr
+
+    def arguments(self) -> list[Expr]:
+        args: list[Expr] = []
+        if self.kind == RPAR:
+            self.advance()
+            return args
+        args.append(self.expression())
+        while self.kind == COMMA:
+            self.advance()
+            args.append(self.expression())
+        self.expect(RPAR)
+        return args
+
+    def primary(self) -> Expr:
+        kind = self.kind
+        if FIRST_KEYWORD <= kind < VAR:
+            if self.start == self.follow_at and kind in self.follow:
+                self.unexpected(EXPR_START)
+            kind = self.kind = VAR
+
+        if kind == VAR:
+            expr: Expr = Var(sys.intern(self.src[self.start : self.end]))
+        elif kind == NUMBER:
+            expr = self.literal(float(self.src[self.start : self.end]))
+        elif kind == STRING:
+            expr = self.literal(self.src[self.start + 1 : self.end - 1])
+        elif kind == BOOL:
+            expr = self.literal(self.src[self.start : self.end] == "true")
+        elif kind == NIL:
+            expr = self.literal(None)
+        elif kind == LPAR:
+            self.advance()
+            expr = self.expression()
+            self.expect(RPAR)
+            return expr
+        else:
+            self.unexpected(EXPR_START)
+        self.advance()
+        return expr
+
+
+def pratt_parse(src: str, start: str = "start") -> Program | Expr:
+    """
+    Analisa o código fonte e retorna a AST, sem validação semântica.
+
+    Args:
+        src:
+            Código fonte.
+        start:
+            "start" para analisar um programa, "expr" para uma expressão ou
+            "repl" para qualquer um dos dois, como os pontos de entrada do
+            parser do Lark.
+    """
+    parser = Parser(src)
+    if start == "start":
+        return parser.program()
+    if start == "repl":
+        return parser.repl()
+    if start == "expr":
+        expr = parser.expression()
+        if parser.kind != END:
+            parser.unexpected()
+        return expr
+    raise ValueError(f"ponto de entrada inválido: {start!r}")
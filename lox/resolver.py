@@ -0,0 +1,128 @@
+"""
+Resolução estática de variáveis.
+
+Sem este passe, cada acesso a uma variável percorre a cadeia de escopos
+(`Ctx.parent`) consultando um dicionário em cada nível até encontrar o nome.
+Funções embutidas como `clock` ficam no último escopo e são as mais lentas de
+encontrar.
+
+O resolvedor calcula, para cada `Var` e `Assign`, o número de escopos entre
+o uso e a declaração (`depth`) e a posição da variável nesse escopo (`slot`).
+Blocos e chamadas de funções resolvidos guardam as variáveis em listas, de
+modo que o acesso em tempo de execução é só um índice. Os parâmetros e as
+variáveis declaradas no corpo de uma função ficam em um único escopo por
+chamada. Variáveis globais (declaradas fora de blocos ou fornecidas no
+ambiente) continuam sendo buscadas pelo nome, mas a partir do escopo raiz,
+sem consultar os escopos intermediários.
+
+A semântica é a mesma da busca pelo nome: um slot cuja variável ainda não
+foi declarada quando o código é executado (ex.: uma função que usa uma
+variável declarada depois dela no mesmo bloco) continua a busca pelo nome
+no escopo pai, como antes.
+
+O passe é registrado como "resolve" em `lox.passes` e executado por
+`lox.parse` depois da remoção de açúcar sintático.
+"""
+
+from typing import Any
+
+from .ast import Assign, Block, Class, Function, Stmt, Var, VarDef
+from .node import Node
+
+# Marca, na pilha de `resolve`, o fim de um escopo.
+_POP: Any = object()
+
+
+def resolve(tree: Node) -> None:
+    """
+    Calcula os endereços das variáveis da árvore (modifica os nós).
+
+    Árvores planas (`lox.flat`) são somente leitura e não são modificadas:
+    usam os endereços salvos junto com a árvore ou, se não houver, a busca
+    pelo nome.
+    """
+    from .flat import FlatNode
+
+    if isinstance(tree, FlatNode):
+        return
+    scopes: list[dict[str, int]] = []
+    addresses: dict[int, tuple[int, int]] = {}
+    pending: list[Any] = [tree]
+    while pending:
+        node = pending.pop()
+        if node is _POP:
+            scopes.pop()
+            continue
+
+        if isinstance(node, (Var, Assign)):
+            _set_address(node, *lookup(scopes, node.name), addresses)
+        elif isinstance(node, (VarDef, Class)):
+            node.slot = scopes[-1].get(node.name, -1) if scopes else -1
+        elif isinstance(node, Function):
+            # Os parâmetros são declarações, e não usos de variáveis: apenas o
+            # corpo é visitado, dentro do escopo criado a cada chamada. As
+            # declarações do corpo ficam no mesmo escopo dos parâmetros,
+            # exceto se algum nome coincidir com o de um parâmetro.
+            node.slot = scopes[-1].get(node.name, -1) if scopes else -1
+            params = {param.name: i for i, param in enumerate(node.params)}
+            body = declarations(node.body)
+            scopes.append(params)
+            pending.append(_POP)
+            if params.keys().isdisjoint(body):
+                offset = len(params)
+                params.update((name, offset + i) for name, i in body.items())
+                node.body.names = params
+                pending.extend(reversed(node.body.stmts))
+            else:
+                pending.append(node.body)
+            node.frame = params
+            continue
+        elif isinstance(node, Block):
+            node.names = declarations(node)
+            scopes.append(node.names)
+            pending.append(_POP)
+
+        pending.extend(reversed(list(node.children())))
+
+
+def lookup(scopes: list[dict[str, int]], name: str) -> tuple[int, int]:
+    """
+    Endereço (depth, slot) do nome, procurando do escopo mais interno para o
+    mais externo. Nomes que não foram declarados em nenhum escopo recebem
+    slot -1 e a distância até o escopo raiz.
+    """
+    for depth in range(len(scopes)):
+        scope = scopes[-1 - depth]
+        if name in scope:
+            return depth, scope[name]
+    return len(scopes), -1
+
+
+def declarations(block: Block) -> dict[str, int]:
+    """
+    Nomes declarados diretamente no escopo do bloco, com as suas posições.
+
+    Inclui declarações em comandos aninhados que não criam escopos (ex.: o
+    corpo de um `if` sem chaves), mas não as de blocos internos.
+    """
+    names: dict[str, int] = {}
+    pending: list[Node] = [block]
+    while pending:
+        stmt = pending.pop()
+        if isinstance(stmt, (VarDef, Function, Class)):
+            names.setdefault(stmt.name, len(names))
+        elif not isinstance(stmt, Block) or stmt is block:
+            pending.extend(reversed([child for child in stmt.children() if isinstance(child, Stmt)]))
+    return names
+
+
+def _set_address(node: Var | Assign, depth: int, slot: int, addresses: dict[int, tuple[int, int]]) -> None:
+    # Um mesmo nó pode aparecer em mais de um lugar da árvore. Se os
+    # endereços forem diferentes, o nó fica sem endereço e usa a busca pelo
+    # nome.
+    address = addresses.setdefault(id(node), (depth, slot))
+    if address != (depth, slot):
+        addresses[id(node)] = (-1, -1)
+        depth, slot = -1, -1
+    node.depth = depth
+    node.slot = slot
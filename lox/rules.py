@@ -0,0 +1,308 @@
+"""
+Avaliação em lote de expressões com subexpressões compartilhadas.
+
+`lox.parse_expr` pode ser usado como um motor de regras: milhares de
+expressões avaliadas no mesmo ambiente. É comum que as regras repitam
+subexpressões (`price * qty`, `a.b.c`) e, avaliando cada árvore
+separadamente, essas subexpressões são calculadas uma vez por regra.
+
+`compile_rules` identifica subárvores estruturalmente iguais em todas as
+regras (hash consing) e monta um grafo acíclico em que cada subexpressão
+pura aparece uma única vez. Subexpressões usadas mais de uma vez guardam o
+seu valor durante a avaliação de um ambiente, de modo que são calculadas no
+máximo uma vez por chamada a `RuleSet.eval`.
+
+São consideradas puras as expressões formadas apenas por literais,
+variáveis, operadores (inclusive `and`/`or`) e acesso a atributos. Chamadas
+e atribuições nunca são compartilhadas e, como podem modificar o ambiente,
+descartam os valores guardados depois de executadas.
+
+Uso:
+
+    >>> rules = compile_rules(["price * qty > 100", "price * qty * tax"])
+    >>> rules.eval({"price": 10.0, "qty": 20.0, "tax": 0.1})
+    [True, 20.0]
+"""
+
+from dataclasses import dataclass
+from typing import Any, Iterable, Sequence
+
+from .ast import And, BinOp, Expr, Getattr, Literal, Or, UnaryOp, Value, Var
+from .ctx import Ctx
+from .node import NODE, VALUE, Node, field_table
+
+# Classes de expressões sem efeitos colaterais.
+PURE = (BinOp, UnaryOp, And, Or, Var, Literal, Getattr)
+
+# Expressões baratas demais para valer a pena guardar o valor.
+TRIVIAL = (Var, Literal)
+
+_UNSET: Any = object()
+
+
+class _Ref(int):
+    # Referência a um nó canônico nos argumentos de `ExprTable`.
+    __slots__ = ()
+
+
+class ExprTable:
+    """
+    Tabela de expressões estruturalmente únicas (hash consing).
+
+    Cada subárvore recebe um identificador inteiro. Subárvores puras com a
+    mesma estrutura (mesma classe, mesmos valores e filhos iguais) recebem o
+    mesmo identificador. Literais são comparados também pelo tipo, de forma
+    que `true` e `1` não são confundidos.
+    """
+
+    def __init__(self):
+        self.keys: dict[tuple, int] = {}
+        self.classes: list[type] = []
+        self.args: list[list[Any]] = []
+        self.pure: list[bool] = []
+        self.uses: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self.classes)
+
+    def intern(self, expr: Node) -> int:
+        """
+        Adiciona a expressão à tabela e retorna o identificador da raiz.
+        """
+        ids: dict[int, int] = {}
+        pending: list[tuple[Node, bool]] = [(expr, False)]
+        while pending:
+            node, ready = pending.pop()
+            if id(node) in ids:
+                continue
+            if not ready:
+                pending.append((node, True))
+                pending.extend((child, False) for child in node.children())
+                continue
+            ids[id(node)] = self._add(node, ids)
+        return ids[id(expr)]
+
+    def _add(self, node: Node, ids: dict[int, int]) -> int:
+        cls = type(node)
+        args: list[Any] = []
+        pure = isinstance(node, PURE)
+        for name, kind in field_table(cls).fields:
+            value = getattr(node, name)
+            if kind is VALUE or not _has_nodes(value):
+                args.append(value)
+            elif kind is NODE or isinstance(value, Node):
+                args.append(_Ref(ids[id(value)]))
+            else:
+                args.append([_Ref(ids[id(item)]) if isinstance(item, Node) else item for item in value])
+
+        refs = [arg for arg in _flat_args(args) if isinstance(arg, _Ref)]
+        pure = pure and all(self.pure[ref] for ref in refs)
+        key = (cls, *map(_value_key, args)) if pure else None
+        if key is not None and (index := self.keys.get(key)) is not None:
+            return index
+
+        index = len(self.classes)
+        self.classes.append(cls)
+        self.args.append(args)
+        self.pure.append(pure)
+        self.uses.append(0)
+        for ref in refs:
+            self.uses[ref] += 1
+        if key is not None:
+            self.keys[key] = index
+        return index
+
+
+def structural_hash(expr: Node) -> int:
+    """
+    Hash que depende apenas da estrutura da expressão.
+
+    Expressões estruturalmente iguais têm o mesmo hash, mesmo que sejam
+    objetos diferentes. Diferente de `==`, literais de tipos diferentes
+    (`true` e `1`) são distintos.
+    """
+    hashes: dict[int, int] = {}
+    pending: list[tuple[Node, bool]] = [(expr, False)]
+    while pending:
+        node, ready = pending.pop()
+        if id(node) in hashes:
+            continue
+        if not ready:
+            pending.append((node, True))
+            pending.extend((child, False) for child in node.children())
+            continue
+        parts: list[Any] = [type(node).__qualname__]
+        for name, _ in field_table(type(node)).fields:
+            value = getattr(node, name)
+            if isinstance(value, Node):
+                parts.append(hashes[id(value)])
+            elif isinstance(value, (list, tuple)):
+                parts.append(tuple(hashes[id(v)] if isinstance(v, Node) else _value_key(v) for v in value))
+            else:
+                parts.append(_value_key(value))
+        hashes[id(node)] = hash(tuple(parts))
+    return hashes[id(expr)]
+
+
+@dataclass(slots=True)
+class _Memo:
+    # Valores das subexpressões compartilhadas no ambiente atual.
+    values: list[Any]
+
+    def clear(self) -> None:
+        self.values[:] = [_UNSET] * len(self.values)
+
+
+@dataclass(slots=True)
+class Shared(Expr):
+    """
+    Subexpressão pura usada por mais de uma regra (ou mais de uma vez na
+    mesma regra). O valor é calculado uma única vez por ambiente.
+    """
+
+    expr: Expr
+    slot: int
+    memo: _Memo
+
+    def eval(self, ctx: Ctx):
+        values = self.memo.values
+        value = values[self.slot]
+        if value is _UNSET:
+            value = values[self.slot] = self.expr.eval(ctx)
+        return value
+
+
+@dataclass(slots=True)
+class Barrier(Expr):
+    """
+    Expressão com possíveis efeitos colaterais (chamadas e atribuições).
+    Descarta os valores compartilhados depois de avaliada.
+    """
+
+    expr: Expr
+    memo: _Memo
+
+    def eval(self, ctx: Ctx):
+        try:
+            return self.expr.eval(ctx)
+        finally:
+            self.memo.clear()
+
+
+class RuleSet:
+    """
+    Conjunto de expressões compiladas por `compile_rules`.
+
+    Attributes:
+        rules:
+            Expressões compiladas, na ordem recebida. Compartilham os nós
+            das subexpressões em comum.
+        source_nodes:
+            Número de nós nas árvores originais.
+        nodes:
+            Número de nós distintos após a fusão das subexpressões.
+        shared:
+            Número de subexpressões cujo valor é guardado durante a
+            avaliação.
+
+    A avaliação não é reentrante: uma instância não deve ser avaliada por
+    várias threads ao mesmo tempo.
+    """
+
+    def __init__(self, rules: list[Expr], source_nodes: int, nodes: int, memo: _Memo):
+        self.rules = rules
+        self.source_nodes = source_nodes
+        self.nodes = nodes
+        self._memo = memo
+
+    @property
+    def shared(self) -> int:
+        return len(self._memo.values)
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def eval(self, env: Ctx | dict[str, Value] | None = None) -> list[Value]:
+        """
+        Avalia todas as regras no ambiente e retorna os resultados.
+        """
+        if env is None:
+            env = Ctx.from_dict({})
+        elif not isinstance(env, Ctx):
+            env = Ctx.from_dict(env)
+        self._memo.clear()
+        try:
+            return [rule.eval(env) for rule in self.rules]
+        finally:
+            self._memo.clear()
+
+
+def compile_rules(rules: Iterable[str | Expr]) -> RuleSet:
+    """
+    Compila uma lista de expressões (código fonte ou árvores produzidas por
+    `lox.parse_expr`) em um `RuleSet`.
+    """
+    from .parser import parse_expr
+
+    table = ExprTable()
+    roots: list[int] = []
+    source_nodes = 0
+    for rule in rules:
+        expr = parse_expr(rule) if isinstance(rule, str) else rule
+        source_nodes += sum(1 for _ in expr.descendants())
+        roots.append(table.intern(expr))
+    for root in roots:
+        table.uses[root] += 1
+
+    # Os identificadores são criados em pós-ordem, então os filhos de cada
+    # nó já foram construídos quando o nó é construído.
+    memo = _Memo([])
+    built: list[Expr] = []
+    for index, (cls, args) in enumerate(zip(table.classes, table.args)):
+        node = cls(*(_build(arg, built) for arg in args))
+        if not issubclass(cls, PURE):
+            node = Barrier(node, memo)
+        elif table.pure[index] and table.uses[index] > 1 and not issubclass(cls, TRIVIAL):
+            node = Shared(node, len(memo.values), memo)
+            memo.values.append(_UNSET)
+        built.append(node)
+
+    return RuleSet([built[root] for root in roots], source_nodes, len(table), memo)
+
+
+def _build(arg: Any, built: Sequence[Expr]) -> Any:
+    if isinstance(arg, _Ref):
+        return built[arg]
+    if isinstance(arg, list):
+        return [_build(item, built) for item in arg]
+    return arg
+
+
+def _has_nodes(value: Any) -> bool:
+    if isinstance(value, Node):
+        return True
+    return isinstance(value, (list, tuple)) and any(isinstance(item, Node) for item in value)
+
+
+def _flat_args(args: list[Any]) -> Iterable[Any]:
+    for arg in args:
+        if isinstance(arg, list):
+            yield from arg
+        else:
+            yield arg
+
+
+def _value_key(value: Any) -> Any:
+    # Chave de comparação de valores: inclui o tipo (True == 1.0 em Python) e
+    # distingue 0.0 de -0.0. Listas de filhos viram tuplas.
+    if isinstance(value, list):
+        return tuple(map(_value_key, value))
+    if isinstance(value, float):
+        return (float, repr(value))
+    if isinstance(value, _Ref):
+        return (_Ref, int(value))
+    try:
+        hash(value)
+    except TypeError:
+        return (type(value), id(value))
+    return (type(value), value)
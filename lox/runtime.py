@@ -3,7 +3,7 @@ from dataclasses import dataclass
 from types import BuiltinFunctionType, FunctionType
 from typing import TYPE_CHECKING
 
-from .ctx import Ctx
+from .ctx import UNSET, Ctx
 
 if TYPE_CHECKING:
     from .ast import Block, Value
@@ -46,6 +46,8 @@ class LoxFunction:
     params: list[str]
     body: "Block"
     ctx: Ctx
+    # Posições dos parâmetros, se a função foi analisada por `lox.resolver`.
+    frame: dict[str, int] | None = None
 
     def __str__(self) -> str:
         if self.name:
@@ -56,11 +58,20 @@ class LoxFunction:
         if len(args) != len(self.params):
             raise TypeError(f"'{self.name}' esperava {len(self.params)} argumentos, mas recebeu {len(args)}.")
         
-        local_env = dict(zip(self.params, args))
-        call_ctx = self.ctx.push(local_env)
-
+        frame = self.frame
         try:
-            self.body.eval(call_ctx)
+            if frame is None:
+                call_ctx = self.ctx.push(dict(zip(self.params, args)))
+                self.body.eval(call_ctx)
+            elif self.body.names is frame:
+                # O corpo foi resolvido no mesmo escopo dos parâmetros (veja
+                # `lox.resolver`): executamos os comandos diretamente.
+                slots = [*args, *[UNSET] * (len(frame) - len(args))]
+                call_ctx = Ctx({}, self.ctx, slots, frame)
+                for stmt in self.body.stmts:
+                    stmt.eval(call_ctx)
+            else:
+                self.body.eval(Ctx({}, self.ctx, list(args), frame))
         except LoxReturn as ex:
             return ex.value
         
@@ -0,0 +1,349 @@
+"""
+Analisador léxico escrito à mão, alternativo ao lexer do Lark.
+
+O lexer do Lark cria um objeto `Token` (uma subclasse de string) para cada
+lexema. Para arquivos muito grandes isso significa milhões de pequenos objetos.
+Aqui cada token é representado apenas por três inteiros: o tipo, a posição
+inicial e a posição final no código fonte. Os tokens ficam armazenados em um
+único `array('I')` e o texto de cada um só é criado quando solicitado.
+
+O conjunto de tokens é o mesmo definido em `grammar.lark`. Os nomes dos tipos
+são obtidos dos terminais do próprio Lark (veja `terminal_names`), de modo que
+a saída é idêntica à de `lox.lex`.
+"""
+
+import re
+from array import array
+from functools import lru_cache
+from typing import TYPE_CHECKING, Iterable, Iterator, NamedTuple
+
+if TYPE_CHECKING:
+    from lark import Token
+    from lark.lexer import TerminalDef
+
+
+# Tipos de tokens. A ordem importa: segue a mesma prioridade usada pelo Lark
+# (BOOL e NIL têm prioridade 2, palavras reservadas só casam com
+# identificadores completos e operadores longos vêm antes dos curtos).
+WS = 1
+COMMENT = 2
+BOOL = 3
+NIL = 4
+KEYWORDS = (
+    "and", "class", "else", "for", "fun", "if", "or",
+    "print", "return", "super", "this", "var", "while",
+)
+FIRST_KEYWORD = 5
+VAR = FIRST_KEYWORD + len(KEYWORDS)
+NUMBER = VAR + 1
+STRING = NUMBER + 1
+PUNCTUATION = (
+    "==", "!=", ">=", "<=",
+    "(", ")", "{", "}", ",", ".", ";", "-", "+", "*", "/", "!", "=", "<", ">",
+)
+FIRST_PUNCTUATION = STRING + 1
+ERROR = FIRST_PUNCTUATION + len(PUNCTUATION)
+N_KINDS = ERROR + 1
+
+# Texto literal de cada tipo de token (None para tokens definidos por regex).
+LITERALS: list[str | None] = [None] * N_KINDS
+for _i, _word in enumerate(KEYWORDS, FIRST_KEYWORD):
+    LITERALS[_i] = _word
+for _i, _op in enumerate(PUNCTUATION, FIRST_PUNCTUATION):
+    LITERALS[_i] = _op
+
+# Nomes dos terminais definidos por expressões regulares na gramática.
+REGEX_NAMES = {BOOL: "BOOL", NIL: "NIL", VAR: "VAR", NUMBER: "NUMBER", STRING: "STRING"}
+
+# Cada tipo corresponde a um grupo da expressão regular, de modo que
+# `match.lastindex` é o próprio tipo do token.
+SCANNER_REGEX = re.compile(
+    "|".join(
+        [
+            r"(\s+)",
+            r"(//[^\n]*)",
+            r"(true|false)",
+            r"(nil)",
+            *(rf"({word})(?!\w)" for word in KEYWORDS),
+            r"([a-zA-Z_]\w*)",
+            r"((?:[1-9][0-9]*|0)(?:\.[0-9]+)?)",
+            r'("[^"]*")',
+            *(f"({re.escape(op)})" for op in PUNCTUATION),
+            r"(.)",
+        ]
+    ),
+    re.DOTALL,
+)
+assert SCANNER_REGEX.groups == ERROR
+
+
+class Tok(NamedTuple):
+    """
+    Token compacto: tipo e posições inicial e final no código fonte.
+    """
+
+    kind: int
+    start: int
+    end: int
+
+
+class Tokens:
+    """
+    Sequência de tokens produzida pela função `scan`.
+
+    Armazena apenas o código fonte e um array de inteiros com triplas
+    (tipo, início, fim). O texto e a linha/coluna de cada token são calculados
+    sob demanda.
+    """
+
+    __slots__ = ("src", "data")
+
+    def __init__(self, src: str, data: array):
+        self.src = src
+        self.data = data
+
+    def __len__(self) -> int:
+        return len(self.data) // 3
+
+    def __getitem__(self, i: int) -> Tok:
+        if i < 0:
+            i += len(self)
+        data = self.data
+        return Tok(data[3 * i], data[3 * i + 1], data[3 * i + 2])
+
+    def __iter__(self) -> Iterator[Tok]:
+        data = self.data
+        for i in range(0, len(data), 3):
+            yield Tok(data[i], data[i + 1], data[i + 2])
+
+    def __repr__(self) -> str:
+        return f"<Tokens: {len(self)} tokens>"
+
+    def text(self, i: int) -> str:
+        """
+        Texto do i-ésimo token.
+        """
+        tok = self[i]
+        return self.src[tok.start : tok.end]
+
+    def line_col(self, i: int) -> tuple[int, int]:
+        """
+        Linha e coluna (começando em 1) do i-ésimo token.
+        """
+        start = self[i].start
+        line = self.src.count("\n", 0, start) + 1
+        col = start - self.src.rfind("\n", 0, start)
+        return line, col
+
+    def named(self, names: list[str | None] | None = None) -> Iterator[tuple[str, str]]:
+        """
+        Itera sobre pares (nome do terminal, texto) sem criar objetos Token.
+        """
+        if names is None:
+            names = default_names()
+        src = self.src
+        data = self.data
+        for i in range(0, len(data), 3):
+            kind, start, end = data[i], data[i + 1], data[i + 2]
+            name = names[kind]
+            if name is None:
+                raise_unexpected(src, start, names)
+            yield name, src[start:end]  # type: ignore[misc]
+
+    def lark_tokens(
+        self,
+        names: list[str | None] | None = None,
+        callbacks: dict | None = None,
+    ) -> Iterator["Token"]:
+        """
+        Converte os tokens para objetos `lark.Token`.
+
+        Args:
+            names:
+                Nome do terminal para cada tipo de token, como retornado por
+                `terminal_names`. Se omitido, usa os terminais do parser
+                principal.
+            callbacks:
+                Dicionário com funções chamadas para cada token de um terminal,
+                como os callbacks de lexer do Lark.
+        """
+        from lark import Token
+
+        if names is None:
+            names = default_names()
+        callbacks = callbacks or {}
+        src = self.src
+        data = self.data
+        line = 1
+        line_start = 0
+        pos = 0
+        for i in range(0, len(data), 3):
+            kind, start, end = data[i], data[i + 1], data[i + 2]
+            if (n := src.count("\n", pos, start)) != 0:
+                line += n
+                line_start = src.rfind("\n", pos, start) + 1
+            name = names[kind]
+            if name is None:
+                raise_unexpected(src, start, names)
+
+            token = Token(name, src[start:end], start, line, start - line_start + 1)
+            if (n := src.count("\n", start, end)) != 0:
+                line += n
+                line_start = src.rfind("\n", start, end) + 1
+            token.end_line = line
+            token.end_column = end - line_start + 1
+            token.end_pos = end
+            pos = end
+
+            if (callback := callbacks.get(name)) is not None:
+                token = callback(token)
+            yield token
+
+
+def scan(src: str, keep_comments: bool = False) -> Tokens:
+    """
+    Realiza a análise léxica do código fonte e retorna os tokens compactos.
+
+    Espaços em branco são sempre descartados. Comentários são descartados, a
+    não ser que `keep_comments` seja verdadeiro. Caracteres inválidos produzem
+    tokens do tipo ERROR; o erro só é lançado quando o token é convertido com
+    `Tokens.lark_tokens` ou consumido pelo parser.
+    """
+    return Tokens(src, scan_data(src, keep_comments))
+
+
+def scan_data(src: str, keep_comments: bool = False, offset: int = 0) -> array:
+    """
+    Retorna o array com as triplas (tipo, início, fim) dos tokens de `src`.
+
+    O valor de `offset` é somado às posições. Útil para analisar um trecho de
+    um código fonte maior (veja `lox.parallel_scan`).
+    """
+    data = array("I")
+    append = data.append
+    for m in SCANNER_REGEX.finditer(src):
+        kind = m.lastindex
+        if kind == WS or (kind == COMMENT and not keep_comments):
+            continue
+        append(kind)  # type: ignore[arg-type]
+        append(m.start() + offset)
+        append(m.end() + offset)
+    return data
+
+
+def terminal_names(terminals: Iterable["TerminalDef"]) -> list[str | None]:
+    """
+    Associa cada tipo de token ao nome do terminal correspondente no Lark.
+
+    Os nomes de terminais anônimos (ex.: __ANON_0 para "var") dependem da
+    ordem em que aparecem na gramática, por isso são lidos das definições de
+    terminais do parser. Palavras reservadas que não existem na gramática são
+    tratadas como identificadores (VAR), como faz o Lark. Operadores que não
+    existem na gramática ficam sem nome e produzem erro ao serem usados.
+    """
+    by_literal = {}
+    defined = set()
+    for term in terminals:
+        defined.add(term.name)
+        if term.pattern.type == "str":
+            by_literal[term.pattern.value] = term.name
+
+    names: list[str | None] = [None] * N_KINDS
+    for kind, name in REGEX_NAMES.items():
+        names[kind] = name if name in defined else None
+    for kind, literal in enumerate(LITERALS):
+        if literal is None:
+            continue
+        if literal in by_literal:
+            names[kind] = by_literal[literal]
+        elif literal.isidentifier():
+            names[kind] = names[VAR]
+    names[COMMENT] = "COMMENT"
+    return names
+
+
+def default_names() -> list[str | None]:
+    """
+    Nomes dos terminais do parser principal.
+    """
+    from .parser import get_ast_parser
+
+    return terminal_names(get_ast_parser().terminals)
+
+
+def lark_token(src: str, name: str, start: int, end: int) -> "Token":
+    """
+    Cria um `lark.Token` para o trecho src[start:end], calculando linha e coluna.
+    """
+    from lark import Token
+
+    line = src.count("\n", 0, start) + 1
+    column = start - src.rfind("\n", 0, start)
+    end_line = line + src.count("\n", start, end)
+    end_column = end - src.rfind("\n", 0, end)
+    return Token(name, src[start:end], start, line, column, end_line, end_column, end)
+
+
+def raise_unexpected(src: str, pos: int, names: list[str | None]):
+    """
+    Lança o mesmo erro que o lexer do Lark lança para um caractere inválido.
+    """
+    from lark.exceptions import UnexpectedCharacters
+
+    line = src.count("\n", 0, pos) + 1
+    column = pos - src.rfind("\n", 0, pos)
+    allowed = {name for name in names if name is not None and name != "COMMENT"}
+    raise UnexpectedCharacters(src, pos, line, column, allowed=allowed)
+
+
+def previous_token(src: str, token: "Token", names: list[str | None] | None = None):
+    """
+    Retorna o token que precede `token` no código fonte, ou None.
+
+    O lexer contextual do Lark informa o token anterior em seus erros de
+    sintaxe (atributo `token_history`). Usamos esta função para oferecer a
+    mesma informação nos erros produzidos com o scanner.
+    """
+    tokens = scan(src)
+    count = len(tokens)
+    if token.type != "$END":
+        count = sum(1 for tok in tokens if tok.start < token.start_pos)
+    if count == 0:
+        return None
+    for i, lark_token in enumerate(tokens.lark_tokens(names)):
+        if i == count - 1:
+            return lark_token
+    return None
+
+
+@lru_cache(maxsize=1)
+def lark_scanner_class() -> type:
+    """
+    Retorna uma subclasse de `lark.lexer.Lexer` que usa a função `scan`.
+
+    A classe é criada sob demanda para que este módulo não dependa do Lark.
+
+    Uso:
+        Lark(..., parser="lalr", lexer=lark_scanner_class())
+    """
+    from lark.lexer import Lexer
+
+    class LarkScanner(Lexer):
+        def __init__(self, lexer_conf):
+            self.names = terminal_names(lexer_conf.terminals)
+            self.callbacks = lexer_conf.callbacks
+
+        def lex(self, data: str) -> Iterator["Token"]:  # type: ignore[override]
+            return scan(data).lark_tokens(self.names, self.callbacks)
+
+    # Permite que o pickle (usado no cache do Lark) encontre a classe como
+    # `lox.scanner.LarkScanner`. Veja a função __getattr__ abaixo.
+    LarkScanner.__module__ = __name__
+    LarkScanner.__qualname__ = "LarkScanner"
+    return LarkScanner
+
+
+def __getattr__(name: str):
+    if name == "LarkScanner":
+        return lark_scanner_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
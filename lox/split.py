@@ -0,0 +1,79 @@
+"""
+Divide um programa Lox em declarações de nível superior.
+
+A regra `program : declaration*` da gramática permite analisar cada
+declaração de forma independente. Este módulo encontra as fronteiras entre
+elas a partir dos tokens de `lox.scanner`, sem realizar a análise sintática:
+uma declaração termina em um ";" ou "}" fora de parênteses e chaves, a não
+ser que o próximo token seja um "else".
+
+A divisão só é garantida para programas válidos. Quem a utiliza deve
+analisar o programa inteiro novamente em caso de erro de sintaxe, para obter
+a mesma mensagem de erro de `lox.parse`.
+"""
+
+from typing import Iterator
+
+from .scanner import ERROR, FIRST_KEYWORD, FIRST_PUNCTUATION, KEYWORDS, PUNCTUATION, Tokens
+
+ELSE = FIRST_KEYWORD + KEYWORDS.index("else")
+LPAR = FIRST_PUNCTUATION + PUNCTUATION.index("(")
+RPAR = FIRST_PUNCTUATION + PUNCTUATION.index(")")
+LBRACE = FIRST_PUNCTUATION + PUNCTUATION.index("{")
+RBRACE = FIRST_PUNCTUATION + PUNCTUATION.index("}")
+SEMICOLON = FIRST_PUNCTUATION + PUNCTUATION.index(";")
+
+
+def declaration_spans(tokens: Tokens, final: bool = True) -> Iterator[tuple[int, int]]:
+    """
+    Itera sobre as posições (início, fim) de cada declaração de nível
+    superior no código fonte.
+
+    As posições vão do primeiro ao último token da declaração, portanto não
+    incluem comentários e espaços em branco entre declarações.
+
+    Args:
+        tokens:
+            Tokens produzidos por `lox.scanner.scan`.
+        final:
+            Se falso, `tokens` corresponde apenas ao início do código fonte
+            (ex.: leitura em blocos) e só retornamos declarações que não podem
+            mudar com a leitura do restante. Uma declaração só é considerada
+            completa se o token que a segue não for o último token (que pode
+            ter sido cortado) e paramos em aspas não fechadas, que podem ser o
+            início de uma string cortada. Se verdadeiro, os tokens restantes
+            no final são retornados como uma última declaração, mesmo que
+            incompleta.
+    """
+    src = tokens.src
+    data = tokens.data
+    n = len(data) // 3
+    depth = 0
+    first = 0
+    for i in range(n):
+        kind = data[3 * i]
+        if kind == LPAR or kind == LBRACE:
+            depth += 1
+            continue
+        if kind == RPAR or kind == RBRACE:
+            # Em programas inválidos podemos ter mais fechamentos do que
+            # aberturas. O erro será detectado pelo parser.
+            depth = max(depth - 1, 0)
+            if kind == RPAR:
+                continue
+        elif kind == ERROR and not final and src[data[3 * i + 1]] == '"':
+            return
+        elif kind != SEMICOLON:
+            continue
+
+        if depth != 0:
+            continue
+        if not final and i + 2 >= n:
+            return
+        if i + 1 < n and data[3 * i + 3] == ELSE:
+            continue
+        yield data[3 * first + 1], data[3 * i + 2]
+        first = i + 1
+
+    if final and first < n:
+        yield data[3 * first + 1], data[3 * n - 1]
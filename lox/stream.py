@@ -0,0 +1,156 @@
+"""
+Execução de scripts Lox em fluxo (streaming).
+
+A função `lox.eval` lê o programa inteiro, constrói um único `Program` e só
+então começa a executá-lo. Para scripts gerados automaticamente com milhões
+de comandos isso significa manter toda a AST na memória e esperar a análise
+do arquivo inteiro antes de ver a primeira saída.
+
+Aqui o arquivo é lido em blocos. Assim que um bloco contém declarações de
+nível superior completas (veja `lox.split`), elas são analisadas e
+executadas no mesmo contexto, e sua AST pode ser descartada. O uso de memória
+fica limitado pelo tamanho dos blocos e da maior declaração.
+
+Diferente de `lox.eval`, os comandos anteriores a um erro de sintaxe ou
+semântico já terão sido executados quando o erro for lançado.
+"""
+
+from pathlib import Path
+from typing import IO, Iterator
+
+from . import positions
+from .ast import Program, Stmt
+from .ctx import Ctx
+from .errors import SemanticError
+from .parser import parse
+from .scanner import scan
+from .split import declaration_spans
+
+CHUNK_SIZE = 64 * 1024
+
+
+def iter_declarations(
+    file: IO[str],
+    chunk_size: int = CHUNK_SIZE,
+    backend: str | None = None,
+) -> Iterator[Stmt]:
+    """
+    Lê o arquivo em blocos e produz as declarações de nível superior, já
+    validadas e sem açúcar sintático, à medida que são analisadas.
+
+    Args:
+        file:
+            Arquivo aberto em modo texto.
+        chunk_size:
+            Número de caracteres lidos por vez.
+        backend:
+            Parser utilizado. Veja `lox.parse`.
+    """
+    path = getattr(file, "name", "<string>")
+    buffer = ""
+    line = 1  # Linha do início de `buffer` no arquivo
+    column = 1  # Coluna do início de `buffer` no arquivo
+    size = chunk_size
+    while True:
+        chunk = file.read(size)
+        final = not chunk
+        buffer += chunk
+
+        spans = list(declaration_spans(scan(buffer), final=final))
+        if spans:
+            start, end = spans[0][0], spans[-1][1]
+            try:
+                # Caminho rápido: analisamos todas as declarações completas
+                # do bloco de uma só vez.
+                program = parse(buffer[start:end], cache=False, backend=backend)
+            except Exception as exc:
+                # Executamos as declarações anteriores ao erro, uma a uma.
+                for i, j in spans:
+                    try:
+                        program = parse(buffer[i:j], cache=False, backend=backend)
+                    except Exception:
+                        # Analisa novamente para lançar o erro com a linha e
+                        # a coluna corretas no arquivo.
+                        prefix = _position_prefix(buffer, i, line, column)
+                        try:
+                            parse(prefix + buffer[i:j], cache=False, backend=backend)
+                        except SemanticError as e:
+                            if e.location is not None:
+                                e.location = e.location._replace(path=path)
+                            raise
+                        raise
+                    _set_position(program, path, *_position(buffer, i, line, column))
+                    yield from program.stmts
+                raise exc
+            _set_position(program, path, *_position(buffer, start, line, column))
+            yield from program.stmts
+
+            line, column = _position(buffer, end, line, column)
+            buffer = buffer[end:]
+            size = chunk_size
+        else:
+            # Nenhuma declaração completa: dobramos o tamanho da leitura para
+            # não analisar o mesmo trecho muitas vezes.
+            size = max(size, len(buffer))
+
+        if final:
+            return
+
+
+def _position(buffer: str, pos: int, line: int, column: int) -> tuple[int, int]:
+    """
+    Linha e coluna que a posição `pos` de `buffer` ocupa no arquivo original,
+    dada a posição do início de `buffer`.
+    """
+    if (n := buffer.count("\n", 0, pos)) != 0:
+        return line + n, pos - buffer.rfind("\n", 0, pos)
+    return line, column + pos
+
+
+def _position_prefix(buffer: str, pos: int, line: int, column: int) -> str:
+    """
+    Texto em branco que, colocado antes de buffer[pos:], faz o Lark reportar
+    a linha e a coluna que a posição `pos` ocupa no arquivo original.
+    """
+    line, column = _position(buffer, pos, line, column)
+    return "\n" * (line - 1) + " " * (column - 1)
+
+
+def _set_position(program: Program, path: str, line: int, column: int) -> None:
+    """
+    Ajusta o mapa de posições do trecho analisado (veja `lox.positions`)
+    para reportar posições relativas ao arquivo original.
+    """
+    if (source_map := positions.source_map(program)) is not None:
+        source_map.path = path
+        source_map.line = line
+        source_map.column = column
+
+
+def eval_file(
+    path: str | Path,
+    env: Ctx | None = None,
+    chunk_size: int = CHUNK_SIZE,
+    backend: str | None = None,
+) -> Ctx:
+    """
+    Executa um arquivo Lox em fluxo e retorna o contexto de execução.
+
+    Cada declaração de nível superior é executada assim que é analisada, em
+    um único contexto persistente. Veja `iter_declarations`.
+    """
+    ctx = Ctx.from_dict({}) if env is None else env
+    with open(path, "r") as file:
+        # Mantemos uma referência ao gerador para que o trecho em execução
+        # continue vivo e possamos reportar a posição de um erro.
+        declarations = iter_declarations(file, chunk_size, backend)
+        try:
+            for stmt in declarations:
+                stmt.eval(ctx)
+        except Exception as e:
+            print(f"Programa terminou com um erro: {e}")
+            if (location := positions.error_location(e)) is not None:
+                print("Posição:", location)
+            print("Variáveis:", ctx)
+            raise
+    return ctx
@@ -0,0 +1,165 @@
+"""
+Gerador de programas Lox sintéticos com tamanho e formato controlados.
+
+Os exemplos de `exemplos/` são pequenos demais para medir como a análise
+sintática escala. Este módulo gera programas válidos (que passam por
+`lox.parse`) com um número exato de linhas, em diferentes formatos:
+
+    declarations:  longas listas de declarações de variáveis e funções.
+    nesting:       funções com blocos, ifs e laços profundamente aninhados.
+    chains:        expressões longas, quebradas em várias linhas.
+    classes:       muitas classes, instâncias e acessos a atributos.
+    mixed:         alterna entre todos os formatos acima.
+
+Os programas são determinísticos: a mesma chamada sempre produz o mesmo
+código.
+
+Uso:
+
+    >>> src = generate(10_000, "nesting", depth=64)
+    >>> src.count("\\n")
+    10000
+"""
+
+from itertools import count
+from typing import Callable, Iterator
+
+# Cada formato produz uma sequência infinita de unidades (listas de linhas)
+# que podem aparecer em qualquer ordem no programa.
+Unit = list[str]
+
+
+def generate(
+    lines: int,
+    shape: str = "mixed",
+    *,
+    depth: int = 32,
+    width: int = 64,
+) -> str:
+    """
+    Gera um programa com exatamente `lines` linhas.
+
+    Args:
+        lines:
+            Número de linhas do programa.
+        shape:
+            Formato do programa. Veja `SHAPES`.
+        depth:
+            Profundidade máxima dos blocos aninhados no formato "nesting".
+        width:
+            Número de operandos de cada expressão no formato "chains".
+    """
+    return "".join(line + "\n" for line in iter_lines(lines, shape, depth=depth, width=width))
+
+
+def iter_lines(
+    lines: int,
+    shape: str = "mixed",
+    *,
+    depth: int = 32,
+    width: int = 64,
+) -> Iterator[str]:
+    """
+    Similar a `generate`, mas produz as linhas (sem o "\\n") uma a uma.
+    """
+    try:
+        factory = SHAPES[shape]
+    except KeyError:
+        raise ValueError(f"formato desconhecido: {shape!r}") from None
+
+    units = factory(depth, width)
+    remaining = lines
+    while remaining > 0:
+        unit = next(units)
+        if len(unit) > remaining:
+            # Completa com comandos de uma linha em vez de cortar a unidade.
+            unit = [f"print {i};" for i in range(remaining)]
+        yield from unit
+        remaining -= len(unit)
+
+
+def declarations(depth: int, width: int) -> Iterator[Unit]:
+    yield ["var v0 = 0;"]
+    for i in count(1):
+        if i % 8 == 0:
+            yield [
+                f"fun f{i}(a, b) {{",
+                f"  var c = a * {i} + b;",
+                "  return c - v0;",
+                "}",
+            ]
+        elif i % 8 == 4:
+            yield [f"print v{i - 1};"]
+        else:
+            yield [f'var v{i} = v{i - 1} + {i % 100};']
+
+
+def nesting(depth: int, width: int) -> Iterator[Unit]:
+    headers: list[Callable[[int], str]] = [
+        lambda k: f"if (n > {k}) {{",
+        lambda k: "while (n < 0) {",
+        lambda k: f"for (var i{k} = 0; i{k} < n; i{k} = i{k} + 1) {{",
+        lambda k: "{",
+    ]
+    for i in count():
+        level = 1 + i % max(depth, 1)
+        unit = [f"fun nest{i}(n) {{"]
+        for k in range(level):
+            indent = "  " * (k + 1)
+            unit.append(indent + headers[k % len(headers)](k))
+            unit.append(f"{indent}  var x{k} = n + {k};")
+        unit.append("  " * (level + 1) + "print n;")
+        unit.extend("  " * k + "}" for k in range(level, -1, -1))
+        yield unit
+
+
+def chains(depth: int, width: int) -> Iterator[Unit]:
+    operators = ["+", "-", "*", "+"]
+    per_line = 8
+    yield ["var c0 = 1;"]
+    for i in count(1):
+        terms = []
+        for k in range(max(width, 1)):
+            if k % 5 == 4:
+                terms.append(f"(c{i - 1} - {k})")
+            elif k % 2:
+                terms.append(f"c{i - 1}")
+            else:
+                terms.append(str(k))
+        unit = [f"var c{i} ="]
+        for start in range(0, len(terms), per_line):
+            chunk = terms[start : start + per_line]
+            line = "  " + f" {operators[start // per_line % 4]} ".join(chunk)
+            if start + per_line < len(terms):
+                line += " " + operators[(start // per_line + 1) % 4]
+            unit.append(line)
+        unit[-1] += ";"
+        yield unit
+
+
+def classes(depth: int, width: int) -> Iterator[Unit]:
+    for i in count():
+        yield [
+            f"class C{i} {{}}",
+            f"var o{i} = C{i}();",
+            f"o{i}.value = {i};",
+            f"o{i}.next = o{i}.value + 1;",
+            f"print o{i}.next;",
+        ]
+
+
+def mixed(depth: int, width: int) -> Iterator[Unit]:
+    sources = [shape(depth, width) for shape in (declarations, nesting, chains, classes)]
+    while True:
+        for source in sources:
+            for _ in range(4):
+                yield next(source)
+
+
+SHAPES: dict[str, Callable[[int, int], Iterator[Unit]]] = {
+    "declarations": declarations,
+    "nesting": nesting,
+    "chains": chains,
+    "classes": classes,
+    "mixed": mixed,
+}
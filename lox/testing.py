@@ -14,7 +14,6 @@ from functools import lru_cache
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, Callable, Iterable
 
-import pytest
 from lark import Tree, UnexpectedCharacters, UnexpectedToken
 
 try:
@@ -99,15 +98,18 @@ class Example:
         """
         return self.error is not None and self.error.runtime
 
-    def eval(self) -> tuple[Ctx, str, str | None]:
+    def eval(self, ast: Node | None = None) -> tuple[Ctx, str, str | None]:
         """
         Executa o exemplo.
+
+        Se a árvore sintática já foi produzida, pode ser passada em `ast` para
+        evitar analisar o código novamente.
         """
         stdout = io.StringIO()
         with contextlib.redirect_stdout(stdout) as stdout:
             ctx = Ctx.from_dict({})
             try:
-                lox_eval(self.src, ctx)
+                lox_eval(self.src if ast is None else ast, ctx)
             except Exception as e:
                 if self.error is not None and self.error.runtime:
                     return ctx, "", str(e)
@@ -121,8 +123,11 @@ class Example:
 
         try:
             if self.has_valid_syntax:
-                self.check_fully_converted()
-                ctx, stdout, err = self.eval()
+                # Analisamos o código uma única vez: a mesma árvore (já
+                # validada) é verificada e executada.
+                ast = parse(self.src)
+                self.check_fully_converted(ast)
+                ctx, stdout, err = self.eval(ast)
                 stdout = stdout.rstrip("\n")
                 expect = "\n".join(self.outputs)
 
@@ -154,11 +159,12 @@ class Example:
             print("Erros esperados:", self.error or "nenhum")
             raise
 
-    def check_fully_converted(self):
+    def check_fully_converted(self, ast: Node | None = None):
         """
         Verifica se o exemplo foi totalmente convertido de CST para AST.
         """
-        ast = parse(self.src)
+        if ast is None:
+            ast = parse(self.src)
         assert isinstance(ast, Node)
 
         def assert_not_lark(obj):
@@ -190,6 +196,11 @@ class ExampleTester:
 
         names = [p.name.removesuffix(".lox") for p in examples]
 
+        # O pytest só é importado quando as classes de teste são criadas. Assim,
+        # o restante do módulo (Example, load_examples, ...) pode ser usado
+        # fora dos testes sem carregar o pytest.
+        import pytest
+
         @pytest.mark.parametrize("path", examples, ids=names)
         def test_expected(self, path: Path):
             ex = Example(
@@ -208,14 +219,6 @@ class ExampleTester:
 
 
 class ExerciseTester:
-    try:
-        import pytest_jsonreport as _  # type: ignore[import]
-    except ImportError:
-
-        @pytest.fixture
-        def json_metadata(self):
-            return {}
-
     is_expr = True
     src1: str
     src2: str
@@ -239,20 +242,19 @@ class ExerciseTester:
         msg = "Defina o atributo 'ast_class' ou 'ast_class(1|2|3)' com a classe esperada nos exemplos."
         raise NotImplementedError(msg)
 
-    @pytest.fixture
-    def grade(self, json_metadata):
-        def grade(**kwargs):
-            [(name, value)] = kwargs.items()
-            name = name.removesuffix("_or")
-            value = self.grades.get(name, value) or value
-            json_metadata["grade"] = value
-            return value
-
-        return grade
-
     def __init_subclass__(cls, **kwargs):
         super().__init_subclass__(**kwargs)
 
+        # Importamos o pytest e registramos as fixtures somente ao criar as
+        # classes de teste (veja ExampleTester).
+        import pytest
+
+        try:
+            import pytest_jsonreport as _  # type: ignore[import]  # noqa: F401
+        except ImportError:
+            cls.json_metadata = pytest.fixture(_json_metadata)
+        cls.grade = pytest.fixture(_grade)
+
         if hasattr(cls, "src3"):
             cls.n_sources = 3
         elif hasattr(cls, "src2"):
@@ -310,6 +312,8 @@ class ExerciseTester:
         try:
             return getattr(self, f"src{i}")
         except AttributeError:
+            import pytest
+
             pytest.skip(f"Exemplo {i} não definido")
 
     def cst(self, i: int | str) -> Tree:
@@ -346,6 +350,8 @@ class ExerciseTester:
         try:
             return getattr(self, f"eval_env{i}")()
         except AttributeError:
+            import pytest
+
             pytest.skip(f"Ambiente de avaliação para exemplo {i} não definido")
 
     def assert_stdout_eq(self, stdout: str, expect: str):
@@ -405,6 +411,8 @@ class ExerciseTester:
         if alt:
             ctx, expect = self.eval_env_alt(n)
         elif alt:
+            import pytest
+
             pytest.skip(f"Exemplo {n} não possui ambiente de avaliação alternativo")
         else:
             ctx, expect = self.eval_env(n)
@@ -587,6 +595,28 @@ class ExerciseTester:
         def verify_eval_result(self, result: Any, stdout: str, ctx: Ctx | dict): ...
 
 
+def _json_metadata(self):
+    """
+    Substitui a fixture do plugin pytest-jsonreport, quando não instalado.
+    """
+    return {}
+
+
+def _grade(self, json_metadata):
+    """
+    Fixture que registra a nota de cada teste nos metadados do relatório.
+    """
+
+    def grade(**kwargs):
+        [(name, value)] = kwargs.items()
+        name = name.removesuffix("_or")
+        value = self.grades.get(name, value) or value
+        json_metadata["grade"] = value
+        return value
+
+    return grade
+
+
 class fuzzy(str):
     def __new__(cls, value: str):
         return str.__new__(cls, value.lower())
@@ -7,6 +7,7 @@ A resolução de vários exercícios requer a modificação ou implementação d
 métodos desta classe.
 """
 
+import sys
 from typing import Callable
 from lark import Transformer, v_args
 
@@ -29,6 +30,36 @@ def op_handler(op: Callable):
 
 @v_args(inline=True)
 class LoxTransformer(Transformer):
+    """
+    Converte a árvore do Lark em nós de `lox.ast`.
+
+    Nomes de variáveis são internados com `sys.intern` e literais iguais
+    compartilham o mesmo nó `Literal` (um único `Literal(None)`, um por
+    número, etc). Literais são imutáveis, então o compartilhamento é seguro,
+    mas o mesmo nó pode aparecer em vários lugares da árvore. A tabela de
+    literais vale para uma única análise: chame `reset()` ao final de cada
+    uma para não manter a árvore anterior viva.
+    """
+
+    def __init__(self, visit_tokens: bool = True):
+        super().__init__(visit_tokens)
+        self.reset()
+
+    def reset(self):
+        """
+        Descarta a tabela de literais da última análise.
+        """
+        self.literals: dict[type, dict[Value, Literal]] = literal_pool()
+
+    def literal(self, value: Value) -> Literal:
+        """
+        Retorna o nó `Literal` compartilhado para o valor.
+        """
+        pool = self.literals[type(value)]
+        if (node := pool.get(value)) is None:
+            node = pool[value] = Literal(value)
+        return node
+
     # Programa
     def program(self, *stmts):
         return Program(list(stmts))
@@ -84,7 +115,7 @@ class LoxTransformer(Transformer):
 
     def var_decl(self, name, initializer=None):
         if initializer is None:
-            initializer = Literal(None)
+            initializer = self.literal(None)
         return VarDef(name.name, initializer)
 
     def block(self, *stmts):
@@ -103,29 +134,29 @@ class LoxTransformer(Transformer):
 
     # Literais e Variáveis
     def VAR(self, token):
-        name = str(token)
+        name = sys.intern(str(token))
         return Var(name)
 
     def NUMBER(self, token):
         num = float(token)
-        return Literal(num)
+        return self.literal(num)
     
     def STRING(self, token):
         text = str(token)[1:-1]
-        return Literal(text)
+        return self.literal(text)
     
     def NIL(self, _):
-        return Literal(None)
+        return self.literal(None)
 
     def BOOL(self, token):
-        return Literal(token == "true")
+        return self.literal(token == "true")
 
     # Tratamento de 'for' (desugaring para 'while')
     def empty_init(self):
         return None 
 
     def empty_cond(self):
-        return Literal(True)
+        return self.literal(True)
 
     def empty_incr(self):
         return None
@@ -138,7 +169,7 @@ class LoxTransformer(Transformer):
         
         # Constrói o laço while
         if cond is None:
-            cond = Literal(True)
+            cond = self.literal(True)
         loop = While(cond, Block(while_body))
 
         # Adiciona o inicializador, se existir
@@ -0,0 +1,123 @@
+"""
+Visitantes com despacho compilado por tipo.
+
+Encontrar o tratador de um objeto exige percorrer o MRO do seu tipo e
+consultar o dicionário de visitantes a cada passo (veja `visit_once`).
+`Visitor` faz essa busca uma única vez por tipo concreto e guarda o resultado
+(inclusive a ausência de tratador), de modo que visitar um nó custa uma
+consulta a um dicionário.
+
+Um visitante aceita tratadores executados antes dos filhos (pré-ordem) e
+depois dos filhos (pós-ordem, como em `Node.visit`). Valores que não são nós
+(nomes, números, operadores) só são visitados se algum tratador estiver
+associado a um tipo que não é subclasse de `Node`, como em
+`{object: func}`.
+
+Uso:
+
+    >>> names = []
+    >>> visitor = Visitor(post={Var: lambda node: names.append(node.name)})
+    >>> visitor.walk(tree)
+    >>> tree.visit(visitor)  # equivalente
+"""
+
+from typing import Any, Callable, Mapping
+
+from .node import VALUE, Node, field_table
+
+Handler = Callable[[Any], Any]
+Handlers = Mapping[type, Handler]
+
+
+class Visitor:
+    """
+    Percorre uma árvore executando os tratadores associados ao tipo de cada
+    objeto.
+
+    Attributes:
+        pre:
+            Tratadores executados quando o nó é encontrado, antes dos filhos.
+            Se um tratador retornar `False`, os filhos do nó não são
+            visitados.
+        post:
+            Tratadores executados depois de visitar todos os filhos do nó.
+
+    Em ambos os casos, vale o tratador do tipo mais específico no MRO do
+    objeto.
+    """
+
+    __slots__ = ("pre", "post", "leaves", "_cache")
+
+    def __init__(self, pre: Handlers | None = None, post: Handlers | None = None):
+        self.pre = dict(pre or {})
+        self.post = dict(post or {})
+        self.leaves = any(not issubclass(cls, Node) for cls in (*self.pre, *self.post))
+        self._cache: dict[type, tuple[Handler | None, Handler | None]] = {}
+
+    def handlers(self, cls: type) -> tuple[Handler | None, Handler | None]:
+        """
+        Retorna os tratadores (pré, pós) para objetos do tipo dado.
+        """
+        try:
+            return self._cache[cls]
+        except KeyError:
+            result = self._cache[cls] = (resolve(self.pre, cls), resolve(self.post, cls))
+            return result
+
+    def walk(self, root: Any) -> None:
+        """
+        Visita a árvore a partir do nó dado.
+
+        A ordem das visitas em pós-ordem é a mesma de `Node.visit`: os
+        atributos de cada nó, na ordem de declaração, e depois o próprio nó.
+        """
+        # A pilha guarda pares (tratador, objeto). Pares com tratador são
+        # chamadas pendentes (pós-ordem ou folhas); pares sem tratador são nós
+        # que ainda serão expandidos.
+        cache = self._cache
+        handlers = self.handlers
+        leaves = self.leaves
+        pending: list[tuple[Handler | None, Any]] = [(None, root)]
+        while pending:
+            handler, obj = pending.pop()
+            if handler is not None:
+                handler(obj)
+                continue
+
+            cls = type(obj)
+            pre, post = cache[cls] if cls in cache else handlers(cls)
+            if post is not None:
+                pending.append((post, obj))
+            if not isinstance(obj, Node):
+                if pre is not None:
+                    pre(obj)
+                continue
+            if pre is not None and pre(obj) is False:
+                continue
+
+            tasks: list[tuple[Handler | None, Any]] = []
+            for name, kind in field_table(cls).fields:
+                value = getattr(obj, name)
+                if kind is VALUE:
+                    if leaves:
+                        tasks.append((None, value))
+                elif isinstance(value, Node):
+                    tasks.append((None, value))
+                elif isinstance(value, (list, tuple)):
+                    if leaves:
+                        tasks.extend((None, item) for item in value)
+                    else:
+                        tasks.extend((None, item) for item in value if isinstance(item, Node))
+                elif leaves:
+                    tasks.append((None, value))
+            pending.extend(reversed(tasks))
+
+
+def resolve(handlers: Handlers, cls: type) -> Handler | None:
+    """
+    Tratador do tipo mais específico no MRO de `cls`, se houver.
+    """
+    for base in cls.__mro__:
+        if base in handlers:
+            return handlers[base]
+    return None
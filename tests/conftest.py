@@ -1,4 +1,6 @@
+import os
 import re
+import tempfile
 from pathlib import Path
 from types import SimpleNamespace
 from typing import Any, Callable, Iterable, NamedTuple
@@ -6,8 +8,15 @@ from typing import Any, Callable, Iterable, NamedTuple
 import pytest
 from lark import Tree
 
-import lox
-from lox.ast import Expr, Program
+# Os testes não devem depender (nem sujar) o cache em disco do usuário. Testes
+# que habilitam o cache usam uma pasta temporária, removida ao final.
+os.environ.setdefault("LOX_NO_CACHE", "1")
+CACHE_HOME = tempfile.TemporaryDirectory(prefix="lox-tests-")
+os.environ["XDG_CACHE_HOME"] = CACHE_HOME.name
+os.environ["LOX_CACHE_DIR"] = os.path.join(CACHE_HOME.name, "lox")
+
+import lox  # noqa: E402
+from lox.ast import Expr, Program  # noqa: E402
 
 pytest.register_assert_rewrite("lox.testing")
 
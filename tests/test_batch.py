@@ -0,0 +1,66 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import lox
+from lox.batch import ErrorRecord, parse_file, parse_many
+
+EXAMPLES = Path(__file__).parent.parent / "exemplos"
+
+
+@pytest.fixture
+def files(tmp_path):
+    sources = {
+        "ok.lox": "var x = 1;\nprint x + 2;\n",
+        "syntax.lox": "var x = 1;\nprint x +;\n",
+        "semantic.lox": "var x = 1;\n\nfun f(a, a) {}\n",
+    }
+    for name, src in sources.items():
+        (tmp_path / name).write_text(src)
+    return [tmp_path / name for name in sources]
+
+
+def test_parse_file(files):
+    ok, syntax, semantic = (parse_file(str(path)) for path in files)
+    assert ok.ok and ok.tree == lox.parse(files[0].read_text())
+
+    assert syntax.data is None and syntax.tree is None
+    assert syntax.error == ErrorRecord(
+        str(files[1]), "syntax", syntax.error.message, 2, 10
+    )
+    assert str(syntax.error).startswith(f"{files[1]}:2:10: Unexpected token")
+
+    assert semantic.error.kind == "semantic"
+    assert (semantic.error.line, semantic.error.column) == (3, 10)
+
+    missing = parse_file(str(files[0].with_name("missing.lox")))
+    assert missing.error.kind == "io"
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_parse_many_preserves_order(workers):
+    paths = sorted(EXAMPLES.glob("function/*.lox"))
+    results = list(parse_many(paths, workers=workers, chunk_size=3))
+    assert [result.path for result in results] == [str(path) for path in paths]
+    assert [result.error for result in results] == [
+        parse_file(str(path)).error for path in paths
+    ]
+
+
+def test_check_command(files):
+    cmd = [sys.executable, "-m", "lox", "check", "-j", "2", str(files[0].parent)]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    assert proc.returncode == 1
+    lines = proc.stdout.splitlines()
+    assert lines[-1] == "3 arquivo(s) verificado(s), 2 com erro."
+    assert lines[0].startswith(f"{files[2]}:3:10: Duplicate parameter")
+
+    proc = subprocess.run([*cmd, "--json"], capture_output=True, text=True)
+    records = [json.loads(line) for line in proc.stdout.splitlines()]
+    assert [record["kind"] for record in records] == ["semantic", "syntax"]
+
+    proc = subprocess.run(cmd[:-1] + [str(files[0])], capture_output=True, text=True)
+    assert proc.returncode == 0
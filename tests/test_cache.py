@@ -0,0 +1,116 @@
+import os
+
+import pytest
+
+import lox
+from lox import cache
+from lox.ast import Program
+
+SRC = """
+var x = 1;
+for (var i = 0; i < 3; i = i + 1) {
+    x = x * 2;
+}
+print x;
+"""
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("LOX_CACHE_DIR", str(tmp_path))
+    monkeypatch.delenv("LOX_NO_CACHE", raising=False)
+    return tmp_path
+
+
+def test_parse_stores_and_reuses_tree(cache_dir):
+    tree = lox.parse(SRC)
+    files = list(cache_dir.glob("*.loxc"))
+    assert len(files) == 1
+
+    cached = cache.load(SRC)
+    assert isinstance(cached, Program)
+    assert cached == tree
+    assert cached is not tree
+    assert lox.parse(SRC) == tree
+
+
+def test_parse_expr_uses_separate_entries(cache_dir):
+    lox.parse_expr("1 + 2")
+    lox.parse("1 + 2;")
+    assert len(list(cache_dir.glob("*.loxc"))) == 2
+    assert cache.load("1 + 2", "expr") == lox.parse_expr("1 + 2", cache=False)
+
+
+def test_cache_can_be_disabled(cache_dir, monkeypatch):
+    lox.parse(SRC, cache=False)
+    monkeypatch.setenv("LOX_NO_CACHE", "1")
+    lox.parse(SRC)
+    assert list(cache_dir.glob("*.loxc")) == []
+
+
+def test_fingerprint_invalidates_entries(cache_dir, monkeypatch):
+    lox.parse(SRC)
+    old_path = cache.cache_path(SRC)
+    monkeypatch.setattr(cache, "fingerprint", lambda: "outra gramática")
+    assert cache.cache_path(SRC) != old_path
+    assert cache.load(SRC) is None
+
+
+def test_fingerprint_covers_parse_passes():
+    # As árvores salvas já passaram por PARSE_PASSES (ex.: endereços do
+    # resolvedor), então os módulos desses passes fazem parte do hash.
+    for name in ("resolver.py", "passes.py", "ctx.py", "parser.py"):
+        assert name in cache.FINGERPRINT_FILES
+    assert all((cache.DIR / name).exists() for name in cache.FINGERPRINT_FILES)
+
+
+def test_corrupted_entry_is_ignored(cache_dir):
+    cache.cache_path(SRC).parent.mkdir(parents=True, exist_ok=True)
+    cache.cache_path(SRC).write_bytes(b"lixo")
+    assert cache.load(SRC) is None
+    assert isinstance(lox.parse(SRC), Program)
+
+
+def test_semantic_errors_are_not_cached(cache_dir):
+    with pytest.raises(lox.SemanticError):
+        lox.parse("{ var a = 1; var a = 2; }")
+    assert list(cache_dir.glob("*.loxc")) == []
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="requer permissões POSIX")
+def test_cache_dir_must_be_private(cache_dir, monkeypatch):
+    private = cache_dir / "new"
+    monkeypatch.setenv("LOX_CACHE_DIR", str(private))
+    lox.parse(SRC)
+    assert private.stat().st_mode & 0o777 == 0o700
+    assert cache.load(SRC) is not None
+
+    # Uma pasta que outros usuários podem modificar é ignorada.
+    private.chmod(0o777)
+    assert cache.load(SRC) is None
+    lox.parse("print 1;")
+    assert len(list(private.glob("*.loxc"))) == 1
+
+
+def test_lark_tables_are_cached(cache_dir):
+    from lark import Lark
+
+    from lox.parser import GRAMMAR_PATH, lark_cache
+
+    path = lark_cache("test-parser")
+    assert path == str(cache_dir / "test-parser.lark")
+
+    def make():
+        return Lark(GRAMMAR_PATH.open(), parser="lalr", start="expr", cache=path)
+
+    fresh = make()
+    assert (cache_dir / "test-parser.lark").exists()
+    loaded = make()
+    assert loaded.parse("1 + 2 * x") == fresh.parse("1 + 2 * x")
+
+
+def test_lark_cache_disabled(monkeypatch):
+    from lox.parser import lark_cache
+
+    monkeypatch.setenv("LOX_NO_CACHE", "1")
+    assert lark_cache("ast-parser") is False
@@ -0,0 +1,78 @@
+"""
+Percursos na árvore não podem depender da recursão do Python.
+"""
+
+import pytest
+
+import lox
+from lox import runtime as op
+from lox.ast import BinOp, Block, Literal, Print, Program, UnaryOp, Var
+from lox.node import Node, can_print_as_leaf
+
+DEPTH = 100_000
+
+
+@pytest.fixture(scope="module")
+def nested_blocks() -> Program:
+    node = Block([Print(Literal(1.0))])
+    for _ in range(DEPTH - 1):
+        node = Block([Print(Literal(1.0)), node])
+    return Program([node])
+
+
+@pytest.fixture(scope="module")
+def long_chain() -> Program:
+    expr: Node = Var("a")
+    for _ in range(DEPTH):
+        expr = BinOp(expr, Var("a"), op.add)
+    return Program([Print(expr)])
+
+
+@pytest.mark.parametrize("tree", ["nested_blocks", "long_chain"])
+def test_walks(tree, request):
+    tree = request.getfixturevalue(tree)
+    nodes = sum(1 for _ in tree.descendants())
+    assert nodes > 2 * DEPTH
+
+    cursors = list(tree.cursor().descendants())
+    assert len(cursors) == nodes
+    # O último nó em pré-ordem, ou o operando mais à esquerda da cadeia.
+    deepest = max(cursors[-1], cursors[DEPTH + 2], key=lambda c: sum(1 for _ in c.parents()))
+    assert deepest.root().node is tree
+    assert sum(1 for _ in deepest.parents()) >= DEPTH
+
+    visited = []
+    tree.visit({Node: visited.append})
+    assert len(visited) == nodes
+    assert visited[-1] is tree
+
+    assert list(tree.lark_descendents()) == []
+    assert sum(1 for _ in tree._pretty_lines()) >= 2 * DEPTH
+
+    tree.validate_tree()
+    tree.desugar_tree()
+
+
+def test_skip_in_deep_tree(nested_blocks):
+    def skip(cursor):
+        return isinstance(cursor.node, Print)
+
+    blocks = list(nested_blocks.cursor().descendants(skip=skip, skip_self=True))
+    assert len(blocks) == DEPTH
+    assert all(isinstance(c.node, Block) for c in blocks)
+
+
+def test_long_unary_chain_is_not_printed_as_leaf():
+    expr: Node = Literal(1.0)
+    for _ in range(DEPTH):
+        expr = UnaryOp(expr, op.neg)
+    assert not can_print_as_leaf(expr)
+    lines = list(expr._pretty_lines())
+    assert lines[0] == (0, "UnaryOp(")
+    assert lines[-1] == (0, ")")
+
+
+def test_parse_deep_chain():
+    src = "var a = 1; print " + " + ".join(["a"] * DEPTH) + ";"
+    tree = lox.parse(src, cache=False)
+    assert sum(1 for _ in tree.descendants()) > 2 * DEPTH
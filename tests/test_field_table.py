@@ -0,0 +1,45 @@
+from dataclasses import dataclass
+from typing import Any
+
+import lox
+from lox.ast import BinOp, Call, Expr, Function, Literal, Var
+from lox.node import ANY, LIST, NODE, VALUE, field_table
+
+
+def test_ast_tables():
+    assert field_table(BinOp).fields == (("left", NODE), ("right", NODE), ("op", VALUE))
+    assert field_table(Function).children == (("params", LIST), ("body", NODE))
+    assert field_table(Literal).children == ()
+    assert field_table(Var) is field_table(Var)
+
+
+@dataclass
+class Custom(Expr):
+    label: str
+    extra: Any
+    forward: "Unknown"  # type: ignore[name-defined]  # noqa: F821
+    args: list[Expr]
+
+
+def test_unknown_annotations_are_checked_dynamically():
+    table = field_table(Custom)
+    assert table.names == ("label", "extra", "forward", "args")
+    assert dict(table.fields) == {"label": VALUE, "extra": ANY, "forward": ANY, "args": LIST}
+
+    a, b, c = Var("a"), Var("b"), Var("c")
+    node = Custom("x", [a], b, [c])
+    assert list(node.children()) == [a, b, c]
+    assert not node.is_leaf()
+
+    node.replace_child(b, Literal(1.0))
+    assert node.forward == Literal(1.0)
+    assert vars(node)["label"] == "x"
+
+
+def test_children_order():
+    tree = lox.parse_expr("f(1, g(2))", cache=False)
+    assert isinstance(tree, Call)
+    assert list(tree.children()) == [tree.callee, *tree.params]
+    assert [type(n).__name__ for n in tree.descendants()] == [
+        "Call", "Var", "Literal", "Call", "Var", "Literal"
+    ]
@@ -0,0 +1,149 @@
+import pytest
+
+import lox
+from lox import flat
+from lox.ast import BinOp, Function, Literal, Program, Var
+from lox.node import Node
+from lox.synth import generate
+
+SRC = """
+fun fib(n) {
+  if (n < 2) return n;
+  return fib(n - 1) + fib(n - 2);
+}
+class A {}
+var s = "olá";
+print fib(10);
+print s + "!";
+print !nil and true;
+print -3 / 2;
+"""
+
+CLOSURES = """
+fun outer(a) {
+  var b = 2;
+  fun mid() {
+    var c = 3;
+    fun inner() { return a + b + c; }
+    return inner();
+  }
+  return mid();
+}
+fun counter() {
+  var n = 0;
+  fun next() { n = n + 1; return n; }
+  return next;
+}
+var next = counter();
+next();
+print outer(1);
+print next();
+{
+  var x = "bloco";
+  for (var i = 0; i < 2; i = i + 1) { var y = x + "!"; print y; }
+}
+"""
+
+
+@pytest.fixture
+def tree():
+    return lox.parse(SRC, cache=False)
+
+
+def test_round_trip(tree):
+    image = flat.flatten(tree)
+    assert len(image) == len({id(node) for node in tree.descendants()})
+    assert image.to_node() == tree
+    assert image.root == tree and tree == image.root
+    assert image.root.pretty() == tree.pretty()
+
+
+def test_views_behave_like_nodes(tree):
+    root = flat.flatten(tree).root
+    assert isinstance(root, Program) and isinstance(root, Node)
+    fib = root.stmts[0]
+    assert isinstance(fib, Function)
+    assert fib.name == "fib"
+    assert fib.params == [Var("n")]
+    assert [type(n) for n in tree.descendants()] == [n.__class__ for n in root.descendants()]
+    assert root.stmts[0] is root.stmts[0]
+    with pytest.raises(TypeError):
+        fib.replace_child(fib.body, Literal(1.0))
+
+
+def test_shared_nodes_are_stored_once():
+    tree = lox.parse("print 1 + 1; print 1;", cache=False)
+    image = flat.flatten(tree)
+    one = image.root.stmts[0].expr.left
+    assert isinstance(image.root.stmts[0].expr, BinOp)
+    assert one is image.root.stmts[0].expr.right is image.root.stmts[1].expr
+    copy = image.to_node()
+    assert copy.stmts[0].expr.left is copy.stmts[1].expr
+
+
+def test_visit(tree):
+    root = flat.flatten(tree).root
+    expected: list[str] = []
+    tree.visit({Var: lambda node: expected.append(node.name)})
+    names: list[str] = []
+    root.visit({Var: lambda node: names.append(node.name)})
+    assert names == expected
+
+
+def test_eval(tree, capsys):
+    lox.eval(tree)
+    expected = capsys.readouterr().out
+    lox.eval(flat.flatten(tree).root)
+    assert capsys.readouterr().out == expected == "55\nolá!\ntrue\n-1.5\n"
+
+
+def test_eval_locals_and_closures(tmp_path, capsys):
+    tree = lox.parse(CLOSURES, cache=False)
+    lox.eval(tree)
+    expected = capsys.readouterr().out
+    assert expected == "6\n2\nbloco!\nbloco!\n"
+    lox.eval(flat.flatten(tree).root)
+    assert capsys.readouterr().out == expected
+
+    path = tmp_path / "closures.loxf"
+    flat.flatten(tree).save(path)
+    image = flat.load(path)
+    lox.eval(image.root)
+    assert capsys.readouterr().out == expected
+    lox.eval(image.to_node())
+    assert capsys.readouterr().out == expected
+    image.close()
+
+
+@pytest.mark.parametrize("use_mmap", [True, False])
+def test_save_and_load(tree, tmp_path, capsys, use_mmap):
+    path = tmp_path / "programa.loxf"
+    flat.flatten(tree).save(path)
+    image = flat.load(path, use_mmap=use_mmap)
+    assert image.to_node() == tree
+    lox.eval(image.root)
+    assert capsys.readouterr().out.splitlines()[0] == "55"
+    image.close()
+
+
+def test_eval_runs_passes_on_unmarked_views(capsys):
+    # Uma árvore sem marcas é validada por `lox.eval`, mas não é resolvida
+    # novamente (as views são somente leitura): usa os endereços salvos.
+    tree = lox.parse(CLOSURES, cache=False)
+    copy = flat.flatten(tree).to_node()
+    image = flat.flatten(copy)
+    assert image.passes == ()
+    lox.eval(image.root)
+    assert capsys.readouterr().out == "6\n2\nbloco!\nbloco!\n"
+
+
+def test_bad_file():
+    with pytest.raises(ValueError):
+        flat.from_buffer(b"\0" * 64)
+
+
+def test_large_program():
+    tree = lox.parse(generate(2_000, "mixed"), cache=False)
+    image = flat.from_buffer(flat.flatten(tree).to_bytes())
+    assert image.to_node() == tree
+    assert image.nbytes() < 40 * len(image)
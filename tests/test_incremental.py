@@ -0,0 +1,90 @@
+from pathlib import Path
+
+import pytest
+from lark.exceptions import UnexpectedInput
+
+import lox
+from lox.errors import SemanticError
+from lox.incremental import IncrementalParser
+from lox.scanner import scan
+from lox.split import declaration_spans
+
+EXAMPLES = Path(__file__).parent.parent / "exemplos"
+
+SRC = """
+fun fib(n) {
+    if (n < 2) return n;
+    return fib(n - 1) + fib(n - 2);
+}
+
+// comentário entre declarações
+var x = 1;
+if (x > 0) print "positivo"; else { print "negativo"; }
+for (var i = 0; i < 3; i = i + 1) print i;
+print x;
+print x;
+"""
+
+
+def spans(src: str, final: bool = True) -> list[str]:
+    return [src[i:j] for i, j in declaration_spans(scan(src), final)]
+
+
+def test_declaration_spans():
+    assert spans(SRC) == [
+        "fun fib(n) {\n    if (n < 2) return n;\n    return fib(n - 1) + fib(n - 2);\n}",
+        "var x = 1;",
+        'if (x > 0) print "positivo"; else { print "negativo"; }',
+        "for (var i = 0; i < 3; i = i + 1) print i;",
+        "print x;",
+        "print x;",
+    ]
+
+
+def test_declaration_spans_of_partial_source():
+    assert spans("print 1; print 2; pri", final=False) == ["print 1;"]
+    assert spans('print 1; print ";"; print 2;', final=False) == ["print 1;", 'print ";";']
+    assert spans('print 1; print "a; b', final=False) == ["print 1;"]
+    assert spans("if (x) print 1; el", final=False) == []
+
+
+def test_incremental_parse_reuses_unchanged_declarations():
+    parser = IncrementalParser()
+    first = parser.parse(SRC)
+    assert first == lox.parse(SRC)
+    assert (parser.reused, parser.parsed) == (0, 6)
+
+    edited = SRC.replace("fib(n - 2)", "fib(n - 2) + 0")
+    second = parser.parse(edited)
+    assert second == lox.parse(edited)
+    assert (parser.reused, parser.parsed) == (5, 1)
+    assert second is not first
+    assert second.stmts[0] is not first.stmts[0]
+    assert all(new is old for new, old in zip(second.stmts[1:], first.stmts[1:]))
+
+    # Declarações idênticas não compartilham o mesmo nó.
+    assert second.stmts[-1] is not second.stmts[-2]
+
+
+def test_incremental_parse_matches_parse_on_examples():
+    parser = IncrementalParser()
+    for path in sorted(EXAMPLES.rglob("*.lox")):
+        src = path.read_text()
+        try:
+            expected = lox.parse(src, cache=False)
+        except (UnexpectedInput, SemanticError) as exc:
+            with pytest.raises(type(exc)) as info:
+                parser.parse(src)
+            assert str(getattr(info.value, "token", None)) == str(
+                getattr(exc, "token", None)
+            )
+        else:
+            assert parser.parse(src) == expected
+
+
+def test_incremental_parse_reports_the_first_error():
+    parser = IncrementalParser()
+    src = "var x = 1; var and = 2; print x +;"
+    with pytest.raises(UnexpectedInput) as info:
+        parser.parse(src)
+    assert str(info.value.token) == ";"
@@ -0,0 +1,62 @@
+import pytest
+
+import lox
+from lox.ast import Literal, Var
+
+SRC = """
+var i = 1;
+var j = 1;
+print i + j + 1.0 + true + nil;
+print "a" + "a";
+for (;;) { i = nil; }
+"""
+
+
+def nodes(tree, cls):
+    return [node for node in tree.descendants() if isinstance(node, cls)]
+
+
+@pytest.mark.parametrize("backend", ["lark", "pratt"])
+def test_literals_are_shared_within_a_parse(backend):
+    tree = lox.parse(SRC, cache=False, backend=backend)
+    literals = nodes(tree, Literal)
+    by_value = {}
+    for node in literals:
+        by_value.setdefault((type(node.value), node.value), set()).add(id(node))
+    assert all(len(ids) == 1 for ids in by_value.values())
+    assert len(literals) > len(by_value)
+
+    # True == 1.0 em Python, mas os nós devem ser diferentes.
+    assert (bool, True) in by_value and (float, 1.0) in by_value
+
+    other = lox.parse(SRC, cache=False, backend=backend)
+    assert other == tree
+    assert not {id(node) for node in nodes(other, Literal)} & {id(n) for n in literals}
+
+
+@pytest.mark.parametrize("backend", ["lark", "pratt"])
+def test_names_are_interned(backend):
+    tree = lox.parse(
+        "var counter = 0; counter = counter + counter; print counter;",
+        cache=False,
+        backend=backend,
+    )
+    names = [node.name for node in nodes(tree, Var)]
+    assert len(names) == 3
+    assert all(name is names[0] for name in names)
+
+
+def test_shared_literals_keep_their_positions():
+    from lox.positions import source_map
+
+    tree = lox.parse("print 1;\nprint 1;", cache=False)
+    positions = [loc for node, loc in source_map(tree).locations() if isinstance(node, Literal)]
+    assert [(loc.line, loc.column) for loc in positions] == [(1, 7), (2, 7)]
+
+
+def test_shared_literals_are_immutable():
+    tree = lox.parse("print 1; print 1;", cache=False)
+    first, second = nodes(tree, Literal)
+    assert first is second
+    with pytest.raises(AttributeError):
+        first.value = 2.0
@@ -0,0 +1,178 @@
+import subprocess
+import sys
+
+import pytest
+
+import lox
+from lox import runtime
+from lox.ast import BinOp, Block, Class, Function, If, Literal, Print, Return, UnaryOp, Var, While
+from lox.optimizer import eliminate_dead_code, fold, is_numeric, removals, terminates
+from lox.passes import is_marked, run_passes
+
+
+def folded(src: str):
+    return fold(lox.parse_expr(src, cache=False))
+
+
+@pytest.mark.parametrize(
+    "src, value",
+    [
+        ("60 * 60 * 24", 86400.0),
+        ('"a" + "b"', "ab"),
+        ("-(1)", -1.0),
+        ("!nil", True),
+        ("1 < 2 == true", True),
+        ('1 == "1"', False),
+        ("nil and x", None),
+        ("false or 2", 2.0),
+        ("0 and 1", 1.0),
+        ('"" or x', ""),
+    ],
+)
+def test_fold_literals(src, value):
+    expr = folded(src)
+    assert isinstance(expr, Literal)
+    assert expr.value == value and type(expr.value) is type(value)
+
+
+@pytest.mark.parametrize("src", ["1 / 0", '1 + "a"', '-"a"', '"a" < "b"', "(1 / 0) + 2"])
+def test_errors_are_kept(src):
+    expr = folded(src)
+    assert isinstance(expr, (BinOp, UnaryOp))
+    with pytest.raises(runtime.LoxError):
+        expr.eval(lox.Ctx())
+
+
+def test_partial_folding():
+    expr = folded("x + 2 * 3")
+    assert isinstance(expr, BinOp) and expr.right == Literal(6.0)
+    assert folded("true and x") == Var("x")
+
+
+def test_identities_only_for_numbers():
+    assert folded("(a - b) * 1") == lox.parse_expr("a - b")
+    assert folded("1 * -a") == lox.parse_expr("-a")
+    assert folded("(a * b) / 1") == lox.parse_expr("a * b")
+    assert folded("-(-(a - b))") == lox.parse_expr("a - b")
+    assert folded("(a - b) - 0") == lox.parse_expr("a - b")
+    # x pode ser uma string: a multiplicação precisa falhar em tempo de execução.
+    assert isinstance(folded("x * 1"), BinOp)
+    assert isinstance(folded("(a - b) + 0"), BinOp)
+    assert isinstance(folded("(a - b) - -0"), BinOp)
+    assert is_numeric(lox.parse_expr("(a * 2) + 1"))
+    assert not is_numeric(lox.parse_expr("a + 1"))
+
+
+def test_program_output(capsys):
+    src = """
+    var day = 60 * 60 * 24;
+    print day;
+    for (var i = 0; i < 2 + 1; i = i + 1) print "i = " + "" + "x";
+    print -(-(day - 1)) * 1;
+    """
+    lox.eval(src)
+    expected = capsys.readouterr().out
+    tree = run_passes(lox.parse(src, cache=False), ["fold"])
+    assert is_marked(tree, "fold")
+    assert not [node for node in tree.descendants() if isinstance(node, UnaryOp)]
+    lox.eval(tree)
+    assert capsys.readouterr().out == expected
+
+
+def test_cli_optimize(tmp_path):
+    path = tmp_path / "fold.lox"
+    path.write_text("print 2 * 3 + 1;\n")
+    cmd = [sys.executable, "-m", "lox", "-O", "--ast", str(path)]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr
+    assert "BinOp" not in proc.stdout and "value=7.0" in proc.stdout
+    proc = subprocess.run([sys.executable, "-m", "lox", "-O", str(path)], capture_output=True, text=True)
+    assert proc.stdout == "7\n"
+
+
+DEAD = """
+fun used(n) {
+  if (n < 1) return 0;
+  return n + used(n - 1);
+  print "nunca";
+}
+fun unused() { return helper(); }
+fun helper() { return 1; }
+class Unused {}
+class Used {}
+fun f() {
+  if (1 > 2) { print "não"; } else { print "sim"; }
+  while (false) print "laço";
+  if (true) return "ret";
+  print "depois";
+}
+fun g() { while (true) { return 1; } print "x"; }
+print used(3);
+print f();
+print g();
+print Used;
+"""
+
+
+def functions(tree) -> dict:
+    return {node.name: node for node in tree.stmts if isinstance(node, (Function, Class))}
+
+
+def test_dce_output(capsys):
+    lox.eval(DEAD)
+    expected = capsys.readouterr().out
+    tree = run_passes(lox.parse(DEAD, cache=False), ["dce"])
+    assert is_marked(tree, "fold") and is_marked(tree, "dce")
+    lox.eval(tree)
+    assert capsys.readouterr().out == expected == "6\nsim\nret\n1\nUsed\n"
+
+
+def test_dce_removes_dead_code():
+    tree = eliminate_dead_code(fold(lox.parse(DEAD, cache=False)))
+    decls = functions(tree)
+    assert set(decls) == {"used", "Used", "f", "g"}
+    assert isinstance(decls["used"].body.stmts[-1], Return)
+    f = decls["f"].body.stmts
+    assert [type(stmt) for stmt in f] == [Block, Return]
+    assert f[0].stmts == [Print(Literal("sim"))]
+    assert [type(stmt) for stmt in decls["g"].body.stmts] == [While]
+    assert not [node for node in tree.descendants() if isinstance(node, If) and isinstance(node.condition, Literal)]
+
+
+def test_dce_report():
+    with removals() as removed:
+        run_passes(lox.parse(DEAD, cache=False), ["dce"])
+    assert removed == {"unreachable": 6, "branch": 12, "unused": 10}
+
+    explicit: dict[str, int] = {}
+    eliminate_dead_code(lox.parse("if (nil) print 1; else print 2;", cache=False), explicit)
+    assert explicit == {"branch": 4}
+
+
+def test_dce_keeps_reachable_declarations():
+    src = """
+    fun a() { return b(); }
+    fun b() { return c; }
+    var c = 1;
+    fun d() { return d(); }
+    print a();
+    """
+    tree = eliminate_dead_code(lox.parse(src, cache=False))
+    assert set(functions(tree)) == {"a", "b"}
+
+
+def test_terminates():
+    tree = eliminate_dead_code(lox.parse("fun f(x) { if (x) return 1; else { return 2; } print 3; } f(1);", cache=False))
+    body = functions(tree)["f"].body
+    assert len(body.stmts) == 1 and terminates(body)
+    assert not terminates(lox.parse("while (x) { return 1; }", cache=False).stmts[0])
+
+
+def test_cli_dce_report(tmp_path):
+    path = tmp_path / "dead.lox"
+    path.write_text(DEAD)
+    cmd = [sys.executable, "-m", "lox", "-O", "--dce-report", str(path)]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr
+    assert proc.stdout == "6\nsim\nret\n1\nUsed\n"
+    assert "total" in proc.stderr and "28" in proc.stderr
@@ -0,0 +1,60 @@
+import random
+
+import pytest
+
+import lox
+from lox.parallel_scan import scan_parallel, split_points
+from lox.scanner import scan
+
+SRC = """
+var s = "uma string
+com // quebras de linha
+e \\" aspas";
+// comentário com "aspas
+print s; // outro " comentário
+var t = "a" + "b
+";
+fun f(x) { return x / 2; }
+"""
+
+
+def random_source(seed: int, size: int = 3000) -> str:
+    rng = random.Random(seed)
+    pieces = ['"', "//", "/", "\n", " ", "x", "1.5", "var", ";", "{", "}", '"a\nb"', "@"]
+    return "".join(rng.choice(pieces) for _ in range(size))
+
+
+def test_split_points_are_safe():
+    for seed in range(20):
+        src = random_source(seed)
+        expected = scan(src).data
+        for parts in (2, 5, 17):
+            points = split_points(src, parts)
+            assert points == sorted(set(points))
+            bounds = [0, *(p + 1 for p in points), len(src)]
+            data = []
+            for a, b in zip(bounds, bounds[1:]):
+                tokens = scan(src[a:b])
+                data.extend(x + a if i % 3 else x for i, x in enumerate(tokens.data))
+            assert data == list(expected), (seed, parts)
+
+
+def test_split_points_skip_strings():
+    points = split_points(SRC, 8)
+    strings = [(tok.start, tok.end) for tok in scan(SRC) if SRC[tok.start] == '"']
+    assert points
+    for point in points:
+        assert SRC[point] == "\n"
+        assert not any(a < point < b for a, b in strings)
+
+
+@pytest.mark.parametrize("keep_comments", [False, True])
+def test_scan_parallel_matches_scan(keep_comments):
+    src = SRC * 50
+    tokens = scan_parallel(src, workers=3, keep_comments=keep_comments, min_chunk=100)
+    assert tokens.data == scan(src, keep_comments).data
+
+
+def test_lex_with_workers():
+    src = SRC * 20000
+    assert list(lox.lex(src, workers=2)) == list(lox.lex(src))
@@ -0,0 +1,95 @@
+import pytest
+
+import lox
+from lox.ast import Block, Class, Function, Literal, Print, Program, Return, Var
+from lox.node import Cursor, ParentIndex
+
+SRC = """
+class A {}
+fun outer(x) {
+  fun inner(y) {
+    { return y + 1; }
+  }
+  return inner(x) + 1;
+}
+print 1;
+"""
+
+
+def nodes_of(tree, cls):
+    return [node for node in tree.descendants() if isinstance(node, cls)]
+
+
+@pytest.fixture
+def tree():
+    return lox.parse(SRC, cache=False)
+
+
+def test_parent_and_path(tree):
+    index = ParentIndex(tree)
+    outer, inner = nodes_of(tree, Function)
+    assert len(index) == sum(1 for _ in tree.descendants()) - 2  # 1.0 é compartilhado
+    assert index.parent(tree) is None
+    assert index.parent(inner) is outer.body
+    assert index.path(inner) == [tree, outer, outer.body, inner]
+    assert list(index.ancestors(inner)) == [outer.body, outer, tree]
+    assert index.path(Var("x")) is None
+
+
+def test_enclosing(tree):
+    index = ParentIndex(tree)
+    outer, inner = nodes_of(tree, Function)
+    ret = nodes_of(inner, Return)[0]
+    assert index.enclosing(ret, Function) is inner
+    assert index.enclosing(inner, Function) is outer
+    assert index.enclosing(outer, Function) is None
+    assert index.enclosing(ret, Block) is index.parent(ret)
+    assert index.enclosing(ret, Class) is None
+
+
+def test_shared_literals(tree):
+    index = ParentIndex(tree)
+    one = Literal(1.0)
+    occurrences = [node for node in tree.descendants() if node == one]
+    assert len(occurrences) == 3
+    assert all(node is occurrences[0] for node in occurrences)
+    shared = occurrences[0]
+    assert index.parent(shared) is not None
+    assert index.parent(one) is None
+    assert shared.cursor(tree.cursor()).node is shared
+
+
+def test_cursor_scopes(tree):
+    outer, inner = nodes_of(tree, Function)
+    ret = nodes_of(inner, Return)[0]
+    cursor = ret.cursor(tree.cursor())
+    assert [c.node for c in cursor.parents()][-1] is tree
+    assert cursor.function_scope().node is inner
+    assert cursor.function_scope(root=True).node is outer
+    assert cursor.is_scoped_to(Function)
+    assert cursor.is_scoped_to(Block)
+    assert not cursor.is_scoped_to(Class)
+    with pytest.raises(ValueError):
+        cursor.class_scope()
+
+    cls = Class("A")
+    method = Function("m", [], Block([Print(Var("x"))]))
+    program = Program([cls, method])
+    printed = method.body.stmts[0]
+    inner_cursor = Cursor(printed, Cursor(method.body, Cursor(method, Cursor(cls, Cursor(program)))))
+    assert inner_cursor.class_scope().node is cls
+    assert inner_cursor.function_scope().node is method
+
+
+def test_cursor_after_modification(tree):
+    root = tree.cursor()
+    outer, inner = nodes_of(tree, Function)
+    assert inner.cursor(root).parent().node is outer.body
+
+    # O índice guardado no cursor fica desatualizado e deve ser reconstruído.
+    block = Block([inner])
+    outer.body.stmts[0] = block
+    assert inner.cursor(root).parent().node is block
+
+    with pytest.raises(ValueError):
+        Var("nope").cursor(root)
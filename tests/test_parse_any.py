@@ -0,0 +1,65 @@
+import pytest
+from lark.exceptions import UnexpectedInput
+
+import lox
+from lox import parser as lox_parser
+from lox.ast import Assign, BinOp, Program
+
+CASES = [
+    "1 + 2",
+    "x = y = 3",
+    "print 1;",
+    "",
+    "var x = 1; print x;",
+    "f(1)(2)",
+    "or",
+    "{ print 1; }",
+]
+ERRORS = ["print x +;", "(1", "1 2", "x; y", "fun f() {} f()", "print", "1;2"]
+
+
+def test_parse_any_decides_expression_or_program():
+    assert isinstance(lox.parse_any("1 + 2", cache=False), BinOp)
+    assert isinstance(lox.parse_any("x = 3", cache=False), Assign)
+    assert lox.parse_any("1 + 2;", cache=False) == lox.parse("1 + 2;", cache=False)
+    assert lox.parse_any("", cache=False) == Program([])
+
+
+@pytest.mark.parametrize("src", CASES)
+def test_backends_agree(src):
+    lark_tree = lox.parse_any(src, cache=False, backend="lark")
+    assert lox.parse_any(src, cache=False, backend="pratt") == lark_tree
+    if isinstance(lark_tree, Program):
+        assert lark_tree == lox.parse(src, cache=False)
+    else:
+        assert lark_tree == lox.parse_expr(src, cache=False)
+
+
+@pytest.mark.parametrize("src", ERRORS)
+def test_backend_errors_agree(src):
+    errors = []
+    for backend in ("lark", "pratt"):
+        with pytest.raises(UnexpectedInput) as info:
+            lox.parse_any(src, cache=False, backend=backend)
+        errors.append((str(getattr(info.value, "token", "")), info.value.line, info.value.column))
+    assert errors[0] == errors[1]
+
+
+def test_single_pass(monkeypatch):
+    calls = []
+    run_parser = lox_parser.run_parser
+
+    def counting(src, start, backend=None):
+        calls.append(start)
+        return run_parser(src, start, backend)
+
+    monkeypatch.setattr(lox_parser, "run_parser", counting)
+    lox.parse_any("print 1 + 2;", cache=False)
+    with pytest.raises(UnexpectedInput):
+        lox.parse_any("print 1 +;", cache=False)
+    assert calls == ["repl", "repl"]
+
+
+def test_eval_accepts_expressions():
+    assert lox.eval("1 + 2 * 3") == 7
+    assert lox.eval("x * 2", {"x": 21.0}) == 42
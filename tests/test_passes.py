@@ -0,0 +1,172 @@
+import io
+from contextlib import redirect_stdout
+
+import pytest
+
+import lox
+import lox.parser as lox_parser
+from lox import passes
+from lox.ast import Literal, Print, Program, Var
+from lox.errors import SemanticError
+from lox.incremental import IncrementalParser
+from lox.passes import Pass, PassManager, is_marked, run_passes, timed
+from lox.testing import Example
+
+SRC = "var a = 1; print a + 2;"
+
+
+@pytest.fixture
+def count_validations(monkeypatch):
+    calls = []
+    monkeypatch.setattr(Print, "validate_self", lambda self, cursor: calls.append(self))
+    return calls
+
+
+def test_parse_marks_tree_and_eval_skips_validation(count_validations):
+    tree = lox.parse(SRC, cache=False)
+    assert is_marked(tree, "validate") and is_marked(tree, "desugar")
+    assert len(count_validations) == 1
+
+    with redirect_stdout(io.StringIO()):
+        lox.eval(tree)
+    assert len(count_validations) == 1
+
+    run_passes(tree, ["validate"], force=True)
+    assert len(count_validations) == 2
+
+    program = Program([Print(Literal(1.0))])
+    with redirect_stdout(io.StringIO()):
+        lox.eval(program)
+        lox.eval(program)
+    assert len(count_validations) == 3
+
+
+def test_cached_and_incremental_trees_are_marked(tmp_path, monkeypatch):
+    monkeypatch.setenv("LOX_CACHE_DIR", str(tmp_path))
+    lox.parse(SRC, cache=True)
+    assert is_marked(lox.parse(SRC, cache=True), "validate")
+    assert is_marked(IncrementalParser().parse(SRC), "desugar")
+
+
+def test_fused_traversal():
+    log = []
+    manager = PassManager(
+        [
+            Pass("a", visit=lambda c: log.append(("a", type(c.node).__name__)), fusable=True),
+            Pass("b", visit=lambda c: log.append(("b", type(c.node).__name__)), requires=("a",), fusable=True),
+        ]
+    )
+    tree = Program([Print(Var("x"))])
+    manager.run(tree, ["b"])
+    assert log == [
+        ("a", "Program"), ("b", "Program"),
+        ("a", "Print"), ("b", "Print"),
+        ("a", "Var"), ("b", "Var"),
+    ]
+    manager.run(tree)
+    assert len(log) == 6
+    passes.invalidate(tree)
+    manager.run(tree, ["a"])
+    assert len(log) == 9
+
+
+def test_passes_that_are_not_fusable_get_their_own_walk():
+    log = []
+
+    def rename(cursor):
+        log.append(("rename", type(cursor.node).__name__))
+        if isinstance(cursor.node, Var):
+            cursor.node.name = "y"
+
+    manager = PassManager(
+        [
+            Pass("check", visit=lambda c: log.append(("check", getattr(c.node, "name", None))), fusable=True),
+            Pass("rename", visit=rename),
+        ]
+    )
+    manager.run(Program([Print(Var("x"))]))
+    assert log == [
+        ("check", None), ("check", None), ("check", "x"),
+        ("rename", "Program"), ("rename", "Print"), ("rename", "Var"),
+    ]
+
+
+def test_validate_and_desugar_share_one_walk(monkeypatch):
+    log = []
+    walks = []
+    visit = passes._visit
+    monkeypatch.setattr(passes, "_visit", lambda *args: walks.append(1) or visit(*args))
+    for cls in (Print, Literal):
+        name = cls.__name__
+        monkeypatch.setattr(cls, "validate_self", lambda self, cursor, name=name: log.append(("validate", name)))
+        monkeypatch.setattr(cls, "desugar_self", lambda self, name=name: log.append(("desugar", name)))
+    run_passes(Program([Print(Literal(1.0)), Print(Literal(2.0))]), ["validate", "desugar"])
+    assert len(walks) == 1
+    # Cada subárvore é validada inteira antes da remoção de açúcar da raiz.
+    assert log == [
+        ("validate", "Print"), ("validate", "Literal"), ("desugar", "Literal"), ("desugar", "Print"),
+    ] * 2
+
+
+def test_pre_order_passes_after_post_order_passes_get_a_new_walk():
+    log = []
+    manager = PassManager(
+        [
+            Pass("up", visit=lambda c: log.append(("up", type(c.node).__name__)), post=True, fusable=True),
+            Pass("down", visit=lambda c: log.append(("down", type(c.node).__name__)), fusable=True),
+        ]
+    )
+    manager.run(Program([Print(Var("x"))]))
+    assert log == [
+        ("up", "Var"), ("up", "Print"), ("up", "Program"),
+        ("down", "Program"), ("down", "Print"), ("down", "Var"),
+    ]
+
+
+def test_tree_pass_replaces_root():
+    manager = PassManager(
+        [
+            Pass("check", visit=lambda c: None),
+            Pass("wrap", run=lambda tree: Program([tree])),
+        ]
+    )
+    root = manager.run(Print(Literal(1.0)))
+    assert isinstance(root, Program)
+    assert is_marked(root, "check") and is_marked(root, "wrap")
+
+
+def test_errors():
+    with pytest.raises(ValueError):
+        Pass("empty")
+    with pytest.raises(ValueError):
+        PassManager([Pass("b", visit=print, requires=("a",))])
+    with pytest.raises(ValueError):
+        run_passes(Program([]), ["unknown"])
+    with pytest.raises(SemanticError) as info:
+        lox.parse("var a; fun f(x, x) {}", cache=False)
+    assert info.value.node is not None
+
+
+def test_timings():
+    with timed() as timings:
+        lox.parse(SRC, cache=False)
+    assert set(timings) == {"validate", "desugar", "resolve", "walk"}
+    assert all(seconds >= 0 for seconds in timings.values())
+
+    explicit: dict[str, float] = {}
+    run_passes(Program([]), force=True, timings=explicit)
+    assert set(explicit) == {"validate", "desugar", "fold", "dce", "resolve", "walk"}
+
+
+def test_example_is_parsed_once(monkeypatch):
+    calls = []
+    run_parser = lox_parser.run_parser
+
+    def counting(src, start, backend=None):
+        calls.append(start)
+        return run_parser(src, start, backend)
+
+    monkeypatch.setenv("LOX_NO_CACHE", "1")
+    monkeypatch.setattr(lox_parser, "run_parser", counting)
+    Example("var x = 40;\nprint x + 2; // expect: 42\n").test_example()
+    assert calls == ["start"]
@@ -0,0 +1,153 @@
+import gc
+import io
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import pytest
+
+import lox
+from lox.ast import BinOp, Call, Function, Print, Var, VarDef
+from lox.errors import SemanticError
+from lox.incremental import IncrementalParser
+from lox.positions import Location, _SOURCE_MAPS, error_location, locate, source_map
+from lox.stream import iter_declarations
+
+EXAMPLES = Path(__file__).parent.parent / "exemplos"
+
+SRC = """var a = 1;
+fun f(x) {
+  return x + nil;
+}
+print   f(a);
+"""
+
+
+def nodes_of(tree, cls):
+    return [node for node in tree.descendants() if isinstance(node, cls)]
+
+
+@pytest.mark.parametrize("backend", ["lark", "pratt"])
+def test_node_positions(backend):
+    tree = lox.parse(SRC, cache=False, backend=backend)
+    fn = nodes_of(tree, Function)[0]
+    binop = nodes_of(tree, BinOp)[0]
+    call = nodes_of(tree, Call)[0]
+    assert locate(fn) == Location("<string>", 2, 1)
+    assert locate(fn.params[0]) == Location("<string>", 2, 7)
+    assert locate(binop) == Location("<string>", 3, 10)
+    assert locate(nodes_of(tree, Print)[0]) == Location("<string>", 5, 1)
+    assert locate(call) == Location("<string>", 5, 9)
+    assert str(locate(call)) == "<string>:5:9"
+
+
+def test_table_is_compact_and_lazy():
+    tree = lox.parse(SRC, cache=False)
+    positions = source_map(tree)
+    assert positions is not None
+    assert positions._offsets is None
+    nodes = sum(1 for _ in tree.descendants())
+    assert len(positions.offsets) == nodes
+    assert positions.offsets.itemsize == 4
+    assert positions.nbytes() == 4 * (nodes + SRC.count("\n") + 1)
+    assert positions.src is None
+
+
+def test_registry_is_released_with_the_tree():
+    tree = lox.parse(SRC, cache=False)
+    key = id(tree)
+    assert key in _SOURCE_MAPS
+    del tree
+    gc.collect()
+    assert key not in _SOURCE_MAPS
+
+
+def test_parse_expr_and_cached_trees():
+    expr = lox.parse_expr("1 +\n  foo", cache=False)
+    assert locate(expr.right) == Location("<string>", 2, 3)
+
+    lox.parse(SRC, cache=True)
+    tree = lox.parse(SRC, cache=True)
+    assert locate(nodes_of(tree, BinOp)[0]) == Location("<string>", 3, 10)
+
+
+def test_semantic_error_location():
+    with pytest.raises(SemanticError) as info:
+        lox.parse("var a = 1;\n\nfun f(x, x) {}", cache=False)
+    assert isinstance(info.value.node, Var)
+    assert info.value.location == Location("<string>", 3, 10)
+
+    with pytest.raises(SemanticError) as info:
+        lox.parse("{\n  var a = 1;\n  var a = 2;\n}", cache=False)
+    assert isinstance(info.value.node, VarDef)
+    assert info.value.location == Location("<string>", 3, 3)
+
+
+def test_runtime_error_location():
+    with redirect_stdout(io.StringIO()) as stdout:
+        with pytest.raises(Exception) as info:
+            lox.eval(SRC)
+    assert "Posição: <string>:3:10" in stdout.getvalue()
+
+    tree = lox.parse(SRC, cache=False)
+    with redirect_stdout(io.StringIO()):
+        with pytest.raises(Exception) as info:
+            lox.eval(tree)
+    assert error_location(info.value) == Location("<string>", 3, 10)
+
+
+def test_incremental_and_stream_positions():
+    parser = IncrementalParser()
+    parser.parse(SRC)
+    program = parser.parse("\n" + SRC)
+    assert locate(nodes_of(program, Print)[0]) == Location("<string>", 6, 1)
+
+    file = io.StringIO("\n" * 10 + SRC)
+    file.name = "script.lox"
+    # Cada trecho só fica registrado enquanto está sendo executado.
+    for stmt in iter_declarations(file, chunk_size=8):
+        if isinstance(stmt, Print):
+            call = nodes_of(stmt, Call)[0]
+            assert locate(call) == Location("script.lox", 15, 9)
+
+
+def test_corpus_variables():
+    for path in sorted(EXAMPLES.rglob("*.lox")):
+        if path.parent.name == "benchmark":
+            continue
+        src = path.read_text()
+        try:
+            tree = lox.parse(src, cache=False)
+        except Exception:
+            continue
+        positions = source_map(tree)
+        assert positions is not None
+        for node, location in positions.locations():
+            if isinstance(node, Var):
+                line = src.splitlines()[location.line - 1]
+                assert line.startswith(node.name, location.column - 1), (path, node)
+
+
+def test_index_is_built_once():
+    tree = lox.parse(SRC * 50, cache=False)
+    positions = source_map(tree)
+    assert positions is not None
+    nodes = list(tree.descendants())
+    table_bytes = positions.nbytes()
+    assert [positions.index(node) for node in nodes[:3]] == [0, 1, 2]
+    assert positions.nbytes() > table_bytes + 8 * len(nodes)
+    assert positions._ids is not None and len(positions._ids) <= len(nodes)
+    assert positions.index(Var("outra")) is None
+    assert all(positions.location(node) is not None for node in nodes)
+
+
+def test_positions_use_the_lark_grammar(monkeypatch):
+    # A tabela é construída com a gramática do Lark, e não com `lox.pratt`:
+    # extensões de `grammar.lark` continuam com posições corretas.
+    import lox.pratt
+
+    def fail(*args, **kwargs):
+        raise AssertionError("o parser Pratt não deve ser usado")
+
+    monkeypatch.setattr(lox.pratt.Parser, "__init__", fail)
+    tree = lox.parse(SRC, cache=False)
+    assert locate(nodes_of(tree, Call)[0]) == Location("<string>", 5, 9)
@@ -0,0 +1,113 @@
+from pathlib import Path
+
+import pytest
+from lark.exceptions import UnexpectedCharacters, UnexpectedToken
+
+import lox
+from lox.parser import get_ast_parser
+from lox.pratt import pratt_parse
+
+EXAMPLES = Path(__file__).parent.parent / "exemplos"
+SOURCES = sorted(EXAMPLES.rglob("*.lox"))
+
+
+def outcome(parse, src: str, start: str = "start"):
+    """
+    Resultado da análise: a AST ou uma descrição do erro de sintaxe.
+    """
+    try:
+        return parse(src, start)
+    except UnexpectedToken as e:
+        return ("token", e.token.type, str(e.token), e.token.line, e.token.column)
+    except UnexpectedCharacters as e:
+        return ("char", e.line, e.column)
+
+
+def lark_parse(src: str, start: str = "start"):
+    return get_ast_parser("lark").parse(src, start=start)
+
+
+def check(src: str, start: str = "start"):
+    assert outcome(pratt_parse, src, start) == outcome(lark_parse, src, start)
+
+
+@pytest.mark.parametrize("path", SOURCES, ids=lambda p: str(p.relative_to(EXAMPLES)))
+def test_pratt_matches_lark_on_examples(path: Path):
+    check(path.read_text())
+
+
+@pytest.mark.parametrize(
+    "src",
+    [
+        "print 1 + 2 * 3 - -4 / 2;",
+        "print a or b and c or d;",
+        "print 1 < 2 == 3 >= 4 != !5;",
+        "a = b.c = d().e = f;",
+        "print a.b.c(1, 2)(3).d;",
+        "for (;;) print 1;",
+        "for (var i = 0; i < 10; i = i + 1) { print i; }",
+        "for (i = 0; i < 10;) print i;",
+        "if (a) if (b) print 1; else print 2;",
+        "fun f(a, b) { return; } fun g() { return a; }",
+        "class A {} var x; var y = nil;",
+        'print "string" + "";',
+    ],
+)
+def test_pratt_matches_lark_on_valid_programs(src: str):
+    check(src)
+    assert outcome(pratt_parse, src) == lark_parse(src)
+
+
+@pytest.mark.parametrize(
+    "src",
+    [
+        # Erros comuns
+        "print 1 +;",
+        "(a) = 1;",
+        "a + b = c;",
+        "a() = 1;",
+        "fun f(a,) {}",
+        "f(1,);",
+        "{ print 1;",
+        "class A { fun f() {} }",
+        'print "sem fim;',
+        "print 1 @ 2;",
+        "print 1; @",
+        "fun f() print 1;",
+        # Comportamento do lexer contextual do Lark
+        "while (true) var x = 1;",
+        "fun print() {} print and; print this;",
+        "var nilable = 1; var trueish; a.falsey = 1;",
+        "var x == 1;",
+        "print != 1;",
+        "print 1 ortrue;",
+        "x = 1; else print 1;",
+        "var x; else = 1;",
+        "for (var i = 0; for;) print i;",
+        "for (i = 0; for;) print i;",
+        "class A {} else;",
+    ],
+)
+def test_pratt_matches_lark_on_errors(src: str):
+    check(src)
+
+
+@pytest.mark.parametrize("src", ["1 + 2 * x", "a = b.c = 1", "f(1)(2).x", "1 2", ""])
+def test_pratt_matches_lark_on_expressions(src: str):
+    check(src, "expr")
+
+
+def test_backend_selection(monkeypatch):
+    src = "var x = 1; print x + 2;"
+    assert lox.parse(src, backend="pratt") == lox.parse(src, backend="lark")
+    assert lox.parse_expr("1 + x", backend="pratt") == lox.parse_expr("1 + x")
+
+    monkeypatch.setenv("LOX_PARSER", "pratt")
+    with pytest.raises(UnexpectedToken) as info:
+        lox.parse("var 1;")
+    assert info.value.token == "1"
+    assert [str(tok) for tok in info.value.token_history] == ["var"]
+
+    monkeypatch.setenv("LOX_PARSER", "yacc")
+    with pytest.raises(ValueError):
+        lox.parse(src)
@@ -0,0 +1,75 @@
+import io
+import subprocess
+import sys
+
+import lox
+from lox.synth import generate
+
+SRC = """
+var a = 1;
+fun f(x) {
+  if (x) { print x; } else { print -x; }
+  return x + a;
+}
+print f(2);
+"""
+
+
+class Recorder(io.StringIO):
+    # Registra o tamanho de cada escrita.
+    def __init__(self):
+        super().__init__()
+        self.writes: list[int] = []
+
+    def write(self, data):
+        self.writes.append(len(data))
+        return super().write(data)
+
+
+def test_write_pretty_matches_pretty():
+    tree = lox.parse(SRC, cache=False)
+    out = io.StringIO()
+    tree.write_pretty(out)
+    assert out.getvalue() == tree.pretty()
+    out = io.StringIO()
+    tree.write_pretty(out, indent=4)
+    assert out.getvalue() == tree.pretty(4)
+
+
+def test_write_pretty_streams_in_chunks():
+    tree = lox.parse(generate(3_000, "mixed"), cache=False)
+    out = Recorder()
+    tree.write_pretty(out)
+    assert len(out.writes) > 2
+    assert max(out.writes) < len(out.getvalue()) / 2
+    assert out.getvalue() == tree.pretty()
+
+
+def test_max_depth():
+    tree = lox.parse(SRC, cache=False)
+    assert tree.pretty(max_depth=0) == "Program(...)\n"
+    lines = tree.pretty(max_depth=1).splitlines()
+    assert lines[2] == "    VarDef(name='a', initializer=Literal(value=1.0))"
+    assert lines[3] == "    Function(...),"
+    assert "body=Block(...)" in tree.pretty(max_depth=2)
+    assert "body=Block(\n" in tree.pretty(max_depth=3)
+
+
+def test_max_children():
+    tree = lox.parse("print 1; print 2; print 3; print 4;", cache=False)
+    text = tree.pretty(max_children=2)
+    assert text.count("Print(") == 2
+    assert "... (+2 itens omitidos)" in text
+    assert tree.pretty(max_children=4) == tree.pretty()
+
+
+def test_cli_ast(tmp_path):
+    path = tmp_path / "big.lox"
+    path.write_text(generate(500, "nesting"))
+    cmd = [sys.executable, "-m", "lox", "--ast", "--max-depth", "2", "--max-children", "5", str(path)]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr
+    lines = proc.stdout.splitlines()
+    assert lines[0] == "Program("
+    assert lines[-3].strip().startswith("... (+")
+    assert len(lines) < 60
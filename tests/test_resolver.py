@@ -0,0 +1,126 @@
+import pytest
+
+import lox
+from lox.ast import Assign, Block, Function, Var
+from lox.ctx import UNSET, Ctx
+from lox.node import Node, field_table
+from lox.resolver import resolve
+
+SRC = """
+fun outer() {
+  var a = 1;
+  fun inner() { a = a + 1; return a; }
+  return inner;
+}
+var counter = outer();
+counter();
+print counter();
+
+fun early() { return later; }
+var later = "depois";
+print early();
+
+fun is_even(n) { if (n == 0) return true; return is_odd(n - 1); }
+fun is_odd(n) { if (n == 0) return false; return is_even(n - 1); }
+print is_even(10);
+
+{
+  var x = "fora";
+  {
+    var x = "dentro";
+    print x;
+  }
+  print x;
+}
+
+fun f(n) {
+  var total = 0;
+  for (var i = 0; i < n; i = i + 1) { total = total + i; }
+  return total;
+}
+print f(5);
+"""
+
+
+def unresolve(tree: Node) -> None:
+    # Remove os endereços calculados pelo resolvedor.
+    for node in tree.descendants():
+        for name in getattr(type(node), "__dataclass_fields__", {}):
+            if name not in field_table(type(node)).names:
+                setattr(node, name, type(node).__dataclass_fields__[name].default)
+
+
+def find(tree: Node, cls: type, name: str) -> list:
+    return [node for node in tree.descendants() if isinstance(node, cls) and node.name == name]
+
+
+def test_addresses():
+    tree = lox.parse(SRC, cache=False)
+    [use] = find(tree, Assign, "a")
+    assert (use.depth, use.slot) == (1, 0)
+    [use] = find(tree, Var, "outer")
+    assert use.slot == -1
+    for x in find(tree, Var, "x"):
+        assert (x.depth, x.slot) == (0, 0)
+
+
+def test_function_frame_merges_params_and_body():
+    tree = lox.parse(SRC, cache=False)
+    [fn] = [node for node in tree.descendants() if isinstance(node, Function) and node.name == "f"]
+    assert fn.frame == {"n": 0, "total": 1}
+    assert fn.body.names is fn.frame
+    [use] = find(tree, Var, "n")[-1:]
+    assert (use.depth, use.slot) == (1, 0)
+
+
+def test_shadowed_param_keeps_separate_scope():
+    # A validação proíbe esse caso, mas árvores construídas manualmente podem
+    # conter parâmetros e variáveis com o mesmo nome.
+    tree = lox.parse("fun g(a) { var b = 2; return b; }", cache=False)
+    [fn] = [node for node in tree.descendants() if isinstance(node, Function)]
+    fn.body.stmts[0].name = "a"
+    resolve(tree)
+    assert fn.frame == {"a": 0}
+    assert fn.body.names == {"a": 0}
+
+
+def test_same_output_as_lookup_by_name(capsys):
+    tree = lox.parse(SRC, cache=False)
+    lox.eval(tree, skip_validation=True)
+    resolved = capsys.readouterr().out
+    unresolve(tree)
+    lox.eval(tree, skip_validation=True)
+    assert capsys.readouterr().out == resolved
+    assert resolved.split() == ["3", "depois", "true", "dentro", "fora", "10"]
+
+
+def test_redefinition_in_block_is_an_error():
+    with pytest.raises(Exception, match="already"):
+        lox.eval("{ var x = 1; var x = 2; }")
+
+
+def test_shared_node_with_conflicting_addresses():
+    var = Var("x")
+    tree = lox.parse("{ var x = 1; } { var y = 2; var x = 3; }", cache=False)
+    first, second = [node for node in tree.stmts if isinstance(node, Block)]
+    first.stmts.append(var)
+    second.stmts.append(var)
+    resolve(tree)
+    assert (var.depth, var.slot) == (-1, -1)
+
+
+def test_ctx_names_in_slotted_scope():
+    ctx = Ctx({}, Ctx({"g": 1.0}), [2.0, UNSET], {"a": 0, "b": 1})
+    assert ctx["a"] == 2.0 and ctx["g"] == 1.0
+    assert "a" in ctx and "b" not in ctx
+    ctx.var_def("b", 3.0)
+    ctx.assign("a", 4.0)
+    assert ctx.slots == [4.0, 3.0]
+    assert ctx.variables() == {"a": 4.0, "b": 3.0}
+    with pytest.raises(KeyError):
+        ctx.declare(0, "a", 5.0)
+
+
+def test_ctx_repr_omits_slots():
+    ctx = Ctx({"a": 1.0}, Ctx({}, None, [UNSET], {"b": 0}))
+    assert "slots" not in repr(ctx) and "names" not in repr(ctx)
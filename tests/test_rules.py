@@ -0,0 +1,88 @@
+from types import SimpleNamespace
+
+import pytest
+
+import lox
+from lox.ast import BinOp
+from lox.rules import Barrier, ExprTable, Shared, compile_rules, structural_hash
+
+ENV = {
+    "price": 10.0,
+    "qty": 20.0,
+    "tax": 0.5,
+    "a": SimpleNamespace(b=SimpleNamespace(c=1.0)),
+}
+
+
+class Counter:
+    # Operador que conta quantas vezes foi chamado.
+    def __init__(self, op):
+        self.op = op
+        self.calls = 0
+
+    def __call__(self, a, b):
+        self.calls += 1
+        return self.op(a, b)
+
+
+def test_structural_hash():
+    assert structural_hash(lox.parse_expr("a + b * 2")) == structural_hash(lox.parse_expr("a+b*2"))
+    assert structural_hash(lox.parse_expr("a + b")) != structural_hash(lox.parse_expr("b + a"))
+    assert structural_hash(lox.parse_expr("true")) != structural_hash(lox.parse_expr("1"))
+
+
+def test_table_merges_identical_pure_subtrees():
+    table = ExprTable()
+    first = table.intern(lox.parse_expr("price * qty + 1"))
+    size = len(table)
+    second = table.intern(lox.parse_expr("price * qty + 1"))
+    assert first == second and len(table) == size
+    table.intern(lox.parse_expr("f(price * qty)"))
+    assert len(table) == size + 2  # apenas `f` e a chamada são novos
+
+
+def test_results_match_separate_evaluation():
+    sources = [
+        "price * qty > 100",
+        "price * qty * tax",
+        "a.b.c + price * qty",
+        "-(price * qty) + a.b.c",
+        "price * qty == price * qty",
+        "true and price * qty",
+        "nil or a.b.c",
+        "1",
+        "true",
+    ]
+    rules = compile_rules(sources)
+    expected = [lox.eval(src, dict(ENV)) for src in sources]
+    assert rules.eval(dict(ENV)) == expected
+    assert rules.nodes < rules.source_nodes
+    assert rules.shared == 2  # price * qty e a.b.c
+    assert isinstance(rules.rules[0].left, Shared)
+
+
+def test_shared_nodes_are_evaluated_once():
+    mul = Counter(lambda a, b: a * b)
+    exprs = [lox.parse_expr(src) for src in ["price * qty + 1", "price * qty + 2", "price * qty"]]
+    for expr in exprs:
+        for node in expr.descendants():
+            if isinstance(node, BinOp) and node.left == lox.parse_expr("price"):
+                node.op = mul
+    rules = compile_rules(exprs)
+    assert rules.eval(ENV) == [201.0, 202.0, 200.0]
+    assert mul.calls == 1
+    assert rules.eval({**ENV, "qty": 1.0}) == [11.0, 12.0, 10.0]
+    assert mul.calls == 2
+
+
+def test_side_effects_invalidate_shared_values():
+    rules = compile_rules(["x * 2", "x = x + 1", "x * 2"])
+    assert isinstance(rules.rules[1], Barrier)
+    assert rules.eval({"x": 1.0}) == [2.0, 2.0, 4.0]
+
+
+def test_errors_propagate():
+    rules = compile_rules(["price * qty", "missing + 1"])
+    with pytest.raises(NameError):
+        rules.eval(ENV)
+    assert rules.eval({**ENV, "missing": 1.0}) == [200.0, 2.0]
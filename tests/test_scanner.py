@@ -0,0 +1,85 @@
+from array import array
+from pathlib import Path
+
+import pytest
+from lark.exceptions import UnexpectedCharacters, UnexpectedInput
+
+import lox
+from lox import scanner
+from lox.parser import get_ast_parser, lex
+
+EXAMPLES = Path(__file__).parent.parent / "exemplos"
+SOURCES = sorted(EXAMPLES.rglob("*.lox"))
+
+
+def lark_lex(src: str):
+    return list(get_ast_parser("lark").lex(src))
+
+
+@pytest.mark.parametrize("path", SOURCES, ids=lambda p: str(p.relative_to(EXAMPLES)))
+def test_scanner_lex_is_identical_to_lark(path: Path):
+    src = path.read_text()
+    try:
+        expected = [
+            (t.type, t.value, t.line, t.column, t.end_line, t.end_column)
+            for t in lark_lex(src)
+        ]
+    except UnexpectedCharacters as exc:
+        with pytest.raises(UnexpectedCharacters) as info:
+            list(lex(src, lexer="scanner"))
+        assert (info.value.line, info.value.column) == (exc.line, exc.column)
+        return
+
+    tokens = lex(src, lexer="scanner")
+    result = [
+        (t.type, t.value, t.line, t.column, t.end_line, t.end_column) for t in tokens
+    ]
+    assert result == expected
+
+
+def test_tokens_are_stored_compactly():
+    tokens = scanner.scan('var x = "a\nb";\nprint x;')
+    assert isinstance(tokens.data, array)
+    assert len(tokens) == 8
+    assert [tokens.text(i) for i in range(len(tokens))] == [
+        "var", "x", "=", '"a\nb"', ";", "print", "x", ";"
+    ]
+    assert tokens[0] == (scanner.FIRST_KEYWORD + scanner.KEYWORDS.index("var"), 0, 3)
+    assert tokens.line_col(5) == (3, 1)
+    assert tokens.line_col(-1) == (3, 8)
+
+
+def test_named_tokens():
+    names = list(scanner.scan("var truex = nil; // ok").named())
+    assert names == [
+        ("__ANON_0", "var"),
+        ("BOOL", "true"),
+        ("VAR", "x"),
+        ("EQUAL", "="),
+        ("NIL", "nil"),
+        ("SEMICOLON", ";"),
+    ]
+
+
+def test_comments_can_be_kept():
+    tokens = scanner.scan("1; // comentário", keep_comments=True)
+    assert tokens[-1].kind == scanner.COMMENT
+    assert tokens.text(-1) == "// comentário"
+
+
+def test_invalid_character_raises_lark_error():
+    tokens = scanner.scan("var x = 1 @ 2;")
+    assert tokens[4].kind == scanner.ERROR
+    with pytest.raises(UnexpectedCharacters) as info:
+        list(tokens.lark_tokens())
+    assert (info.value.line, info.value.column) == (1, 11)
+
+
+def test_parse_with_scanner(monkeypatch):
+    src = (EXAMPLES / "function" / "recursion.lox").read_text()
+    expected = lox.parse(src)
+    monkeypatch.setenv("LOX_LEXER", "scanner")
+    assert lox.parse(src) == expected
+
+    with pytest.raises(UnexpectedInput):
+        lox.parse("var x = ;")
@@ -0,0 +1,57 @@
+import copy
+import inspect
+import pickle
+import weakref
+
+import pytest
+
+import lox
+from lox import ast
+from lox.ast import Literal, Print, Var
+from lox.node import Cursor, Node
+
+SRC = "var a = 1; fun f(x) { return x + a; } print f(2);"
+NODE_CLASSES = [
+    cls
+    for _, cls in inspect.getmembers(ast, inspect.isclass)
+    if issubclass(cls, Node) and cls.__module__ == ast.__name__
+]
+
+
+@pytest.mark.parametrize("cls", NODE_CLASSES, ids=lambda cls: cls.__name__)
+def test_nodes_have_no_instance_dict(cls):
+    for base in cls.__mro__:
+        if base is not object:
+            assert "__slots__" in base.__dict__, base
+    assert cls.__dictoffset__ == 0
+
+
+def test_cannot_set_unknown_attributes():
+    node = Var("x")
+    with pytest.raises(AttributeError):
+        node.foo = 1  # type: ignore[attr-defined]
+    assert Cursor(node).node is node
+
+
+def test_vars_weakref_pickle():
+    tree = lox.parse(SRC, cache=False)
+    stmt = tree.stmts[0]
+    assert vars(stmt) == {"name": "a", "initializer": Literal(1.0)}
+    with pytest.raises(TypeError):
+        vars(stmt)["name"] = "b"
+    with pytest.raises(AttributeError):
+        vars(stmt).update(name="b")  # type: ignore[attr-defined]
+    assert stmt.name == "a"
+    assert weakref.ref(stmt)() is stmt
+    assert pickle.loads(pickle.dumps(tree)) == tree
+    assert copy.deepcopy(tree) == tree
+
+
+def test_pretty_and_replace_child():
+    tree = lox.parse(SRC, cache=False)
+    printed = tree.stmts[2]
+    assert isinstance(printed, Print)
+    new = Literal(42.0)
+    printed.replace_child(printed.expr, new)
+    assert printed.expr is new
+    assert "Print(expr=Literal(value=42.0))" in tree.pretty()
@@ -0,0 +1,86 @@
+"""
+Testes de regressão para o tempo de inicialização do interpretador.
+
+Usamos `python -X importtime` para listar os módulos importados em um processo
+novo e medir o tempo gasto com essas importações. Verificamos que os módulos
+pesados só são carregados quando necessário e que o tempo total fica dentro
+do orçamento, que pode ser ajustado com a variável de ambiente
+LOX_STARTUP_BUDGET_MS em máquinas muito lentas.
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent
+BUDGET_MS = float(os.environ.get("LOX_STARTUP_BUDGET_MS", "250"))
+LAZY_MODULES = {"rich", "ipdb", "pytest"}
+
+# Módulos que `import lox` não deve carregar.
+DEFERRED_MODULES = {
+    "lark",
+    "lox.batch",
+    "lox.passes",
+    "lox.positions",
+    "lox.transformer",
+    "multiprocessing",
+}
+
+
+def import_times(code: str) -> tuple[dict[str, int], float, str]:
+    """
+    Executa o código em um novo processo e retorna um dicionário com o tempo
+    cumulativo de cada importação (em microssegundos), o tempo total gasto
+    com importações (em milissegundos) e a saída padrão.
+
+    O tempo cumulativo de um módulo inclui o dos módulos importados por ele,
+    então o total soma apenas as importações de nível superior.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BASE_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = int(cumulative)
+        if not name.startswith("  "):
+            total += int(cumulative)
+    return times, total / 1000, result.stdout
+
+
+def top_level(times: dict[str, int]) -> set[str]:
+    return {name.partition(".")[0] for name in times}
+
+
+def test_import_lox_is_lazy():
+    times, total, _ = import_times("import lox")
+    assert "lox" in times
+    assert not top_level(times) & LAZY_MODULES
+    assert not set(times) & DEFERRED_MODULES
+    assert total < BUDGET_MS
+
+
+def test_running_a_program_stays_within_budget(tmp_path):
+    path = tmp_path / "hello.lox"
+    path.write_text("print 1;")
+    code = (
+        "import sys\n"
+        f"sys.argv = ['lox', {str(path)!r}]\n"
+        "from lox.cli import main\n"
+        "main()\n"
+        "from lox.parser import get_cst_parser\n"
+        "print(get_cst_parser.cache_info().currsize)\n"
+    )
+    times, total, stdout = import_times(code)
+    assert stdout.split() == ["1", "0"], "o parser da CST não deveria ser construído"
+    assert not top_level(times) & LAZY_MODULES
+    assert not set(times) & {"lox.batch", "multiprocessing"}
+    assert total < BUDGET_MS
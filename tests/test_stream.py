@@ -0,0 +1,98 @@
+import io
+from pathlib import Path
+
+import pytest
+from lark.exceptions import UnexpectedToken
+
+import lox
+from lox.ctx import Ctx
+from lox.stream import eval_file, iter_declarations
+
+EXAMPLES = Path(__file__).parent.parent / "exemplos"
+SRC = """\
+var a = 1;
+print a;
+fun f(x) { return x * 2; }
+print f(21);
+if (a) print "sim"; else print "não";
+// comentário
+print "a;b";
+"""
+
+
+def run(stmts, ctx: Ctx):
+    for stmt in stmts:
+        stmt.eval(ctx)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 16, 1 << 16])
+def test_stream_produces_the_same_declarations(chunk_size):
+    stmts = list(iter_declarations(io.StringIO(SRC), chunk_size))
+    assert stmts == lox.parse(SRC).stmts
+
+
+def test_stream_runs_declarations_before_reading_the_rest():
+    class Source(io.StringIO):
+        reads = 0
+
+        def read(self, size=-1):
+            self.reads += 1
+            return super().read(size)
+
+    file = Source("print 1;\n" * 100)
+    stmts = iter_declarations(file, chunk_size=20)
+    next(stmts)
+    assert file.reads == 1
+
+
+def test_stream_reports_errors_with_file_positions(capsys):
+    src = SRC + "print 1;\n  print x +;\nprint 2;\n"
+    stmts = iter_declarations(io.StringIO(src), chunk_size=4)
+    with pytest.raises(UnexpectedToken) as info:
+        run(stmts, Ctx.from_dict({}))
+    assert (info.value.token, info.value.line, info.value.column) == (";", 9, 12)
+    assert capsys.readouterr().out.split() == ["1", "42", "sim", "a;b", "1"]
+
+
+def test_stream_matches_eval_on_examples(capsys):
+    for path in sorted(EXAMPLES.rglob("*.lox")):
+        if path.parent.name == "benchmark":
+            continue
+        src = path.read_text()
+        try:
+            program = lox.parse(src, cache=False)
+        except Exception:
+            continue
+        try:
+            program.eval(Ctx.from_dict({}))
+        except Exception:
+            expected_error = True
+        else:
+            expected_error = False
+        expected = capsys.readouterr().out
+
+        try:
+            run(iter_declarations(io.StringIO(src), chunk_size=7), Ctx.from_dict({}))
+        except Exception:
+            assert expected_error, path
+        else:
+            assert not expected_error, path
+        assert capsys.readouterr().out == expected, path
+
+
+def test_eval_file(tmp_path, capsys):
+    path = tmp_path / "script.lox"
+    path.write_text(SRC)
+    ctx = eval_file(path, chunk_size=8)
+    assert ctx["a"] == 1
+    assert capsys.readouterr().out.split() == ["1", "42", "sim", "a;b"]
+
+
+def test_eval_file_reports_syntax_errors(tmp_path, capsys):
+    path = tmp_path / "script.lox"
+    path.write_text("print 1;\nprint;\n")
+    with pytest.raises(UnexpectedToken):
+        eval_file(path)
+    out = capsys.readouterr().out
+    assert out.startswith("1\nPrograma terminou com um erro: Unexpected token")
+    assert "line 2, column 6" in out
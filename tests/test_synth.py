@@ -0,0 +1,48 @@
+import pytest
+
+import lox
+from lox.ast import Block, Function
+from lox.synth import SHAPES, generate
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+@pytest.mark.parametrize("lines", [1, 7, 500])
+def test_exact_number_of_lines(shape, lines):
+    src = generate(lines, shape)
+    assert src.count("\n") == lines
+    assert src.endswith("\n")
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+@pytest.mark.parametrize("backend", ["lark", "pratt"])
+def test_programs_are_valid(shape, backend):
+    src = generate(2_000, shape)
+    tree = lox.parse(src, cache=False, backend=backend)
+    assert tree.stmts
+
+
+def test_deterministic():
+    assert generate(300, "mixed") == generate(300, "mixed")
+
+
+def test_nesting_depth():
+    def block_depth(node, level=0):
+        if isinstance(node, Block):
+            level += 1
+        return max([level, *(block_depth(child, level) for child in node.children())])
+
+    for depth in (1, 10, 40):
+        tree = lox.parse(generate(5_000, "nesting", depth=depth), cache=False)
+        functions = [stmt for stmt in tree.stmts if isinstance(stmt, Function)]
+        assert max(block_depth(fn) for fn in functions) >= depth
+
+
+def test_chain_width():
+    src = generate(100, "chains", width=200)
+    assert src.splitlines()[2].strip().startswith("0 +")
+    lox.parse(src, cache=False)
+
+
+def test_unknown_shape():
+    with pytest.raises(ValueError):
+        generate(10, "spaghetti")
@@ -0,0 +1,93 @@
+import pytest
+
+import lox
+from lox import flat
+from lox.ast import BinOp, Expr, Function, Literal, Node, Program, Stmt, Var
+from lox.node import visit_once
+from lox.visitor import Visitor, resolve
+
+SRC = """
+fun f(x) {
+  fun g(y) { return y + x; }
+  return g(1) * 2;
+}
+print f(3);
+"""
+
+
+@pytest.fixture
+def tree():
+    return lox.parse(SRC, cache=False)
+
+
+def names(nodes):
+    return [type(node).__name__ for node in nodes]
+
+
+def test_post_order_visits_children_first(tree):
+    visited = []
+    tree.visit({Node: visited.append})
+    assert visited[-1] is tree
+    assert sorted(map(id, visited)) == sorted(map(id, tree.descendants()))
+    for node in visited:
+        # cada nó aparece depois de todos os seus filhos
+        for child in node.children():
+            assert visited.index(child) < visited.index(node)
+
+
+def test_pre_order_matches_descendants(tree):
+    visited = []
+    Visitor(pre={Node: visited.append}).walk(tree)
+    assert visited == list(tree.descendants())
+
+
+def test_most_specific_handler_wins(tree):
+    seen = []
+    tree.visit({Expr: lambda n: seen.append("expr"), BinOp: lambda n: seen.append("binop")})
+    assert seen.count("binop") == 2
+    assert "expr" in seen
+
+
+def test_pre_hook_can_skip_children(tree):
+    visited = []
+    visitor = Visitor(
+        pre={Function: lambda node: node.name != "g"},
+        post={Var: lambda node: visited.append(node.name)},
+    )
+    tree.visit(visitor)
+    assert "y" not in visited
+    assert visited.count("x") == 1  # apenas o parâmetro de f
+
+
+def test_leaves_only_with_non_node_handlers(tree):
+    leaves = []
+    tree.visit({str: leaves.append})
+    assert leaves[:2] == ["f", "x"]
+    assert not Visitor(post={Stmt: print}).leaves
+    assert Visitor(post={object: print}).leaves
+
+
+def test_handlers_are_cached(tree):
+    visitor = Visitor(post={Expr: lambda n: None})
+    tree.visit(visitor)
+    pre, post = visitor.handlers(Var)
+    assert pre is None and post is visitor.post[Expr]
+    assert visitor.handlers(Program) == (None, None)
+    assert resolve({Node: 1, Literal: 2}, Literal) == 2
+
+
+def test_visit_once_does_not_hide_key_errors():
+    def handler(node):
+        raise KeyError("boom")
+
+    with pytest.raises(KeyError):
+        visit_once(Var("x"), {Var: handler, Node: lambda n: None})
+
+
+def test_flat_views(tree):
+    root = flat.flatten(tree).root
+    expected, got = [], []
+    Visitor(pre={Node: lambda n: expected.append(type(n))}).walk(tree)
+    root.visit(Visitor(pre={Node: lambda n: got.append(n.__class__)}))
+    assert got == expected
+    assert names(n for n in tree.descendants()) == [cls.__name__ for cls in got]